@@ -1,4 +1,13 @@
 from .bbclient import *
 from .bbcommon import *
+from .bbcolumnar import *
 from .bbevent import *
+from .bbdispatch import *
+from .bbjournal import *
+from .bbmonitor import *
+from .bbtiming import *
+from .bbsstate import *
+from .bbtaskhash import *
+from .bbdaemon import *
+from .bbasync import *
 from .console import *
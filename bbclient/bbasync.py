@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+This file provides asyncio client for bitbake server.
+"""
+
+import uuid
+import asyncio
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial, wraps
+from logging import CRITICAL
+from typing import Any, Callable, List, Optional, Sequence, Type
+
+from .bbclient import BBClient, CommandFuture, DEFAULT_ENV_CACHE_DIR
+from .bbevent import *
+
+class AsyncEventStream:
+    """Async iterator of events from AsyncBBClient.events
+
+    Attributes:
+        __client (BBClient): client the callbacks are registered to
+        __executor (ThreadPoolExecutor): worker thread of AsyncBBClient
+        __queue (asyncio.Queue[BBEventBase]): events not consumed yet
+        __registered (List[concurrent.futures.Future]): futures of callback ids
+        __is_closed (bool): stream is closed or not
+    """
+
+    def __init__(
+        self: "AsyncEventStream",
+        client: BBClient,
+        executor: ThreadPoolExecutor,
+        event_types: Sequence[Type[BBEventBase]],
+        maxsize: int,
+    ) -> None:
+        """Register callbacks for the event types
+
+        Args:
+            self (AsyncEventStream): none
+            client (BBClient): client to register callbacks to
+            executor (ThreadPoolExecutor): worker thread of AsyncBBClient
+            event_types (Sequence[Type[BBEventBase]]): event types to receive
+            maxsize (int): see AsyncBBClient.events
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        self.__client: BBClient = client
+        self.__executor: ThreadPoolExecutor = executor
+        self.__queue: "asyncio.Queue[BBEventBase]" = asyncio.Queue(maxsize)
+        self.__is_closed: bool = False
+        def event_watcher(_: BBClient, event: BBEventBase) -> None:
+            loop.call_soon_threadsafe(self.__put_event, event)
+        # registering callback may send set_event_mask command, so it runs in the worker thread like other commands.
+        # it's submitted without waiting, so it runs before the commands submitted after this.
+        self.__registered: List["Future[uuid.UUID]"] = [
+            executor.submit(client.register_callback, event_type, event_watcher) for event_type in event_types
+        ]
+
+    def __aiter__(self: "AsyncEventStream") -> "AsyncEventStream":
+        return self
+
+    async def __anext__(self: "AsyncEventStream") -> BBEventBase:
+        if self.__is_closed:
+            raise StopAsyncIteration
+        for registered in self.__registered:
+            await asyncio.wrap_future(registered)
+        return await self.__queue.get()
+
+    async def __aenter__(self: "AsyncEventStream") -> "AsyncEventStream":
+        return self
+
+    async def __aexit__(self: "AsyncEventStream", *_: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self: "AsyncEventStream") -> None:
+        """Stop receiving events
+
+        Args:
+            self (AsyncEventStream): none
+        """
+        if self.__is_closed:
+            return
+        self.__is_closed = True
+        for registered in self.__registered:
+            unique_id: uuid.UUID = await asyncio.wrap_future(registered)
+            try:
+                await asyncio.get_running_loop().run_in_executor(self.__executor, self.__client.unregister_callback, unique_id)
+            except RuntimeError:
+                # the worker thread is already stopped with the server
+                self.__client.unregister_callback(unique_id)
+
+    def __put_event(self: "AsyncEventStream", event: BBEventBase) -> None:
+        if self.__is_closed:
+            return
+        if self.__queue.full():
+            self.__queue.get_nowait()
+        self.__queue.put_nowait(event)
+
+class AsyncBBClient:
+    """asyncio client for bitbake server
+
+    Attributes:
+        client (BBClient): BBClient instance which actually talks to bitbake server
+        __executor (ThreadPoolExecutor): one worker thread which runs blocking commands in order
+
+    Note:
+        | All the BBClient commands are available as coroutine functions, like `await client.get_recipes()`.
+        | Commands which wait for async command like build_targets don't occupy the worker thread.
+        | They send *_async command and await its CommandFuture, which is resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent.
+    """
+
+    def __init__(
+        self: "AsyncBBClient",
+        project_abs_path: str,
+        init_script_path: str = ":",
+        logging_level: int = CRITICAL,
+        env_cache_dir: Optional[str] = DEFAULT_ENV_CACHE_DIR,
+    ) -> None:
+        """Initialize AsyncBBClient instance
+
+        Args:
+            self (AsyncBBClient): none
+            project_abs_path (str): see BBClient
+            init_script_path (str): see BBClient
+            logging_level (int): see BBClient
+            env_cache_dir (Optional[str]): see BBClient
+        """
+        self.client: BBClient = BBClient(project_abs_path, init_script_path, logging_level, env_cache_dir)
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bbclient")
+
+    async def __aenter__(self: "AsyncBBClient") -> "AsyncBBClient":
+        return self
+
+    async def __aexit__(self: "AsyncBBClient", *_: Any) -> None:
+        await self.stop_server()
+
+    def __getattr__(self: "AsyncBBClient", name: str) -> Callable[..., Any]:
+        if name.startswith("_") or name == "client":
+            raise AttributeError(name)
+        command: Any = getattr(self.client, name)
+        if not callable(command):
+            return command
+        if not name.endswith("_async") and hasattr(self.client, name + "_async"):
+            return self.__wrap_synchronized_command(name)
+        return self.__wrap_blocking_command(command)
+
+    async def start_server(self: "AsyncBBClient", parse: str = "eager", **kwargs: Any) -> bool:
+        """Start bitbake server
+
+        Args:
+            self (AsyncBBClient): none
+            parse (str): see BBClient.start_server
+            kwargs (Any): other options of BBClient.start_server, like event_mask and progress_window
+
+        Returns:
+            bool: start_server result
+        """
+        return await self.__run_blocking(self.client.start_server, parse, **kwargs)
+
+    async def stop_server(self: "AsyncBBClient", timeout: float = 2.0) -> None:
+        """Stop bitbake server and the worker thread
+
+        Args:
+            self (AsyncBBClient): none
+            timeout (float): see BBClient.stop_server
+        """
+        await self.__run_blocking(self.client.stop_server, timeout)
+        self.__executor.shutdown(wait=False)
+
+    def events(self: "AsyncBBClient", *event_types: Type[BBEventBase], maxsize: int = 0) -> "AsyncEventStream":
+        """Iterate events from bitbake server
+
+        Args:
+            self (AsyncBBClient): none
+            event_types (Type[BBEventBase]): event types to receive
+            maxsize (int): max number of events kept until consumed. If the queue is full, the oldest event is dropped. 0 means unlimited.
+
+        Returns:
+            AsyncEventStream: async iterator of events. It is also an async context manager which stops receiving.
+
+        Note:
+            | Use like `async with client.events(TaskStartedEvent, TaskSucceededEvent) as stream: async for event in stream:`.
+            | Callbacks are registered when this command is called, before commands called after it, so events of them are never missed.
+            | Call this in a coroutine. Events are received until the stream is closed.
+        """
+        return AsyncEventStream(self.client, self.__executor, event_types, maxsize)
+
+    def __wrap_blocking_command(self: "AsyncBBClient", command: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(command)
+        async def inner_function(*args: Any, **kwargs: Any) -> Any:
+            return await self.__run_blocking(command, *args, **kwargs)
+        return inner_function
+
+    def __wrap_synchronized_command(self: "AsyncBBClient", name: str) -> Callable[..., Any]:
+        async_command: Callable[..., Any] = getattr(self.client, name + "_async")
+        @wraps(getattr(self.client, name))
+        async def inner_function(*args: Any, **kwargs: Any) -> BBEventBase:
+            future: CommandFuture = await self.__run_blocking(async_command, *args, **kwargs)
+            return await asyncio.wrap_future(future)
+        return inner_function
+
+    async def __run_blocking(self: "AsyncBBClient", command: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, partial(command, *args, **kwargs))
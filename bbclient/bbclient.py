@@ -18,17 +18,31 @@ __version__ = "1.0.0"
 
 import os
 import sys
+import glob
+import json
 import uuid
 import time
+import shlex
+import hashlib
+import tempfile
+import itertools
 import threading
 import subprocess
+import collections
 
+from concurrent.futures import Future, CancelledError, ThreadPoolExecutor, TimeoutError
 from functools import wraps
 from logging import Logger, StreamHandler, getLogger, DEBUG, CRITICAL, Formatter
-from typing import Any, List, Optional, Mapping, Callable, Iterable, Type
+from typing import Any, Deque, Dict, FrozenSet, Iterator, List, Optional, Mapping, Callable, Iterable, Set, Tuple, Type, Union
 
 from .bbcommon import *
+from .bbcolumnar import *
 from .bbevent import *
+from .bbdispatch import *
+
+DEFAULT_ENV_CACHE_DIR: str = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "bbclient", "env"
+)
 
 class CallBack:
     """CallBack for bitbake events
@@ -36,27 +50,294 @@ class CallBack:
     Attributes:
         target_event_type (Optional[BBEventBase]): trigger event type for callback function
         callback (Callable[["BBClient", BBEventBase], None]): callback function
+        include_subclasses (bool): whether subclasses of target_event_type also trigger callback function
+        dispatcher (CallbackDispatcher): runs callback function for events
     """
-    def __init__(self: "CallBack", target_event_type: Optional[BBEventBase], callback: Callable[["BBClient", BBEventBase], None]) -> None:
+    def __init__(
+        self: "CallBack",
+        target_event_type: Optional[BBEventBase],
+        callback: Callable[["BBClient", BBEventBase], None],
+        include_subclasses: bool = False,
+        dispatcher: Optional[CallbackDispatcher] = None,
+    ) -> None:
         """Initialze
 
         Args:
             self (CallBack): CallBack instance
             target_event_type (Optional[BBEventBase]): trigger event type for callback function
             callback (Callable[["BBClient", BBEventBase], None]): callback function
+            include_subclasses (bool): whether subclasses of target_event_type also trigger callback function
+            dispatcher (Optional[CallbackDispatcher]): runs callback function for events. If None, callback function runs in the event monitor thread.
         """        
         self.target_event_type: Optional[BBEventBase] = target_event_type
         self.callback: Callable[["BBClient", BBEventBase], None] = callback
+        self.include_subclasses: bool = include_subclasses
+        self.dispatcher: CallbackDispatcher = dispatcher or CallbackDispatcher(callback)
+
+    def is_target(self: "CallBack", event_type: Type[BBEventBase]) -> bool:
+        """Determine if the event type triggers callback function
+
+        Args:
+            self (CallBack): CallBack instance
+            event_type (Type[BBEventBase]): type of the event
+
+        Returns:
+            bool: whether the event type triggers callback function or not
+        """
+        if self.include_subclasses:
+            return issubclass(event_type, self.target_event_type) # type: ignore
+        return event_type == self.target_event_type
+
+class CommandFuture(Future):
+    """Future for the result of a command sent to bitbake server
+
+    Attributes:
+        command (str): command name
+        command_id (int): id of the command, which is unique in BBClient. 0 for batched commands.
+        __on_cancel (Optional[Callable[["CommandFuture"], None]]): function to stop the command on bitbake server when this future is cancelled
+
+    Note:
+        | This is concurrent.futures.Future, so result(timeout), done(), add_done_callback(fn) and cancel() are available.
+        | The future of async command like build_targets_async is resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent.
+        | Cancelling the future of running async command requests state_shutdown to bitbake server. Cancelling queued one just removes it from the queue.
+    """
+
+    def __init__(
+        self: "CommandFuture",
+        command: str = "",
+        on_cancel: Optional[Callable[["CommandFuture"], None]] = None,
+        command_id: int = 0,
+    ) -> None:
+        """Initialize
+
+        Args:
+            self (CommandFuture): none
+            command (str): command name
+            on_cancel (Optional[Callable[[CommandFuture], None]]): function to stop the command on bitbake server when this future is cancelled
+            command_id (int): id of the command
+        """
+        super().__init__()
+        self.command: str = command
+        self.command_id: int = command_id
+        self.__on_cancel: Optional[Callable[["CommandFuture"], None]] = on_cancel
+
+    def cancel(self: "CommandFuture") -> bool:
+        """Cancel the command
+
+        Args:
+            self (CommandFuture): none
+
+        Returns:
+            bool: False if the future is already done, otherwise True
+        """
+        if not super().cancel():
+            return False
+        if self.__on_cancel:
+            self.__on_cancel(self)
+        return True
+
+class BBBatch:
+    """Queue commands and send them to bitbake server back-to-back
+
+    Attributes:
+        round_trips_saved (int): number of round trips saved by sending commands back-to-back
+        __run_commands (Callable[[List[List[Any]]], Tuple[List[Tuple[Any, Optional[str]]], int]]): function to send commands. It returns the results and the number of round trips.
+        __commands (List[Tuple[List[Any], Callable[[Any], Any], CommandFuture]]): queued command lines, result converters and futures
+        __symbols (Optional[SymbolTable]): symbol table for columnar results
+
+    Note:
+        | Use this via BBClient.batch like below. Each command returns CommandFuture, and the futures are resolved in order when leaving the with block.
+        | with client.batch() as batch:
+        |     recipes: CommandFuture = batch.get_recipes()
+        |     versions: CommandFuture = batch.get_recipe_versions()
+        | print(recipes.result())
+    """
+
+    def __init__(
+        self: "BBBatch",
+        run_commands: Callable[[List[List[Any]]], Tuple[List[Tuple[Any, Optional[str]]], int]],
+        symbols: Optional[SymbolTable] = None,
+    ) -> None:
+        """Initialize
+
+        Args:
+            self (BBBatch): none
+            run_commands (Callable[[List[List[Any]]], Tuple[List[Tuple[Any, Optional[str]]], int]]): function to send commands
+            symbols (Optional[SymbolTable]): symbol table for columnar results. If None, each columnar result has its own. Defaults to None.
+        """
+        self.round_trips_saved: int = 0
+        self.__run_commands: Callable[[List[List[Any]]], Tuple[List[Tuple[Any, Optional[str]]], int]] = run_commands
+        self.__commands: List[Tuple[List[Any], Callable[[Any], Any], CommandFuture]] = []
+        self.__symbols: Optional[SymbolTable] = symbols
+
+    def __enter__(self: "BBBatch") -> "BBBatch":
+        return self
+
+    def __exit__(self: "BBBatch", exc_type: Optional[Type[BaseException]], *_: Any) -> None:
+        if exc_type:
+            for _, _, future in self.__commands:
+                future.cancel()
+            self.__commands = []
+            return
+        self.flush()
+
+    def flush(self: "BBBatch") -> None:
+        """Send queued commands and resolve their futures in order
+
+        Args:
+            self (BBBatch): none
+        """
+        commands, self.__commands = self.__commands, []
+        if not commands:
+            return
+        results, round_trip_count = self.__run_commands([commandline for commandline, _, _ in commands])
+        self.round_trips_saved += len(commands) - round_trip_count
+        for (commandline, converter, future), (ret, error) in zip(commands, results):
+            if not future.set_running_or_notify_cancel():
+                continue
+            if error:
+                future.set_exception(BBCommandError(commandline[0], error))
+                continue
+            try:
+                future.set_result(converter(ret))
+            except Exception as e:
+                future.set_exception(e)
+
+    def get_variable(self: "BBBatch", name: str, expand: bool = True) -> CommandFuture:
+        """See BBClient.get_variable"""
+        return self.__enqueue(["getVariable", name, "True" if expand else "False"], lambda ret: ret)
+
+    def get_layer_priorities(self: "BBBatch") -> CommandFuture:
+        """See BBClient.get_layer_priorities"""
+        return self.__enqueue(["getLayerPriorities"], lambda ret: [GetLayerPrioritiesResult(layer) for layer in ret])
+
+    def get_recipes(self: "BBBatch", multi_config: str = "", columnar: bool = False) -> CommandFuture:
+        """See BBClient.get_recipes"""
+        if columnar:
+            return self.__enqueue(["getRecipes", multi_config], lambda ret: ColumnarTable.from_lists(GetRecipesResult, ret, self.__symbols))
+        return self.__enqueue(["getRecipes", multi_config], GetRecipesResult._make_all)
+
+    def get_recipe_depends(self: "BBBatch", multi_config: str = "", columnar: bool = False) -> CommandFuture:
+        """See BBClient.get_recipe_depends"""
+        if columnar:
+            return self.__enqueue(["getRecipeDepends", multi_config], lambda ret: ColumnarTable.from_lists(GetRecipeDependsResult, ret, self.__symbols))
+        return self.__enqueue(["getRecipeDepends", multi_config], GetRecipeDependsResult._make_all)
+
+    def get_recipe_versions(self: "BBBatch", multi_config: str = "", columnar: bool = False) -> CommandFuture:
+        """See BBClient.get_recipe_versions"""
+        if columnar:
+            return self.__enqueue(["getRecipeVersions", multi_config], lambda ret: ColumnarTable.from_recipe_versions(ret, self.__symbols))
+        return self.__enqueue(["getRecipeVersions", multi_config], lambda ret: GetRecipeVersionsResult._make_all((key, *value) for key, value in ret.items()))
+
+    def get_recipe_provides(self: "BBBatch", multi_config: str = "", columnar: bool = False) -> CommandFuture:
+        """See BBClient.get_recipe_provides"""
+        if columnar:
+            return self.__enqueue(["getRecipeProvides", multi_config], lambda ret: ColumnarTable.from_lists(GetRecipeProvidesResult, ret.items(), self.__symbols))
+        return self.__enqueue(["getRecipeProvides", multi_config], lambda ret: GetRecipeProvidesResult._make_all(ret.items()))
+
+    def get_recipe_packages(self: "BBBatch", multi_config: str = "") -> CommandFuture:
+        """See BBClient.get_recipe_packages"""
+        return self.__enqueue(["getRecipePackages", multi_config], lambda ret: GetRecipePackagesResult._make_all(ret.items()))
+
+    def get_recipe_packages_dynamic(self: "BBBatch", multi_config: str = "") -> CommandFuture:
+        """See BBClient.get_recipe_packages_dynamic"""
+        return self.__enqueue(["getRecipePackagesDynamic", multi_config], lambda ret: GetRecipePackagesDynamicResult._make_all(ret.items()))
+
+    def get_r_providers(self: "BBBatch", multi_config: str = "") -> CommandFuture:
+        """See BBClient.get_r_providers"""
+        return self.__enqueue(["getRProviders", multi_config], lambda ret: GetRProvidersResult._make_all(ret.items()))
+
+    def get_runtime_depends(self: "BBBatch", multi_config: str = "") -> CommandFuture:
+        """See BBClient.get_runtime_depends"""
+        return self.__enqueue(["getRuntimeDepends", multi_config], GetRuntimeDependsResult._make_all)
+
+    def get_runtime_recommends(self: "BBBatch", multi_config: str = "") -> CommandFuture:
+        """See BBClient.get_runtime_recommends"""
+        return self.__enqueue(["getRuntimeRecommends", multi_config], GetRuntimeRecommendsResult._make_all)
+
+    def get_recipe_inherits(self: "BBBatch", multi_config: str = "", columnar: bool = False) -> CommandFuture:
+        """See BBClient.get_recipe_inherits"""
+        if columnar:
+            return self.__enqueue(["getRecipeInherits", multi_config], lambda ret: ColumnarTable.from_lists(GetRecipeInheritsResult, ret.items(), self.__symbols))
+        return self.__enqueue(["getRecipeInherits", multi_config], lambda ret: GetRecipeInheritsResult._make_all(ret.items()))
+
+    def get_bb_file_priority(self: "BBBatch", multi_config: str = "", columnar: bool = False) -> CommandFuture:
+        """See BBClient.get_bb_file_priority"""
+        if columnar:
+            return self.__enqueue(["getBbFilePriority", multi_config], lambda ret: ColumnarTable.from_mapping(GetBbFilePriorityResult, ret, self.__symbols))
+        return self.__enqueue(["getBbFilePriority", multi_config], lambda ret: GetBbFilePriorityResult._make_all(ret.items()))
+
+    def get_default_preference(self: "BBBatch", multi_config: str = "", columnar: bool = False) -> CommandFuture:
+        """See BBClient.get_default_preference"""
+        if columnar:
+            return self.__enqueue(["getDefaultPreference", multi_config], lambda ret: ColumnarTable.from_mapping(GetDefaultPreferenceResult, ret, self.__symbols))
+        return self.__enqueue(["getDefaultPreference", multi_config], lambda ret: GetDefaultPreferenceResult._make_all(ret.items()))
+
+    def get_file_appends(self: "BBBatch", file_path: str, multi_config: str = "") -> CommandFuture:
+        """See BBClient.get_file_appends"""
+        return self.__enqueue(["getFileAppends", file_path, multi_config], lambda ret: ret)
+
+    def get_all_appends(self: "BBBatch", multi_config: str = "", columnar: bool = False) -> CommandFuture:
+        """See BBClient.get_all_appends"""
+        if columnar:
+            return self.__enqueue(["getAllAppends", multi_config], lambda ret: ColumnarTable.from_rows(GetAllAppendsResult, ret, self.__symbols))
+        return self.__enqueue(["getAllAppends", multi_config], GetAllAppendsResult._make_all)
+
+    def all_providers(self: "BBBatch", multi_config: str = "") -> CommandFuture:
+        """See BBClient.all_providers"""
+        return self.__enqueue(["allProviders", multi_config], lambda ret: [AllProvidersResult(*i) for i in ret])
+
+    def __enqueue(self: "BBBatch", commandline: List[Any], converter: Callable[[Any], Any]) -> CommandFuture:
+        future: CommandFuture = CommandFuture()
+        self.__commands.append((commandline, converter, future))
+        return future
 
 class BBClient:
     """Client for bitbake Server
 
     Attributes:
         project_path (str): poky directory path
+        symbols (SymbolTable): symbol table shared by columnar results of this client
+        EVENT_POLL_INTERVAL (float): interval to check whether the server is stopped in event loop. (seconds)
+        NO_LOG_LEVEL (int): log level to ask the server not to send any log record
+        COMMAND_TIMEOUT (float): timeout to wait for a reply of batched command. (seconds)
+        CALLBACK_POOL_SIZE (int): number of threads to run callback functions registered with dispatch="pool"
+        RECIPE_CACHE_COMMANDS (FrozenSet[str]): bitbake commands which need recipe cache. Batches with them parse recipes first in "lazy" mode.
         __is_server_running (bool): server is running or not
         __server_connection (bb.server.xmlrpcclient.BitBakeXMLRPCServerConnection): touch point to server
         __logger (Optional[Logger]): Logger instance for debugging. Default is None.
+        __command_idle (threading.Event): set while no async command is running or queued
+        __command_lock (threading.RLock): lock to send a command and receive its reply
+        __command_ids (Iterator[int]): source of command ids
+        __running_command (Optional[CommandFuture]): future of the async command running on the server
+        __queued_commands (Deque[Tuple[CommandFuture, Callable[[], Optional[bool]]]]): futures of async commands waiting for the running one and functions to send them
+        __command_futures_lock (threading.Lock): lock for __running_command and __queued_commands
+        __last_command_future (Optional[CommandFuture]): future of the last async command
+        __decode_stats (EventDecodeStats): statistics of decoding events
+        __event_mask_mode (str): "subscribed" or "all". see start_server.
+        __event_mask (Optional[Tuple[int, List[str]]]): log level and event mask sent to the server last time
+        __event_mask_lock (threading.Lock): lock to send event mask in order
+        __ui_handler (Optional[int]): ui handler number of this client
+        __callback_executor (Optional[ThreadPoolExecutor]): thread pool for callback functions registered with dispatch="pool"
+        __event_streams (Set[EventStream]): event streams which are not closed yet
+        __progress_coalescer (Optional[ProgressCoalescer]): coalescer of progress events. None if they are not coalesced.
+        __progress_event_types (Set[Type[BBEventBase]]): event types the coalescer keeps
+        __journal (Optional[EventJournal]): journal every received event is written to. None if no journal is set.
+        __callbacks (Tuple[Mapping[uuid.UUID, CallBack], Dict[type, Tuple[CallBack, ...]]]): registered callbacks and callbacks for each event type. Both are replaced, never modified, when a callback is registered or unregistered.
+        __parent_environs (Dict[str, Mapping[str, str]]): environment init script ran on by the digest of os.environ right after each client applied its build environment
     """
+    EVENT_POLL_INTERVAL: float = 0.1
+    NO_LOG_LEVEL: int = CRITICAL + 1
+    COMMAND_TIMEOUT: float = 60
+    CALLBACK_POOL_SIZE: int = 4
+    RECIPE_CACHE_COMMANDS: FrozenSet[str] = frozenset([
+        "matchFile", "getRecipes", "getRecipeDepends", "getRecipeVersions", "getRecipeProvides", "getRecipePackages",
+        "getRecipePackagesDynamic", "getRProviders", "getRuntimeDepends", "getRuntimeRecommends", "getRecipeInherits",
+        "getBbFilePriority", "getDefaultPreference", "getSkippedRecipes", "getOverlayedRecipes", "getFileAppends",
+        "getAllAppends", "findProviders", "findBestProvider", "allProviders", "getRuntimeProviders", "parseRecipeFile",
+    ])
+
+    __parent_environs: Dict[str, Mapping[str, str]] = {}
 
     def logger_decorator(func: Callable): # type: ignore
         """Decorator for logging
@@ -80,31 +361,66 @@ class BBClient:
     def syncronize_decorator(func: Callable) -> None:
         """Decorator for syncronize
 
+        Args:
+            func (Callable): target function. It has to return CommandFuture of async command.
+
+        Note:
+            | This decorator automatically waits for async
+            | The future is resolved after "inline" callbacks of CommandCompleted, CommandExit and CommandFailed event have run, so they have run when the target function returns.
+        """
+        @wraps(func)
+        def inner_function(self: "BBClient", *args, **kwargs) -> None:
+            future: CommandFuture = func(self, *args, **kwargs)
+            future.result()
+        return inner_function
+
+    def async_command_decorator(func: Callable) -> Callable: # type: ignore
+        """Decorator for async commands
+
+        Args:
+            func (Callable): target function. It has to return the result of __run_command.
+
+        Note:
+            | This decorator makes the target function return CommandFuture.
+            | bitbake server runs only one async command at a time, so the commands are queued in this client and sent one by one.
+            | The next command is sent when CommandCompleted, CommandExit or CommandFailed event of the running one arrives, so each event resolves the future of its own command.
+            | If bitbake server doesn't accept the command, the future is resolved with BBCommandError.
+        """
+        @wraps(func)
+        def inner_function(self: "BBClient", *args, **kwargs) -> CommandFuture:
+            future: CommandFuture = CommandFuture(func.__name__, self.__cancel_command, next(self.__command_ids))
+            with self.__command_futures_lock:
+                self.__queued_commands.append((future, lambda: func(self, *args, **kwargs)))
+                self.__command_idle.clear()
+            self.__last_command_future = future
+            self.__send_next_command()
+            return future
+        return inner_function
+
+    def recipe_cache_decorator(func: Callable) -> Callable: # type: ignore
+        """Decorator for commands which need recipe cache
+
         Args:
             func (Callable): target function
 
         Note:
-            This decorator automatically waits for async
+            | If the server is started with parse="lazy", this decorator parses all recipes before the first command which needs recipe cache.
+            | The first one can't be called in "inline" callback because parsing waits for an event the event monitor thread passes. It raises BBCommandError.
         """
         @wraps(func)
         def inner_function(self: "BBClient", *args, **kwargs):
-            event_monitor: threading.Event = threading.Event()
-            def event_watcher(self: BBClient, event: BBEventBase):
-                event_monitor.set()
-            unique_ids: List[uuid.UUID] = []
-            unique_ids.append(self.register_callback(CommandCompletedEvent, event_watcher))
-            unique_ids.append(self.register_callback(CommandExitEvent, event_watcher))
-            unique_ids.append(self.register_callback(CommandFailedEvent, event_watcher))
-            ret = func(self, *args, **kwargs)
-            event_monitor.wait()
-            for unique_id in unique_ids:
-                self.unregister_callback(unique_id)
-            return ret
+            if self.__parse_mode == "lazy" and not self.__is_parsed:
+                self.__ensure_parsed()
+            return func(self, *args, **kwargs)
         return inner_function
 
     # --- setup functions ---
     def __init__(
-        self: "BBClient", project_abs_path: str, init_script_path: str = ":", logging_level: int = CRITICAL
+        self: "BBClient",
+        project_abs_path: str,
+        init_script_path: str = ":",
+        logging_level: int = CRITICAL,
+        env_cache_dir: Optional[str] = DEFAULT_ENV_CACHE_DIR,
     ) -> None:
         """Initialize BBClient instance
 
@@ -121,24 +437,49 @@ class BBClient:
                 * INFO = 20
                 * DEBUG = 10
                 * NOTSET = 0
+            env_cache_dir (Optional[str]): directory to cache the environment captured by init_script_path. If None, the environment is captured every time.
+
+        Note:
+            | Capturing the environment needs to run init_script_path by bash, so the result is cached in env_cache_dir.
+            | The cache is invalidated when the project path, init_script_path, the content of the init script, conf/*.conf in the build directory or the parent environment changes.
         """
         self.project_path: str = project_abs_path
+        self.symbols: SymbolTable = SymbolTable()
         self.__is_server_running: bool = False
         self.__logger: Logger = self.__get_default_logger(logging_level)
-        pipe: subprocess.Popen = subprocess.Popen(
-            f"{init_script_path} > /dev/null; env",
-            stdout=subprocess.PIPE,
-            shell=True,
-            cwd=self.project_path,
-            executable="/bin/bash",
-            text=True,
-        )
-        output, _ = pipe.communicate()
-        env = dict((line.split("=", 1) for line in output.splitlines()))
+        parent_env: Mapping[str, str] = self.__get_parent_environment()
+        env: Mapping[str, str] = self.__load_environment_cache(env_cache_dir, self.project_path, init_script_path, parent_env)
+        if env:
+            self.__logger.debug("build environment is loaded from cache.")
+        else:
+            env = self.__capture_environment(self.project_path, init_script_path, parent_env)
+            self.__store_environment_cache(env_cache_dir, self.project_path, init_script_path, parent_env, env)
         os.environ.update(env)
+        BBClient.__parent_environs[self.__get_environment_digest(os.environ)] = parent_env
         self.__event_thread = threading.Thread(target=self.__monitor_event_loop)
+        self.__command_idle: threading.Event = threading.Event()
+        self.__command_idle.set()
+        self.__command_lock: threading.RLock = threading.RLock()
+        self.__command_ids: Iterator[int] = itertools.count(1)
+        self.__running_command: Optional[CommandFuture] = None
+        self.__queued_commands: Deque[Tuple[CommandFuture, Callable[[], Optional[bool]]]] = collections.deque()
+        self.__command_futures_lock: threading.Lock = threading.Lock()
+        self.__last_command_future: Optional[CommandFuture] = None
+        self.__parse_mode: str = "eager"
+        self.__is_parsed: bool = False
+        self.__parse_lock: threading.Lock = threading.Lock()
         self.__callbacks_lock: threading.Lock = threading.Lock()
-        self.__callbacks: Mapping[uuid.UUID, CallBack] = {}
+        self.__callback_executor: Optional[ThreadPoolExecutor] = None
+        self.__event_streams: Set[EventStream] = set()
+        self.__progress_coalescer: Optional[ProgressCoalescer] = None
+        self.__journal: Optional["EventJournal"] = None
+        self.__progress_event_types: Set[Type[BBEventBase]] = set(PROGRESS_EVENTS)
+        self.__decode_stats: EventDecodeStats = EventDecodeStats()
+        self.__event_mask_mode: str = "subscribed"
+        self.__event_mask: Optional[Tuple[int, List[str]]] = None
+        self.__event_mask_lock: threading.Lock = threading.Lock()
+        self.__ui_handler: Optional[int] = None
+        self.__callbacks: Tuple[Mapping[uuid.UUID, CallBack], Dict[type, Tuple[CallBack, ...]]] = ({}, {})
         self.__initialize_callback()
 
     def __del__(self: "BBClient") -> None:
@@ -150,18 +491,42 @@ class BBClient:
         self.stop_server()
 
     @logger_decorator
-    def start_server(self: "BBClient") -> bool:
+    def start_server(
+        self: "BBClient",
+        parse: str = "eager",
+        event_mask: str = "subscribed",
+        progress_window: Optional[float] = None,
+    ) -> bool:
         """Start bitbake server
 
         Args:
             self (BBClient): none
+            parse (str): when to parse all recipes. Defaults to "eager".
+                * "eager": parse all recipes in this command.
+                * "lazy": parse all recipes just before the first command which needs recipe cache, like get_recipes and find_providers. It's skipped if parse_files has already completed, and done again after reset_cooker.
+                * "never": don't parse. If you need recipe cache, please call parse_files by yourself.
+            event_mask (str): which events the server sends. Defaults to "subscribed".
+                * "subscribed": only events registered callbacks wait for and Command* events. Log records are sent only if a callback waits for LogRecord. The mask is widened when callbacks are registered and narrowed when unregister_callback is called.
+                * "all": all the events and log records.
+            progress_window (Optional[float]): if given, progress events are coalesced in this window. (seconds) Defaults to None, which passes all of them.
 
         Returns:
             bool: start_server result
 
         Note:
-            Remote server support deprecated becuase bitbake has some minor software bug when using remote server.
-        """
+            | Remote server support deprecated becuase bitbake has some minor software bug when using remote server.
+            | Commands which only need configuration, like get_variable and get_layer_priorities, don't need to parse recipes. "lazy" saves the time of parsing for them.
+            | If you call set_event_mask by yourself, please use event_mask="all". Otherwise registering callbacks overwrites it.
+            | With progress_window, only the latest TaskProgressEvent, ProcessProgressEvent, CacheLoadProgressEvent and TreeDataPreparationProgressEvent for each process (and processname) is passed to callbacks once per window.
+            | Kept progress events are passed before the next event from the same process, so they never come after the event which finishes them. Other events are never coalesced.
+        """
+        if parse not in ("eager", "lazy", "never"):
+            raise ValueError(f"parse must be eager, lazy or never, but {parse} is given.")
+        if event_mask not in ("subscribed", "all"):
+            raise ValueError(f"event_mask must be subscribed or all, but {event_mask} is given.")
+        self.__parse_mode = parse
+        self.__event_mask_mode = event_mask
+        self.__progress_coalescer = ProgressCoalescer(progress_window) if progress_window else None
         try:
             connection: Optional[Any] = self.__connect_server(
                 self.project_path
@@ -173,47 +538,105 @@ class BBClient:
         self.__server_connection = connection
         self.__is_server_running = True if connection else False
         self.__event_thread.start()
-        ui_handler: int = self.get_uihandler_num()
-        self.set_event_mask(ui_handler, DEBUG, {}, ["*"])
-        self.parse_files()
+        self.__update_event_mask()
+        if self.__is_server_running and parse == "eager":
+            self.__ensure_parsed()
         return self.__is_server_running
 
     @logger_decorator
-    def stop_server(self: "BBClient") -> None:
+    def stop_server(self: "BBClient", timeout: float = 2.0) -> None:
         """Stop bitbake server
 
         Args:
             self (BBClient): none
+            timeout (float): how long to wait for running async command at each shutdown step. (seconds)
+
+        Note:
+            | If an async command is running, this command requests state_shutdown and waits for the command to finish.
+            | If it doesn't finish within timeout, this command requests state_force_shutdown and waits again.
+            | If no async command is running, the server is terminated immediately.
+            | Queued async commands are not sent. Their futures and the future of the running one are resolved with BBCommandError if the command doesn't finish.
+            | Events already queued for "pool" and "ordered" callbacks are still passed to them after this command returns.
+            | Event streams are closed. Events already in them can still be read.
         """
         if not self.__is_server_running:
             return
-        self.state_shutdown()
-        time.sleep(1)
-        self.state_force_shutdown()
-        time.sleep(2)
+        with self.__command_futures_lock:
+            queued_commands: List[Tuple[CommandFuture, Callable[[], Optional[bool]]]] = list(self.__queued_commands)
+            self.__queued_commands.clear()
+        for future, _ in queued_commands:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(BBCommandError(future.command, "bitbake server was stopped"))
+        if not self.__command_idle.is_set():
+            self.state_shutdown()
+            if not self.__command_idle.wait(timeout):
+                self.__logger.warning(f"Running command didn't finish in {timeout} seconds. Force shutdown.")
+                self.state_force_shutdown()
+                self.__command_idle.wait(timeout)
         self.__server_connection.connection.terminateServer()
         self.__server_connection.terminate()
         self.__is_server_running = False
+        with self.__callbacks_lock:
+            event_streams: List[EventStream] = list(self.__event_streams)
+        for stream in event_streams:
+            # "block" stream may stop the event monitor thread, so it's closed before join
+            stream.close()
         self.__event_thread.join()
+        with self.__command_futures_lock:
+            running_command: Optional[CommandFuture] = self.__running_command
+            self.__running_command = None
+            self.__command_idle.set()
+        if running_command and running_command.set_running_or_notify_cancel():
+            running_command.set_exception(BBCommandError(running_command.command, "bitbake server was stopped"))
+        for cur_callback in self.__callbacks[0].values():
+            cur_callback.dispatcher.close()
+        if self.__callback_executor:
+            self.__callback_executor.shutdown(wait=False)
 
     # --- utility functions ---
     @logger_decorator
-    def register_callback(self: "BBClient", target: Type["BBEventBase"], callback: Callable[["BBClient", "BBEventBase"], None]) -> uuid.UUID:
+    def register_callback(
+        self: "BBClient",
+        target: Type["BBEventBase"],
+        callback: Callable[["BBClient", "BBEventBase"], None],
+        include_subclasses: bool = False,
+        dispatch: str = "inline",
+        max_pending: int = 1000,
+        overflow: str = "drop_oldest",
+    ) -> uuid.UUID:
         """Register callback functions for events
 
         Args:
             self (BBClient): none
             target (Type[BBEventBase]): trigger event type for callback function
             callback (Callable[[BBClient, BBEventBase], None]): callback function
+            include_subclasses (bool): if True, subclasses of target also trigger callback function. e.g.) TaskBase, runQueueEvent. Defaults to False.
+            dispatch (str): where to run callback function. "inline", "pool" or "ordered". see CallbackDispatcher. Defaults to "inline".
+            max_pending (int): max number of events waiting for callback function in "pool" and "ordered" mode. Defaults to 1000.
+            overflow (str): what to do when max_pending events are waiting. "drop_oldest", "drop_newest" or "block". see CallbackDispatcher. Defaults to "drop_oldest".
 
         Returns:
             uuid.UUID: Callback id. The user can use this to unregister.
+
+        Note:
+            | Callback functions can register and unregister callbacks. The change is applied from the next event.
+            | If the server is running and the event mask changes, this sends set_event_mask command. see start_server.
+            | "inline" callback runs in the event monitor thread, so slow one delays all the events. Please use "pool" or "ordered" for slow callback like writing to a database.
+            | Use get_callback_stats to see how far callback function lags behind.
         """
         unique_id: uuid.UUID = uuid.uuid4()
-        cur_callback: CallBack = CallBack(target, callback)
         self.__callbacks_lock.acquire()
-        self.__callbacks[unique_id] = cur_callback
+        if dispatch == "pool" and not self.__callback_executor:
+            self.__callback_executor = ThreadPoolExecutor(max_workers=self.CALLBACK_POOL_SIZE, thread_name_prefix="bbclient-callback")
         self.__callbacks_lock.release()
+        dispatcher: CallbackDispatcher = CallbackDispatcher(callback, dispatch, max_pending, overflow, self.__callback_executor, self.__logger)
+        cur_callback: CallBack = CallBack(target, callback, include_subclasses, dispatcher)
+        self.__callbacks_lock.acquire()
+        callbacks: Dict[uuid.UUID, CallBack] = dict(self.__callbacks[0])
+        callbacks[unique_id] = cur_callback
+        self.__callbacks = (callbacks, {})
+        self.__callbacks_lock.release()
+        self.__update_event_mask(narrow=False)
         return unique_id
 
     @logger_decorator
@@ -224,22 +647,175 @@ class BBClient:
             self (BBClient): none
             unique_id (uuid.UUID): Callback id. The user can get this when registering.
         """
-        self.__callbacks_lock.acquire()
-        del self.__callbacks[unique_id]
-        self.__callbacks_lock.release()
+        self.__unregister_callback(unique_id, narrow_event_mask=True)
+
+    @logger_decorator
+    def get_callback_stats(self: "BBClient", unique_id: uuid.UUID) -> CallbackStats:
+        """Get statistics of callback function
+
+        Args:
+            self (BBClient): none
+            unique_id (uuid.UUID): Callback id. The user can get this when registering.
+
+        Returns:
+            CallbackStats: see CallbackStats. lag and pending show how far callback function lags behind the events.
+        """
+        return self.__callbacks[0][unique_id].dispatcher.get_stats()
+
+    @logger_decorator
+    def get_event_decode_stats(self: "BBClient") -> EventDecodeStats:
+        """Get statistics of decoding events
+
+        Args:
+            self (BBClient): none
+
+        Returns:
+            EventDecodeStats: see EventDecodeStats. time_per_event is the average time to decode an event.
+        """
+        return EventDecodeStats(**vars(self.__decode_stats))
+
+    @logger_decorator
+    def batch(self: "BBClient") -> BBBatch:
+        """Queue commands and send them back-to-back
+
+        Args:
+            self (BBClient): none
+
+        Returns:
+            BBBatch: see BBBatch. Commands are sent when leaving the with block or calling BBBatch.flush.
+
+        Note:
+            | If the server supports, the commands are sent at once and the results are received in order, so it costs only one round trip.
+            | Please don't send other commands from other threads while the batch is being flushed.
+            | If the server is started with parse="lazy" and the batch has a command which needs recipe cache, all recipes are parsed before the batch is sent.
+        """
+        return BBBatch(self.__run_commands, self.symbols)
+
+    @logger_decorator
+    def set_journal(self: "BBClient", journal: Optional["EventJournal"]) -> None:
+        """Write every received event to the journal
+
+        Args:
+            self (BBClient): none
+            journal (Optional[EventJournal]): journal to write events to. None stops writing.
+
+        Note:
+            | While a journal is set, bitbake server sends all the events and log records like start_server(event_mask="all").
+            | Events are written in the event monitor thread before they are decoded, so events nobody subscribes to are also kept.
+            | BBClient doesn't close the journal. Please close it after stop_server.
+        """
+        self.__journal = journal
+        self.__update_event_mask()
+
+    @logger_decorator
+    def events(
+        self: "BBClient",
+        *event_types: Type[BBEventBase],
+        predicate: Optional[Callable[[BBEventBase], bool]] = None,
+        timeout: Optional[float] = None,
+        include_subclasses: bool = False,
+        maxsize: int = 1000,
+        overflow: str = "drop_oldest",
+    ) -> EventStream:
+        """Iterate events from bitbake server
+
+        Args:
+            self (BBClient): none
+            event_types (Type[BBEventBase]): event types to receive
+            predicate (Optional[Callable[[BBEventBase], bool]]): filter for events. It runs in the event monitor thread, so it should be fast.
+            timeout (Optional[float]): max time to wait for the next event. Iteration stops if no event arrives in time. None means no limit. (seconds)
+            include_subclasses (bool): if True, subclasses of event_types are also received. Defaults to False.
+            maxsize (int): max number of events kept in the ring buffer. Defaults to 1000.
+            overflow (str): what to do when maxsize events are not read yet. "drop_oldest", "drop_newest" or "block". see EventStream. Defaults to "drop_oldest".
+
+        Returns:
+            EventStream: iterator of events. It is also a context manager which closes the stream.
+
+        Note:
+            | Use like `with client.events(TaskBase, include_subclasses=True) as stream: for event in stream:`.
+            | Events are received from when this command is called until the stream is closed, timeout occurs or the server is stopped.
+            | Each event has a sequence number in the stream. Use stream.sequence to record the last handled event and stream.seek to resume from it.
+            | stream.dropped shows how many events were dropped by overflow policy.
+        """
+        unique_ids: List[uuid.UUID] = []
+        stream: EventStream = EventStream(predicate, timeout, maxsize, overflow, lambda: self.__close_event_stream(stream, unique_ids))
+        with self.__callbacks_lock:
+            self.__event_streams.add(stream)
+        unique_ids.extend(self.register_callback(event_type, stream.notify, include_subclasses) for event_type in event_types)
+        return stream
+
+    @logger_decorator
+    def wait_event(
+        self: "BBClient",
+        event_types: List[Type[BBEventBase]],
+        timeout: Optional[float] = None,
+        include_subclasses: bool = False,
+    ) -> Optional[BBEventBase]:
+        """Wait for the next event of the event types
+
+        Args:
+            self (BBClient): none
+            event_types (List[Type[BBEventBase]]): event types you wait for
+            timeout (Optional[float], optional): timeout. (seconds)
+            include_subclasses (bool): if True, subclasses of event_types are also waited for. Defaults to False.
+
+        Returns:
+            Optional[BBEventBase]: the event you wait for or None if timeout
+
+        Note:
+            | Only events which arrive after this command is called are returned. Registered callbacks also receive them.
+            | This command doesn't poll the server. The event monitor thread wakes it up when the event arrives.
+        """
+        waiter: EventWaiter = EventWaiter()
+        unique_ids: List[uuid.UUID] = [self.register_callback(event_type, waiter.notify, include_subclasses) for event_type in event_types]
+        try:
+            ret: Optional[BBEventBase] = waiter.wait(timeout)
+        finally:
+            for unique_id in unique_ids:
+                self.__unregister_callback(unique_id, narrow_event_mask=False)
+        if not ret:
+            self.__logger.warning(f"Timeout occurred because {timeout} second has elapsed")
+        return ret
+
+    def get_running_command(self: "BBClient") -> Optional[CommandFuture]:
+        """Get the future of the async command running on bitbake server
+
+        Args:
+            self (BBClient): none
+
+        Returns:
+            Optional[CommandFuture]: future of the running command or None if no async command is running
+
+        Note:
+            | Async commands run one by one, so events from callbacks belong to this command. Use command_id of the future to correlate them.
+        """
+        with self.__command_futures_lock:
+            return self.__running_command
 
     @logger_decorator
     def wait_done_async(self: "BBClient", timeout: Optional[float] = None) -> Optional[BBEventBase]:
-        """Wait CommandCompletedEvent, CommandExitEvent, CommandFailedEvent event
+        """Wait for the last async command
 
         Args:
             self (BBClient): none
             timeout (Optional[float], optional): timeout. (seconds)
 
         Returns:
-            Optional[BBEventBase]: target event or None
+            Optional[BBEventBase]: CommandCompletedEvent, CommandExitEvent or CommandFailedEvent of the last async command. None if timeout, cancelled or no async command has been sent.
+
+        Note:
+            | This waits for the CommandFuture the last *_async command returned. Please use the future directly for new code.
         """
-        return self.__wait_event([CommandCompletedEvent, CommandExitEvent, CommandFailedEvent], timeout) # type: ignore
+        future: Optional[CommandFuture] = self.__last_command_future
+        if not future:
+            return None
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            self.__logger.warning(f"Timeout occurred because {timeout} second has elapsed")
+        except CancelledError:
+            pass
+        return None
 
 
     # --- bitbake server sync functions  ---
@@ -392,6 +968,7 @@ class BBClient:
         )
 
     @logger_decorator
+    @recipe_cache_decorator
     def match_file(
         self: "BBClient", file_path_regex: str, mutli_conf_name: str = ""
     ) -> str:
@@ -538,74 +1115,91 @@ class BBClient:
         return [GetLayerPrioritiesResult(layer) for layer in ret]
 
     @logger_decorator
-    def get_recipes(self: "BBClient", multi_config: str = "") -> List[GetRecipesResult]:
+    @recipe_cache_decorator
+    def get_recipes(self: "BBClient", multi_config: str = "", columnar: bool = False) -> Union[List[GetRecipesResult], ColumnarTable]:
         """Get all package name from cache
 
         Args:
             self (BBClient): none
             multi_config (str, optional): Defaults to "". See `here <https://docs.yoctoproject.org/dev-manual/common-tasks.html?highlight=multiconfigs#building-images-for-multiple-targets-using-multiple-configurations>`_
+            columnar (bool, optional): return ColumnarTable instead of the list of results. Defaults to False.
 
         Returns:
-            List[GetRecipesResult]: See GetRecipesResult.
+            Union[List[GetRecipesResult], ColumnarTable]: See GetRecipesResult. ColumnarTable of GetRecipesResult if columnar is True.
         """
         ret: List[List[Any]] = self.__run_command(self.__server_connection, "getRecipes", multi_config, logger=self.__logger)  # type: ignore
-        return [GetRecipesResult(recipe) for recipe in ret]
+        if columnar:
+            return ColumnarTable.from_lists(GetRecipesResult, ret, self.symbols)
+        return GetRecipesResult._make_all(ret)
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_recipe_depends(
-        self: "BBClient", multi_config: str = ""
-    ) -> List[GetRecipeDependsResult]:
+        self: "BBClient", multi_config: str = "", columnar: bool = False
+    ) -> Union[List[GetRecipeDependsResult], ColumnarTable]:
         """Get recipe depends
 
         Args:
             self (BBClient): none
             multi_config (str, optional): Defaults to "". See `here <https://docs.yoctoproject.org/dev-manual/common-tasks.html?highlight=multiconfigs#building-images-for-multiple-targets-using-multiple-configurations>`_
+            columnar (bool, optional): return ColumnarTable instead of the list of results. Defaults to False.
 
         Returns:
-            List[GetRecipeDependsResult]: See GetRecipeDependsResult.
+            Union[List[GetRecipeDependsResult], ColumnarTable]: See GetRecipeDependsResult. ColumnarTable of GetRecipeDependsResult if columnar is True.
         """
         ret: List[List[Any]] = self.__run_command(  # type: ignore
             self.__server_connection, "getRecipeDepends", multi_config, logger=self.__logger
         )
-        return [GetRecipeDependsResult(recipe_file) for recipe_file in ret]
+        if columnar:
+            return ColumnarTable.from_lists(GetRecipeDependsResult, ret, self.symbols)
+        return GetRecipeDependsResult._make_all(ret)
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_recipe_versions(
-        self: "BBClient", multi_config: str = ""
-    ) -> List[GetRecipeVersionsResult]:
+        self: "BBClient", multi_config: str = "", columnar: bool = False
+    ) -> Union[List[GetRecipeVersionsResult], ColumnarTable]:
         """Get all recipe versions
 
         Args:
             self (BBClient): none
             multi_config (str, optional): Defaults to "". See `here <https://docs.yoctoproject.org/dev-manual/common-tasks.html?highlight=multiconfigs#building-images-for-multiple-targets-using-multiple-configurations>`_
+            columnar (bool, optional): return ColumnarTable instead of the list of results. Defaults to False.
 
         Returns:
-            List[GetRecipeVersions]: See GetRecipeVersions.
+            Union[List[GetRecipeVersions], ColumnarTable]: See GetRecipeVersions. ColumnarTable of GetRecipeVersionsResult if columnar is True.
         """
         ret: Mapping[str, List[str]] = self.__run_command(  # type: ignore
             self.__server_connection, "getRecipeVersions", multi_config, logger=self.__logger
         )
-        return [GetRecipeVersionsResult(value, key) for key, value in ret.items()]
+        if columnar:
+            return ColumnarTable.from_recipe_versions(ret, self.symbols)
+        return GetRecipeVersionsResult._make_all((key, *value) for key, value in ret.items())
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_recipe_provides(
-        self: "BBClient", multi_config: str = ""
-    ) -> List[GetRecipeProvidesResult]:
+        self: "BBClient", multi_config: str = "", columnar: bool = False
+    ) -> Union[List[GetRecipeProvidesResult], ColumnarTable]:
         """Get all recipe files and its packages
 
         Args:
             self (BBClient): none
             multi_config (str, optional): Defaults to "". See `here <https://docs.yoctoproject.org/dev-manual/common-tasks.html?highlight=multiconfigs#building-images-for-multiple-targets-using-multiple-configurations>`_
+            columnar (bool, optional): return ColumnarTable instead of the list of results. Defaults to False.
 
         Returns:
-            List[GetRecipeProvidesResult]: See GetRecipeProvidesResult
+            Union[List[GetRecipeProvidesResult], ColumnarTable]: See GetRecipeProvidesResult. ColumnarTable of GetRecipeProvidesResult if columnar is True.
         """
         ret: Mapping[str, List[str]] = self.__run_command(  # type: ignore
             self.__server_connection, "getRecipeProvides", multi_config, logger=self.__logger
         )
-        return [GetRecipeProvidesResult(key, value) for key, value in ret.items()]
+        if columnar:
+            return ColumnarTable.from_lists(GetRecipeProvidesResult, ret.items(), self.symbols)
+        return GetRecipeProvidesResult._make_all(ret.items())
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_recipe_packages(
         self: "BBClient", multi_config: str = ""
     ) -> List[GetRecipePackagesResult]:
@@ -621,9 +1215,10 @@ class BBClient:
         ret: Mapping[str, List[str]] = self.__run_command(  # type: ignore
             self.__server_connection, "getRecipePackages", multi_config, logger=self.__logger
         )
-        return [GetRecipePackagesResult(key, value) for key, value in ret.items()]
+        return GetRecipePackagesResult._make_all(ret.items())
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_recipe_packages_dynamic(
         self: "BBClient", multi_config: str = ""
     ) -> List[GetRecipePackagesDynamicResult]:
@@ -639,11 +1234,10 @@ class BBClient:
         ret: Mapping[str, List[str]] = self.__run_command(  # type: ignore
             self.__server_connection, "getRecipePackagesDynamic", multi_config, logger=self.__logger
         )
-        return [
-            GetRecipePackagesDynamicResult(key, value) for key, value in ret.items()
-        ]
+        return GetRecipePackagesDynamicResult._make_all(ret.items())
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_r_providers(
         self: "BBClient", multi_config: str = ""
     ) -> List[GetRProvidersResult]:
@@ -662,9 +1256,10 @@ class BBClient:
         ret: Mapping[str, List[str]] = self.__run_command(  # type: ignore
             self.__server_connection, "getRProviders", multi_config, logger=self.__logger
         )
-        return [GetRProvidersResult(key, value) for key, value in ret.items()]
+        return GetRProvidersResult._make_all(ret.items())
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_runtime_depends(
         self: "BBClient", multi_config: str = ""
     ) -> List[GetRuntimeDependsResult]:
@@ -680,9 +1275,10 @@ class BBClient:
         ret: List[str, Mapping[str, List[str]]] = self.__run_command(  # type: ignore
             self.__server_connection, "getRuntimeDepends", multi_config, logger=self.__logger
         )
-        return [GetRuntimeDependsResult(*data) for data in ret]
+        return GetRuntimeDependsResult._make_all(ret)
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_runtime_recommends(
         self: "BBClient", multi_config: str = ""
     ) -> List[GetRuntimeRecommendsResult]:
@@ -698,63 +1294,76 @@ class BBClient:
         ret: List[str, Mapping[str, List[str]]] = self.__run_command(  # type: ignore
             self.__server_connection, "getRuntimeRecommends", multi_config, logger=self.__logger
         )
-        return [GetRuntimeRecommendsResult(*data) for data in ret]
+        return GetRuntimeRecommendsResult._make_all(ret)
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_recipe_inherits(
-        self: "BBClient", multi_config: str = ""
-    ) -> List[GetRecipeInheritsResult]:
+        self: "BBClient", multi_config: str = "", columnar: bool = False
+    ) -> Union[List[GetRecipeInheritsResult], ColumnarTable]:
         """Get recipes and its inherit recipes
 
         Args:
             self (BBClient): none
             multi_config (str, optional): Defaults to "". See `here <https://docs.yoctoproject.org/dev-manual/common-tasks.html?highlight=multiconfigs#building-images-for-multiple-targets-using-multiple-configurations>`_
+            columnar (bool, optional): return ColumnarTable instead of the list of results. Defaults to False.
 
         Returns:
-            List[GetRecipeInheritsResult]: See GetRecipeInheritsResult
+            Union[List[GetRecipeInheritsResult], ColumnarTable]: See GetRecipeInheritsResult. ColumnarTable of GetRecipeInheritsResult if columnar is True.
         """
         ret: Mapping[str, List[str]] = self.__run_command(  # type: ignore
             self.__server_connection, "getRecipeInherits", multi_config, logger=self.__logger
         )
-        return [GetRecipeInheritsResult(key, value) for key, value in ret.items()]
+        if columnar:
+            return ColumnarTable.from_lists(GetRecipeInheritsResult, ret.items(), self.symbols)
+        return GetRecipeInheritsResult._make_all(ret.items())
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_bb_file_priority(
-        self: "BBClient", multi_config: str = ""
-    ) -> List[GetBbFilePriorityResult]:
+        self: "BBClient", multi_config: str = "", columnar: bool = False
+    ) -> Union[List[GetBbFilePriorityResult], ColumnarTable]:
         """Get recipe files and its priority.
 
         Args:
             self (BBClient): none
             multi_config (str, optional): Defaults to "". See `here <https://docs.yoctoproject.org/dev-manual/common-tasks.html?highlight=multiconfigs#building-images-for-multiple-targets-using-multiple-configurations>`_
+            columnar (bool, optional): return ColumnarTable instead of the list of results. Defaults to False.
 
         Returns:
-            List[GetBbFilePriorityResult]: See GetBbFilePriorityResult
+            Union[List[GetBbFilePriorityResult], ColumnarTable]: See GetBbFilePriorityResult. ColumnarTable of GetBbFilePriorityResult if columnar is True.
         """
         ret: Mapping[str, int] = self.__run_command(  # type: ignore
             self.__server_connection, "getBbFilePriority", multi_config, logger=self.__logger
         )
-        return [GetBbFilePriorityResult(key, value) for key, value in ret.items()]
+        if columnar:
+            return ColumnarTable.from_mapping(GetBbFilePriorityResult, ret, self.symbols)
+        return GetBbFilePriorityResult._make_all(ret.items())
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_default_preference(
-        self: "BBClient", multi_config: str = ""
-    ) -> List[GetDefaultPreferenceResult]:
+        self: "BBClient", multi_config: str = "", columnar: bool = False
+    ) -> Union[List[GetDefaultPreferenceResult], ColumnarTable]:
         """Get recipes and default preference.
 
         Args:
             self (BBClient): none
             multi_config (str, optional): Defaults to "". See `here <https://docs.yoctoproject.org/dev-manual/common-tasks.html?highlight=multiconfigs#building-images-for-multiple-targets-using-multiple-configurations>`_
+            columnar (bool, optional): return ColumnarTable instead of the list of results. Defaults to False.
 
         Returns:
-            List[GetDefaultPreference]: See GetDefaultPreference
+            Union[List[GetDefaultPreference], ColumnarTable]: See GetDefaultPreference. ColumnarTable of GetDefaultPreferenceResult if columnar is True.
         """
         ret: Mapping[str, int] = self.__run_command(  # type: ignore
             self.__server_connection, "getDefaultPreference", multi_config, logger=self.__logger
         )
-        return [GetDefaultPreferenceResult(key, value) for key, value in ret.items()]
+        if columnar:
+            return ColumnarTable.from_mapping(GetDefaultPreferenceResult, ret, self.symbols)
+        return GetDefaultPreferenceResult._make_all(ret.items())
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_skipped_recipes(self: "BBClient") -> List[GetSkippedRecipesResult]:
         """Get skipped recipes and its reasons, provides, alias
 
@@ -768,12 +1377,14 @@ class BBClient:
         return [GetSkippedRecipesResult(*i) for i in ret]
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_overlayed_recipes(self: "BBClient", multi_config: str = ""):
         return self.__run_command(
             self.__server_connection, "getOverlayedRecipes", multi_config, logger=self.__logger
         )
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_file_appends(
         self: "BBClient", file_path: str, multi_config: str = ""
     ) -> List[str]:
@@ -792,24 +1403,29 @@ class BBClient:
         )
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_all_appends(
-        self: "BBClient", multi_config: str = ""
-    ) -> List[GetAllAppendsResult]:
+        self: "BBClient", multi_config: str = "", columnar: bool = False
+    ) -> Union[List[GetAllAppendsResult], ColumnarTable]:
         """Get all append recipes
 
         Args:
             self (BBClient): none
             multi_config (str, optional): Defaults to "". See `here <https://docs.yoctoproject.org/dev-manual/common-tasks.html?highlight=multiconfigs#building-images-for-multiple-targets-using-multiple-configurations>`_
+            columnar (bool, optional): return ColumnarTable instead of the list of results. Defaults to False.
 
         Returns:
-            List[GetAllAppendsResult]: See GetAllAppendsResult
+            Union[List[GetAllAppendsResult], ColumnarTable]: See GetAllAppendsResult. ColumnarTable of GetAllAppendsResult if columnar is True.
         """
         ret: List[List[str]] = self.__run_command(  # type: ignore
             self.__server_connection, "getAllAppends", multi_config, logger=self.__logger
         )
-        return [GetAllAppendsResult(*i) for i in ret]
+        if columnar:
+            return ColumnarTable.from_rows(GetAllAppendsResult, ret, self.symbols)
+        return GetAllAppendsResult._make_all(ret)
 
     @logger_decorator
+    @recipe_cache_decorator
     def find_providers(
         self: "BBClient", multi_config: str = ""
     ) -> List[FindProvidersResult]:
@@ -836,6 +1452,7 @@ class BBClient:
         return ret
 
     @logger_decorator
+    @recipe_cache_decorator
     def find_best_provider(
         self: "BBClient", package_name: str, multi_config: str = ""
     ) -> List[str]:
@@ -861,6 +1478,7 @@ class BBClient:
         )
 
     @logger_decorator
+    @recipe_cache_decorator
     def all_providers(
         self: "BBClient", multi_config: str = ""
     ) -> List[AllProvidersResult]:
@@ -886,6 +1504,7 @@ class BBClient:
         return [AllProvidersResult(*i) for i in ret]
 
     @logger_decorator
+    @recipe_cache_decorator
     def get_runtime_providers(
         self: "BBClient", runtime_providers: List[str], multi_config: str = ""
     ):
@@ -1083,6 +1702,7 @@ class BBClient:
         )
 
     @logger_decorator
+    @recipe_cache_decorator
     def parse_recipe_file(
         self: "BBClient",
         file_path: str,
@@ -1140,7 +1760,7 @@ class BBClient:
             This function will block until complete to build_file_async is complete. 
             For more details, see build_file_async.
         """
-        self.build_file_async(file_path, task_name, internal)
+        return self.build_file_async(file_path, task_name, internal)
 
     @logger_decorator
     @syncronize_decorator
@@ -1155,7 +1775,7 @@ class BBClient:
             This function will block until complete to build_targets_async is complete. 
             For more details, see build_targets_async.
         """
-        self.build_targets_async(targets, task_name)
+        return self.build_targets_async(targets, task_name)
         
     @logger_decorator
     @syncronize_decorator
@@ -1168,7 +1788,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.generate_dep_tree_event_async(targets, task_name)
+        return self.generate_dep_tree_event_async(targets, task_name)
 
     @logger_decorator
     @syncronize_decorator
@@ -1181,7 +1801,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.generate_dot_graph_async(targets, task_name)
+        return self.generate_dot_graph_async(targets, task_name)
 
     @logger_decorator
     @syncronize_decorator
@@ -1194,7 +1814,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.generate_targets_tree_async(bb_klass_file_path, package_names)
+        return self.generate_targets_tree_async(bb_klass_file_path, package_names)
 
     @logger_decorator
     @syncronize_decorator
@@ -1205,7 +1825,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.find_config_files_async(variable_name)
+        return self.find_config_files_async(variable_name)
 
     @logger_decorator
     @syncronize_decorator
@@ -1218,7 +1838,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.find_files_matching_in_dir_async(target_file_name_substring, directory)
+        return self.find_files_matching_in_dir_async(target_file_name_substring, directory)
 
     @logger_decorator
     @syncronize_decorator
@@ -1229,7 +1849,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.test_cooker_command_event_async(pattern)
+        return self.test_cooker_command_event_async(pattern)
 
     @logger_decorator
     @syncronize_decorator
@@ -1240,7 +1860,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.find_config_file_path_async(config_file_name)
+        return self.find_config_file_path_async(config_file_name)
 
     @logger_decorator
     @syncronize_decorator
@@ -1251,7 +1871,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.show_versions_async()
+        return self.show_versions_async()
 
     @logger_decorator
     @syncronize_decorator
@@ -1262,7 +1882,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.show_environment_target_async(package_name)
+        return self.show_environment_target_async(package_name)
 
     @logger_decorator
     @syncronize_decorator
@@ -1273,7 +1893,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.show_environment_async(bb_file_path)
+        return self.show_environment_async(bb_file_path)
 
     @logger_decorator
     @syncronize_decorator
@@ -1284,7 +1904,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.parse_files_async()
+        return self.parse_files_async()
 
     @logger_decorator
     @syncronize_decorator
@@ -1295,7 +1915,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.compare_revisions_async()
+        return self.compare_revisions_async()
 
     @logger_decorator
     @syncronize_decorator
@@ -1306,7 +1926,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.trigger_event_async(evene_name)
+        return self.trigger_event_async(evene_name)
 
     @logger_decorator
     @syncronize_decorator
@@ -1317,7 +1937,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.reset_cooker_async()
+        return self.reset_cooker_async()
 
     @logger_decorator
     @syncronize_decorator
@@ -1328,7 +1948,7 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.client_complete_async()
+        return self.client_complete_async()
 
     @logger_decorator
     @syncronize_decorator
@@ -1344,17 +1964,18 @@ class BBClient:
             This function will block until complete to xxxxx is complete. 
             For more details, see xxxxx.
         """
-        self.find_sigInfo_async(package_name_with_multi_config, task_name, sigs)
+        return self.find_sigInfo_async(package_name_with_multi_config, task_name, sigs)
 
     # --- bitbake server async functions  ---
     @logger_decorator
+    @async_command_decorator
     def build_file_async(
         self: "BBClient", file_path: str, task_name: str, internal: bool = False
-    ) -> None:
+    ) -> CommandFuture:
         """Build recipe file
 
         This command doen't resolve any dependencies. If you also want to buid dependencies, please use build_targets command.
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.BuildInit
         * bb.event.RecipePreFinalise
@@ -1378,22 +1999,26 @@ class BBClient:
             task_name (str): task name which will run
             internal (bool, optional): If True, bitbake will fire events that notify BuildStarted and BuildCompleted. Defaults to False.
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | If you want to monitor BuildStarted and BuildCompleted event, use register_callback.
         """
-        self.__run_command(
+        return self.__run_command(
             self.__server_connection, "buildFile", file_path, task_name, internal, logger=self.__logger
         )
 
     @logger_decorator
+    @async_command_decorator
     def build_targets_async(
         self: "BBClient",
         targets: List[str],
         task_name: str,
-    ) -> None:
+    ) -> CommandFuture:
         """Build package
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.runqueue.runQueueTaskStarted
         * bb.build.TaskStarted
@@ -1411,6 +2036,9 @@ class BBClient:
             targets (List[str]): see Note section
             task_name (str): task name which will run
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | User can input targets as follows. Please note that if you want to specify task by targets, you have to write do_xxx, not only xxx.
             | [
@@ -1422,15 +2050,16 @@ class BBClient:
             | ]
         """
 
-        self.__run_command(self.__server_connection, "buildTargets", targets, task_name, logger=self.__logger)
+        return self.__run_command(self.__server_connection, "buildTargets", targets, task_name, logger=self.__logger)
 
     @logger_decorator
+    @async_command_decorator
     def generate_dep_tree_event_async(
         self: "BBClient", targets: List[str], task_name: str
-    ) -> None:
+    ) -> CommandFuture:
         """Request dependency tree information
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.TreeDataPreparationStarted
         * bb.event.TreeDataPreparationProgress
@@ -1445,6 +2074,9 @@ class BBClient:
             targets(List[str]): targets info. see Note section.
             task_name (str): task name. e.g.) do_build, do_fetch, etc...
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | User can input targets as follows.
             | [
@@ -1455,7 +2087,7 @@ class BBClient:
             |   "mc:yyy_config:python:do_patch",    # multiconfig, package name and task name
             | ]
         """
-        self.__run_command(
+        return self.__run_command(
             self.__server_connection,
             "generateDepTreeEvent",
             targets,
@@ -1464,12 +2096,13 @@ class BBClient:
         )
 
     @logger_decorator
+    @async_command_decorator
     def generate_dot_graph_async(
         self: "BBClient", targets: List[str], task_name: str
-    ) -> None:
+    ) -> CommandFuture:
         """Generate task dependency graph(task-depends.dot)
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.TreeDataPreparationStarted
         * bb.event.TreeDataPreparationProgress
@@ -1483,6 +2116,9 @@ class BBClient:
             targets (List[str]): targets info. see Note section.
             task_name (str): task name. e.g.) do_build, do_fetch, etc...
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | User can input targets as follows.
             | [
@@ -1493,7 +2129,7 @@ class BBClient:
             |   "mc:yyy_config:python:do_patch",    # multiconfig, package name and task name
             | ]
         """
-        self.__run_command(
+        return self.__run_command(
             self.__server_connection,
             "generateDotGraph",
             targets,
@@ -1502,12 +2138,13 @@ class BBClient:
         )
 
     @logger_decorator
+    @async_command_decorator
     def generate_targets_tree_async(
         self: "BBClient", bb_klass_file_path: str, package_names: List[str]
-    ) -> None:
+    ) -> CommandFuture:
         """Generate target tree
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.TreeDataPreparationStarted
         * bb.event.TreeDataPreparationProgress
@@ -1522,11 +2159,14 @@ class BBClient:
             bb_klass_file_path (str): bbclass file path
             package_names (List[str]): target package names
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | Use can receive result by bb.event.TargetsTreeGenerated event.
             | If you specify bb_klass_file_path, bitbake will add the packages that inherits bb_klass_file_path to package_names. If you don't want to do it, please input None to bb_klass_file_path.
         """
-        self.__run_command(
+        return self.__run_command(
             self.__server_connection,
             "generateTargetsTree",
             bb_klass_file_path,
@@ -1535,10 +2175,11 @@ class BBClient:
         )
 
     @logger_decorator
-    def find_config_files_async(self: "BBClient", variable_name: str) -> None:
+    @async_command_decorator
+    def find_config_files_async(self: "BBClient", variable_name: str) -> CommandFuture:
         """Find Config files that define specified variable.
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.ConfigFilesFound
         * bb.command.CommandCompleted
@@ -1549,18 +2190,22 @@ class BBClient:
             self (BBClient): none
             variable_name (str): _description_
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | User can receive result by bb.event.ConfigFilesFound event.
         """
-        self.__run_command(self.__server_connection, "findConfigFiles", variable_name, logger=self.__logger)
+        return self.__run_command(self.__server_connection, "findConfigFiles", variable_name, logger=self.__logger)
 
     @logger_decorator
+    @async_command_decorator
     def find_files_matching_in_dir_async(
         self: "BBClient", target_file_name_substring: str, directory: str
-    ) -> None:
+    ) -> CommandFuture:
         """Find files that matches the regex_pattern from the directory.
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.FilesMatchingFound
         * bb.command.CommandCompleted
@@ -1572,10 +2217,13 @@ class BBClient:
             target_file_name_substring (str): Substrings of target file name. e.g.) ".conf", "xxx.bbappe", etc...
             directory (str): Target directory. Base directory is ${BBPATH}.
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | Use can receive result by bb.event.FilesMatchingFound event.
         """
-        self.__run_command(
+        return self.__run_command(
             self.__server_connection,
             "findFilesMatchingInDir",
             target_file_name_substring,
@@ -1584,10 +2232,11 @@ class BBClient:
         )
 
     @logger_decorator
-    def test_cooker_command_event_async(self: "BBClient", pattern: str) -> None:
+    @async_command_decorator
+    def test_cooker_command_event_async(self: "BBClient", pattern: str) -> CommandFuture:
         """Dummy command
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.FilesMatchingFound
         * bb.command.CommandCompleted
@@ -1597,14 +2246,18 @@ class BBClient:
         Args:
             self (BBClient): none
             pattern (str): dummy param
+
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
         """
-        self.__run_command(self.__server_connection, "testCookerCommandEvent", pattern, logger=self.__logger)
+        return self.__run_command(self.__server_connection, "testCookerCommandEvent", pattern, logger=self.__logger)
 
     @logger_decorator
-    def find_config_file_path_async(self: "BBClient", config_file_name: str) -> None:
+    @async_command_decorator
+    def find_config_file_path_async(self: "BBClient", config_file_name: str) -> CommandFuture:
         """Find config file path
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.ConfigFilePathFound
         * bb.command.CommandCompleted
@@ -1615,18 +2268,22 @@ class BBClient:
             self (BBClient): none
             config_file_name (str): target config file name
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | Use can receive result by bb.event.ConfigFilePathFound event.
         """
-        self.__run_command(
+        return self.__run_command(
             self.__server_connection, "findConfigFilePath", config_file_name, logger=self.__logger
         )
 
     @logger_decorator
-    def show_versions_async(self: "BBClient") -> None:
+    @async_command_decorator
+    def show_versions_async(self: "BBClient") -> CommandFuture:
         """Show all packages versions
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.command.CommandCompleted
         * bb.command.CommandFailed
@@ -1635,16 +2292,20 @@ class BBClient:
         Args:
             self (BBClient): none
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | bbclient doesn't display any information. If you want to use this feature, please use bitbake-layers.
         """
-        self.__run_command(self.__server_connection, "showVersions", logger=self.__logger)
+        return self.__run_command(self.__server_connection, "showVersions", logger=self.__logger)
 
     @logger_decorator
-    def show_environment_target_async(self: "BBClient", package_name: str = "") -> None:
+    @async_command_decorator
+    def show_environment_target_async(self: "BBClient", package_name: str = "") -> CommandFuture:
         """Show variables for specified package
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.ConfigParsed
         * bb.command.CommandCompleted
@@ -1655,18 +2316,22 @@ class BBClient:
             self (BBClient): none
             package_name (str): target package name
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | bbclient doesn't display any information. If you want to use this feature, please use bitbake-gervar or bitbake -e.
         """
-        self.__run_command(
+        return self.__run_command(
             self.__server_connection, "showEnvironmentTarget", package_name, logger=self.__logger
         )
 
     @logger_decorator
-    def show_environment_async(self: "BBClient", bb_file_path: str) -> None:
+    @async_command_decorator
+    def show_environment_async(self: "BBClient", bb_file_path: str) -> CommandFuture:
         """Show variables for specified recipe
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.ConfigParsed
         * bb.event.CacheLoadStarted
@@ -1685,16 +2350,20 @@ class BBClient:
             self (BBClient): none
             bb_file_path (str): target recipe path
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | bbclient doesn't display any information. If you want to use this feature, please use bitbake-gervar or bitbake -e.
         """
-        self.__run_command(self.__server_connection, "showEnvironment", bb_file_path, logger=self.__logger)
+        return self.__run_command(self.__server_connection, "showEnvironment", bb_file_path, logger=self.__logger)
 
     @logger_decorator
-    def parse_files_async(self: "BBClient") -> None:
+    @async_command_decorator
+    def parse_files_async(self: "BBClient") -> CommandFuture:
         """Parse all bb files.
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.ReachableStamps
         * bb.command.CommandCompleted
@@ -1703,14 +2372,18 @@ class BBClient:
 
         Args:
             self (BBClient): none
+
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
         """
-        self.__run_command(self.__server_connection, "parseFiles", logger=self.__logger)
+        return self.__run_command(self.__server_connection, "parseFiles", logger=self.__logger)
 
     @logger_decorator
-    def compare_revisions_async(self: "BBClient") -> None:
+    @async_command_decorator
+    def compare_revisions_async(self: "BBClient") -> CommandFuture:
         """Exit async command
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.command.CommandCompleted
         * bb.command.CommandFailed
@@ -1719,30 +2392,38 @@ class BBClient:
         Args:
             self (BBClient): none
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | TODO: investigate the detail.
             | This determines if the cache is out of date, and if so, this terminates asynchronous processing.
         """
-        self.__run_command(self.__server_connection, "compareRevisions", logger=self.__logger)
+        return self.__run_command(self.__server_connection, "compareRevisions", logger=self.__logger)
 
     @logger_decorator
-    def trigger_event_async(self: "BBClient", evene_name: str) -> None:
+    @async_command_decorator
+    def trigger_event_async(self: "BBClient", evene_name: str) -> CommandFuture:
         """Send event
 
         Args:
             self (BBClient): none
             evene_name (str): event class name.
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | Send evene_name event. User can receive this event by register_callback.
         """
-        self.__run_command(self.__server_connection, "triggerEvent", evene_name, logger=self.__logger)
+        return self.__run_command(self.__server_connection, "triggerEvent", evene_name, logger=self.__logger)
 
     @logger_decorator
-    def reset_cooker_async(self: "BBClient") -> None:
+    @async_command_decorator
+    def reset_cooker_async(self: "BBClient") -> CommandFuture:
         """Reset cooker state and caches.
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.event.ConfigParsed
         * bb.command.CommandCompleted
@@ -1752,16 +2433,20 @@ class BBClient:
         Args:
             self (BBClient): none
 
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
+
         Note:
             | TODO: investigate the detail.
         """
-        self.__run_command(self.__server_connection, "resetCooker", logger=self.__logger)
+        return self.__run_command(self.__server_connection, "resetCooker", logger=self.__logger)
 
     @logger_decorator
-    def client_complete_async(self: "BBClient") -> None:
+    @async_command_decorator
+    def client_complete_async(self: "BBClient") -> CommandFuture:
         """Notify client will be close
 
-        This command will send following events. If you want to wait done, please use wait_done_async.
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
 
         * bb.command.CommandCompleted
         * bb.command.CommandFailed
@@ -1769,28 +2454,41 @@ class BBClient:
 
         Args:
             self (BBClient): none
+
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
         """
-        self.__run_command(self.__server_connection, "clientComplete", logger=self.__logger)
+        return self.__run_command(self.__server_connection, "clientComplete", logger=self.__logger)
 
     @logger_decorator
+    @async_command_decorator
     def find_sigInfo_async(
         self: "BBClient",
         package_name_with_multi_config: str,
         task_name: str,
         sigs: List[str],
-    ) -> None:
-        """Find signature info files via the signature generator(?)
+    ) -> CommandFuture:
+        """Find signature info files via the signature generator
+
+        This command will send following events. If you want to wait done, please use the returned CommandFuture.
+
+        * bb.event.FindSigInfoResult
+        * bb.command.CommandCompleted
+        * bb.command.CommandFailed
 
         Args:
             self (BBClient): none
-            package_name_with_multi_config (str): TODO
-            task_name (str): TODO
-            sigs (List[str]): TODO
+            package_name_with_multi_config (str): recipe name like "busybox". Use "mc:<multiconfig>:<recipe name>" for multiconfig.
+            task_name (str): task name like "do_compile"
+            sigs (List[str]): task hashes to find siginfo files for
+
+        Returns:
+            CommandFuture: resolved with CommandCompletedEvent, CommandExitEvent or CommandFailedEvent when the command is done
 
         Note:
-            | Use can receive result by bb.event.FindSigInfoResult event.
+            | Use can receive result by FindSigInfoResultEvent. Its result maps each hash found to the siginfo file.
         """
-        self.__run_command(
+        return self.__run_command(
             self.__server_connection,
             "findSigInfo",
             package_name_with_multi_config,
@@ -1800,58 +2498,112 @@ class BBClient:
         )
 
     # --- private functions ---
-    def __get_event(self: "BBClient", timeout: Optional[float] = None) -> Optional[BBEventBase]:
-        """Get oldest event
+    def __get_events(self: "BBClient", timeout: Optional[float] = None) -> List[BBEventBase]:
+        """Get oldest events
 
         Args:
             self (BBClient): none
-            timeout (Optional[float]): timeout. if timeout, return None
+            timeout (Optional[float]): timeout. if timeout, return progress events whose window ended or empty list
 
         Returns:
-            Optional[BBEventBase]: event notification objects. See bbcommon.py
+            List[BBEventBase]: event notification objects. See bbcommon.py. Events nobody subscribes to are not included.
+
+        Note:
+            | If nobody subscribes to the event, it is not decoded at all.
+            | If progress events are coalesced, they are kept until the window ends or another event from the same process arrives, and only the latest one for each key is decoded.
         """
+        coalescer: Optional[ProgressCoalescer] = self.__progress_coalescer
+        if coalescer:
+            timeout = coalescer.get_timeout(timeout)
         cur_event: Any = self.__server_connection.events.waitEvent(timeout)
-        if not cur_event:
-            return None
-        # f"<class '{event_name}'>" -> event_name
-        cur_event_name: str = str(type(cur_event))[8:-2]
-        itr: Iterable = filter(lambda x: x.is_target(cur_event_name), ALL_BB_EVENTS)
-        event_class: Optional[Type[BBEventBase]] = next(itr, None) # type: ignore
-        ret: BBEventBase = event_class(cur_event.__dict__) if event_class else UnknownEvent(cur_event_name, cur_event.__dict__)
-        if isinstance(ret, UnknownEvent):
-            self.__logger.debug(f"get Unknow event {cur_event_name}: {ret.__dict__}")
-        return ret
-        
+        raw_events: List[Any] = coalescer.pop_expired() if coalescer else []
+        if cur_event:
+            start_time: float = time.perf_counter()
+            cur_event_name, event_class = get_event_class(type(cur_event))
+            callbacks: Tuple[CallBack, ...] = self.__find_callbacks(event_class or UnknownEvent)
+            self.__decode_stats.received += 1
+            self.__decode_stats.lookup_time += time.perf_counter() - start_time
+            if self.__journal:
+                self.__write_journal(cur_event_name, cur_event)
+            is_command: bool = bool(event_class) and issubclass(event_class, (CommandCompletedEvent, CommandExitEvent)) # type: ignore
+            if not callbacks and not is_command:
+                self.__decode_stats.skipped += 1
+            elif coalescer and event_class in self.__progress_event_types:
+                pid: Any = getattr(cur_event, "pid", None)
+                if coalescer.add((event_class, pid, getattr(cur_event, "processname", None)), pid, cur_event):
+                    self.__decode_stats.coalesced += 1
+            else:
+                if coalescer:
+                    # progress must not arrive after the event which finishes it
+                    raw_events.extend(coalescer.pop(None if is_command else getattr(cur_event, "pid", None)))
+                raw_events.append(cur_event)
+        events: List[BBEventBase] = []
+        for raw_event in raw_events:
+            event: Optional[BBEventBase] = self.__decode_event(raw_event)
+            if event:
+                events.append(event)
+        return events
+
+    def __write_journal(self: "BBClient", cur_event_name: str, cur_event: Any) -> None:
+        """Write an event to the journal
+
+        Args:
+            self (BBClient): none
+            cur_event_name (str): event name like "bb.build.TaskStarted"
+            cur_event (Any): event object bitbake server sent
 
-    def __wait_event(self: "BBClient", event_types: List[Type[BBEventBase]], timeout: Optional[float] = None) -> Optional[BBEventBase]:
-        """Wait specific event
+        Note:
+            | If the journal can't be written, for example because the disk is full, it is detached so that events are still dispatched.
+        """
+        journal: Optional["EventJournal"] = self.__journal
+        if not journal:
+            return
+        try:
+            journal.write(cur_event_name, cur_event.__dict__)
+        except OSError as e:
+            self.__logger.error(f"event journal is detached because {e!r}.")
+            self.__journal = None
+
+    def __decode_event(self: "BBClient", cur_event: Any) -> Optional[BBEventBase]:
+        """Decode an event from bitbake server
 
         Args:
             self (BBClient): none
-            event_types (List[Type[BBEventBase]]): event types you wait for. BBEventBase and its inherits types is defined in bbcommon.py.
-            timeout (float): timeout. (seconds)
+            cur_event (Any): event object bitbake server sent
 
         Returns:
-            Optional[BBEventBase]: The event you wait for or None
-        
+            Optional[BBEventBase]: event notification object. None if nobody subscribes to the event anymore.
+
         Note:
-            | This function will pop events from event queue. This event queue is reused between many commands, so this queue may have events from previous commands.
-            | When you wait bb.command.CommandCompleted event, please confirm there is no left bb.command.CommandCompleted event from previous command.
+            | If all the callbacks for the event run in "pool" or "ordered" mode, the event is decoded on first attribute access in their thread.
         """
-        start_time: float = time.perf_counter()
-        ret: Optional[BBEventBase] = None
-        while True:
-            cur_event: Optional[BBEventBase] = self.__get_event(0.01)
-            find_matched_type: Optional[Type[BBEventBase]] = next(filter(lambda x: isinstance(cur_event, x), event_types), None) # type: ignore
-            if find_matched_type:
-                ret = cur_event
-                break
-            execution_time: float = time.perf_counter() - start_time
-            if timeout and timeout < execution_time:
-                self.__logger.warning(f"Timeout occurred because {execution_time} second has elapsed")
-                break
-        return ret
+        cur_event_name, event_class = get_event_class(type(cur_event))
+        callbacks: Tuple[CallBack, ...] = self.__find_callbacks(event_class or UnknownEvent)
+        if not callbacks and not (event_class and issubclass(event_class, (CommandCompletedEvent, CommandExitEvent))):
+            return None
+        # decode in the thread which runs callbacks if all of them run outside of this thread
+        is_lazy: bool = bool(callbacks) and all(cur_callback.dispatcher.mode != "inline" for cur_callback in callbacks)
+        decode: Callable[..., BBEventBase] = (event_class or UnknownEvent).decode_lazily if is_lazy else (event_class or UnknownEvent).decode
+        if event_class:
+            return decode(self.__decode_stats, cur_event.__dict__)
+        self.__logger.debug(f"get Unknow event {cur_event_name}: {cur_event.__dict__}")
+        return decode(self.__decode_stats, cur_event_name, cur_event.__dict__)
 
+    def __ensure_parsed(self: "BBClient") -> None:
+        """Parse all recipes only once
+
+        Args:
+            self (BBClient): none
+
+        Raises:
+            BBCommandError: called in the event monitor thread, like from "inline" callback. Waiting for parse_files there never ends because the thread resolves its future.
+        """
+        if threading.current_thread() is self.__event_thread:
+            raise BBCommandError("parse_files", "recipes are not parsed yet and they can't be parsed in the event monitor thread. Please call parse_files before registering the callback or use dispatch=\"pool\"")
+        with self.__parse_lock:
+            if self.__is_parsed:
+                return
+            self.parse_files()
 
     @staticmethod
     def __get_default_logger(logging_level: int) -> Logger:
@@ -1869,6 +2621,153 @@ class BBClient:
         logger.addHandler(ch)
         return logger
 
+    @staticmethod
+    def __get_parent_environment() -> Mapping[str, str]:
+        """Get environment that init script runs on
+
+        Returns:
+            Mapping[str, str]: environment before bbclient applied the build environment if os.environ is not changed since a client applied it, otherwise current os.environ
+
+        Note:
+            | The environment is kept for each applied environment, not only for the last client, so clients of different projects or init scripts in one process find the same one.
+        """
+        current_env: Dict[str, str] = dict(os.environ)
+        return BBClient.__parent_environs.get(BBClient.__get_environment_digest(current_env), current_env)
+
+    @staticmethod
+    def __get_environment_digest(env: Mapping[str, str]) -> str:
+        """Get digest of environment
+
+        Args:
+            env (Mapping[str, str]): environment
+
+        Returns:
+            str: sha256 of the sorted variables
+        """
+        key = hashlib.sha256()
+        for name, value in sorted(env.items()):
+            key.update(f"\0{name}={value}".encode())
+        return key.hexdigest()
+
+    @staticmethod
+    def __capture_environment(project_path: str, init_script_path: str, parent_env: Mapping[str, str]) -> Mapping[str, str]:
+        """Run init script and capture the environment
+
+        Args:
+            project_path (str): abslute path to bitbake project, basically poky dir.
+            init_script_path (str): initialize bitbake proejct command running at project_path.
+            parent_env (Mapping[str, str]): environment that init script runs on
+
+        Returns:
+            Mapping[str, str]: environment after init script
+        """
+        pipe: subprocess.Popen = subprocess.Popen(
+            f"{init_script_path} > /dev/null; env",
+            stdout=subprocess.PIPE,
+            shell=True,
+            cwd=project_path,
+            executable="/bin/bash",
+            env=dict(parent_env),
+            text=True,
+        )
+        output, _ = pipe.communicate()
+        return dict((line.split("=", 1) for line in output.splitlines() if "=" in line))
+
+    @staticmethod
+    def __get_environment_cache_path(env_cache_dir: str, project_path: str, init_script_path: str, parent_env: Mapping[str, str]) -> str:
+        """Get cache file path for the environment
+
+        Args:
+            env_cache_dir (str): cache directory
+            project_path (str): abslute path to bitbake project, basically poky dir.
+            init_script_path (str): initialize bitbake proejct command running at project_path.
+            parent_env (Mapping[str, str]): environment that init script runs on
+
+        Returns:
+            str: cache file path. The file name is the hash of project path, init script and parent environment.
+        """
+        project_abs_path: str = os.path.abspath(project_path)
+        key = hashlib.sha256()
+        key.update(project_abs_path.encode())
+        key.update(b"\0" + init_script_path.encode())
+        try:
+            script_words: List[str] = shlex.split(init_script_path)
+        except ValueError:
+            script_words = []
+        for word in script_words:
+            script_path: str = os.path.join(project_abs_path, word)
+            if os.path.isfile(script_path):
+                key.update(b"\0" + BBClient.__get_file_hash(script_path).encode())
+        for name, value in sorted(parent_env.items()):
+            key.update(f"\0{name}={value}".encode())
+        return os.path.join(env_cache_dir, key.hexdigest() + ".json")
+
+    @staticmethod
+    def __get_conf_hashes(project_path: str, env: Mapping[str, str]) -> Mapping[str, str]:
+        """Get hashes of conf/*.conf in the build directory
+
+        Args:
+            project_path (str): abslute path to bitbake project, basically poky dir.
+            env (Mapping[str, str]): environment after init script. BUILDDIR is used if exists.
+
+        Returns:
+            Mapping[str, str]: conf file path and its hash
+        """
+        build_dir: str = env.get("BUILDDIR", os.path.join(project_path, "build"))
+        return {path: BBClient.__get_file_hash(path) for path in sorted(glob.glob(os.path.join(build_dir, "conf", "*.conf")))}
+
+    @staticmethod
+    def __get_file_hash(path: str) -> str:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    @staticmethod
+    def __load_environment_cache(
+        env_cache_dir: Optional[str], project_path: str, init_script_path: str, parent_env: Mapping[str, str]
+    ) -> Optional[Mapping[str, str]]:
+        """Load the environment from cache
+
+        Returns:
+            Optional[Mapping[str, str]]: cached environment. If cache doesn't exist or is out of date, return None.
+        """
+        if not env_cache_dir:
+            return None
+        cache_path: str = BBClient.__get_environment_cache_path(env_cache_dir, project_path, init_script_path, parent_env)
+        try:
+            with open(cache_path) as f:
+                cache: Mapping[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        env: Mapping[str, str] = cache.get("environment", {})
+        if cache.get("conf_hashes") != BBClient.__get_conf_hashes(project_path, env):
+            return None
+        return env
+
+    @staticmethod
+    def __store_environment_cache(
+        env_cache_dir: Optional[str], project_path: str, init_script_path: str, parent_env: Mapping[str, str], env: Mapping[str, str]
+    ) -> None:
+        """Store the environment into cache
+
+        Note:
+            | The cache file may include secrets in environment variables, so only the owner can read it.
+        """
+        if not env_cache_dir:
+            return
+        cache_path: str = BBClient.__get_environment_cache_path(env_cache_dir, project_path, init_script_path, parent_env)
+        cache: Mapping[str, Any] = {
+            "conf_hashes": BBClient.__get_conf_hashes(project_path, env),
+            "environment": env,
+        }
+        try:
+            os.makedirs(env_cache_dir, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=env_cache_dir)
+            with os.fdopen(fd, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+
     @staticmethod
     def __connect_server(
         project_path: str
@@ -1905,11 +2804,11 @@ class BBClient:
         )
         return server_connection
 
-    @staticmethod
-    def __run_command(server_connection, command: str, *params: Any, logger: Optional[Logger]) -> Optional[Any]:
+    def __run_command(self: "BBClient", server_connection, command: str, *params: Any, logger: Optional[Logger]) -> Optional[Any]:
         """Run command
 
         Args:
+            self (BBClient): none
             server_connection (_type_): use return value of __connect_server()
             command (str): commands bitbake defined
             params (Any): paramters for command
@@ -1917,17 +2816,53 @@ class BBClient:
 
         Returns:
             Optional[Any]: command return
+
+        Note:
+            | Commands may be sent from several threads, like the event monitor thread sending queued async command, so a command and its reply are not interleaved with others.
         """
         commandline: List[str] = [command]
         commandline.extend(params if params else [])
         try:
-            result = server_connection.connection.runCommand(commandline)
+            with self.__command_lock:
+                result = server_connection.connection.runCommand(commandline)
         except:
             if logger:
                 logger.error(f"{command} failed beacuse {result}.")
             return None
         return result[0]
 
+    def __run_commands(self: "BBClient", commandlines: List[List[Any]]) -> Tuple[List[Tuple[Any, Optional[str]]], int]:
+        """Run commands back-to-back
+
+        Args:
+            self (BBClient): none
+            commandlines (List[List[Any]]): command name and its parameters
+
+        Returns:
+            Tuple[List[Tuple[Any, Optional[str]]], int]: results and errors of commands, and the number of round trips
+
+        Note:
+            | Process server connection(bb.server.process.ServerCommunicator) can receive commands before replying previous ones,
+            | so all the commands are sent first and then the replies are received in order.
+            | In "lazy" mode, recipes are parsed first only if a command needs recipe cache.
+        """
+        if self.__parse_mode == "lazy" and not self.__is_parsed and any(commandline[0] in self.RECIPE_CACHE_COMMANDS for commandline in commandlines):
+            self.__ensure_parsed()
+        connection: Any = self.__server_connection.connection
+        writer: Any = getattr(connection, "connection", None)
+        reader: Any = getattr(connection, "recv", None)
+        with self.__command_lock:
+            if not (hasattr(writer, "send") and hasattr(reader, "get")):
+                return [connection.runCommand(commandline) for commandline in commandlines], len(commandlines)
+            for commandline in commandlines:
+                writer.send(commandline)
+            results: List[Tuple[Any, Optional[str]]] = []
+            for commandline in commandlines:
+                if not reader.poll(self.COMMAND_TIMEOUT):
+                    raise TimeoutError(f"No reply for {commandline[0]} from bitbake server in {self.COMMAND_TIMEOUT} seconds.")
+                results.append(reader.get())
+            return results, 1
+
     def __monitor_event_loop(self: "BBClient") -> None:
         """Monitor event loop
 
@@ -1938,21 +2873,250 @@ class BBClient:
             This function monitors events from bbclient, and do callback.
         """
         while self.__is_server_running:
-            ret: Optional[BBEventBase] = self.__get_event(1)
-            self.__callbacks_lock.acquire()
-            iter: Iterable = filter(lambda x: x.target_event_type == type(ret), self.__callbacks.values())
-            for cur_callback in iter:
-                cur_callback.callback(self, ret)
-            self.__callbacks_lock.release()
+            for ret in self.__get_events(self.EVENT_POLL_INTERVAL):
+                self.__dispatch_event(ret)
+        if self.__progress_coalescer:
+            for raw_event in self.__progress_coalescer.pop():
+                ret: Optional[BBEventBase] = self.__decode_event(raw_event)
+                if ret:
+                    self.__dispatch_event(ret)
+
+    def __dispatch_event(self: "BBClient", event: BBEventBase) -> None:
+        """Pass an event to callbacks and resolve the future of async command
+
+        Args:
+            self (BBClient): none
+            event (BBEventBase): event from bitbake server
+        """
+        is_command_end: bool = isinstance(event, (CommandCompletedEvent, CommandExitEvent))
+        if is_command_end:
+            self.__update_command_state(event)
+        for cur_callback in self.__find_callbacks(type(event)):
+            cur_callback.dispatcher.submit(self, event)
+        # resolved after inline callbacks have run, so sync commands waiting the future return after them
+        if is_command_end:
+            self.__resolve_command_future(event)
+
+    def __unregister_callback(self: "BBClient", unique_id: uuid.UUID, narrow_event_mask: bool) -> None:
+        """Unregister callback function
+
+        Args:
+            self (BBClient): none
+            unique_id (uuid.UUID): Callback id
+            narrow_event_mask (bool): if False, the event mask is kept even if the callback was the last one for some events.
+                wait_event and event streams pass False, so calling them again for the same events costs no set_event_mask.
+        """
+        self.__callbacks_lock.acquire()
+        callbacks: Dict[uuid.UUID, CallBack] = dict(self.__callbacks[0])
+        cur_callback: CallBack = callbacks.pop(unique_id)
+        self.__callbacks = (callbacks, {})
+        self.__callbacks_lock.release()
+        cur_callback.dispatcher.close()
+        if narrow_event_mask:
+            self.__update_event_mask()
+
+    def __close_event_stream(self: "BBClient", stream: EventStream, unique_ids: List[uuid.UUID]) -> None:
+        """Unregister callbacks of the closed event stream
+
+        Args:
+            self (BBClient): none
+            stream (EventStream): closed stream
+            unique_ids (List[uuid.UUID]): callback ids of the stream
+        """
+        with self.__callbacks_lock:
+            self.__event_streams.discard(stream)
+        for unique_id in unique_ids:
+            self.__unregister_callback(unique_id, narrow_event_mask=False)
+
+    def __update_command_state(self: "BBClient", event: BBEventBase) -> None:
+        """Update the state the running async command changes
+
+        Args:
+            self (BBClient): none
+            event (BBEventBase): CommandCompletedEvent, CommandExitEvent or CommandFailedEvent
+
+        Note:
+            | This is called before callbacks, so callbacks and the caller waiting the command see the new state.
+        """
+        with self.__command_futures_lock:
+            future: Optional[CommandFuture] = self.__running_command
+        if not future:
+            return
+        if future.command == "parse_files_async" and isinstance(event, CommandCompletedEvent):
+            self.__is_parsed = True
+        elif future.command == "reset_cooker_async":
+            self.__is_parsed = False
+
+    def __resolve_command_future(self: "BBClient", event: BBEventBase) -> None:
+        """Resolve the future of the running async command and send the next one
+
+        Args:
+            self (BBClient): none
+            event (BBEventBase): CommandCompletedEvent, CommandExitEvent or CommandFailedEvent
+        """
+        with self.__command_futures_lock:
+            future: Optional[CommandFuture] = self.__running_command
+            self.__running_command = None
+        if future and future.set_running_or_notify_cancel():
+            future.set_result(event)
+        self.__send_next_command()
+
+    def __send_next_command(self: "BBClient") -> None:
+        """Send the oldest queued async command if no async command is running
+
+        Args:
+            self (BBClient): none
+        """
+        while True:
+            with self.__command_futures_lock:
+                if self.__running_command:
+                    return
+                if not self.__queued_commands:
+                    self.__command_idle.set()
+                    return
+                future, send_command = self.__queued_commands.popleft()
+                if future.cancelled():
+                    continue
+                self.__running_command = future
+            if send_command():
+                return
+            with self.__command_futures_lock:
+                if self.__running_command is future:
+                    self.__running_command = None
+            if future.set_running_or_notify_cancel():
+                future.set_exception(BBCommandError(future.command, "it was not accepted"))
+
+    def __cancel_command(self: "BBClient", future: CommandFuture) -> None:
+        """Stop the async command of the cancelled future
+
+        Args:
+            self (BBClient): none
+            future (CommandFuture): cancelled future
+        """
+        with self.__command_futures_lock:
+            is_running: bool = self.__running_command is future
+        if is_running:
+            self.state_shutdown()
+        else:
+            self.__send_next_command()
+
+    def __update_event_mask(self: "BBClient", narrow: bool = True) -> None:
+        """Send log level and event mask for registered callbacks if they are changed
+
+        Args:
+            self (BBClient): none
+            narrow (bool): if False, the mask is sent only if the sent one lacks some events or log records registered callbacks need. Defaults to True.
+
+        Note:
+            | The mask is compared with the one sent last time before taking the lock, so registering callbacks doesn't wait for other commands if nothing changes.
+        """
+        if not self.__is_server_running:
+            return
+        if self.__is_event_mask_sent(self.__get_required_event_mask(), narrow):
+            return
+        with self.__event_mask_lock:
+            event_mask: Tuple[int, List[str]] = self.__get_required_event_mask()
+            if self.__is_event_mask_sent(event_mask, narrow):
+                return
+            if self.__ui_handler is None:
+                self.__ui_handler = self.get_uihandler_num()
+            self.__logger.debug(f"event mask is changed to {event_mask}.")
+            self.set_event_mask(self.__ui_handler, event_mask[0], {}, event_mask[1])
+            self.__event_mask = event_mask
+
+    def __get_required_event_mask(self: "BBClient") -> Tuple[int, List[str]]:
+        """Get log level and event mask the server should send
+
+        Args:
+            self (BBClient): none
+
+        Returns:
+            Tuple[int, List[str]]: log level and event names
+        """
+        if self.__event_mask_mode == "all" or self.__journal:
+            return DEBUG, ["*"]
+        return self.__get_event_mask(self.__callbacks[0].values())
+
+    def __is_event_mask_sent(self: "BBClient", event_mask: Tuple[int, List[str]], narrow: bool) -> bool:
+        """Check whether the event mask sent last time is enough
+
+        Args:
+            self (BBClient): none
+            event_mask (Tuple[int, List[str]]): log level and event names
+            narrow (bool): if True, the sent one has to be the same. Otherwise it's enough if it has all the events and log records of event_mask.
+
+        Returns:
+            bool: no need to send event_mask
+        """
+        sent_event_mask: Optional[Tuple[int, List[str]]] = self.__event_mask
+        if event_mask == sent_event_mask:
+            return True
+        if narrow or sent_event_mask is None:
+            return False
+        sent_log_level, sent_event_names = sent_event_mask
+        log_level, event_names = event_mask
+        return sent_log_level <= log_level and ("*" in sent_event_names or set(event_names) <= set(sent_event_names))
+
+    @staticmethod
+    def __get_event_mask(callbacks: Iterable[CallBack]) -> Tuple[int, List[str]]:
+        """Get log level and event mask which the callbacks need
+
+        Args:
+            callbacks (Iterable[CallBack]): registered callbacks
+
+        Returns:
+            Tuple[int, List[str]]: log level and event names. Command* events are always included because CommandFuture waits for them.
+        """
+        log_level: int = BBClient.NO_LOG_LEVEL
+        event_names: Set[str] = {CommandCompletedEvent.EVENT_NAME, CommandFailedEvent.EVENT_NAME, CommandExitEvent.EVENT_NAME}
+        for cur_callback in callbacks:
+            target: Type[BBEventBase] = cur_callback.target_event_type # type: ignore
+            targets: List[Type[BBEventBase]] = [target]
+            if cur_callback.include_subclasses:
+                targets = [event_type for event_type in ALL_BB_EVENTS + [UnknownEvent] if issubclass(event_type, target)]
+            for event_type in targets:
+                if event_type == LogRecord:
+                    log_level = DEBUG
+                elif event_type == UnknownEvent:
+                    # names of unknown events are unknown
+                    event_names.add("*")
+                else:
+                    event_names.add(event_type.EVENT_NAME)
+        return log_level, ["*"] if "*" in event_names else sorted(event_names)
+
+    def __find_callbacks(self: "BBClient", event_type: type) -> Tuple[CallBack, ...]:
+        """Find callbacks for the event type
+
+        Args:
+            self (BBClient): none
+            event_type (type): type of the event
+
+        Returns:
+            Tuple[CallBack, ...]: callbacks in the order they were registered
+
+        Note:
+            | The result is cached for each event type until callbacks are registered or unregistered.
+        """
+        callbacks, callback_index = self.__callbacks
+        found: Optional[Tuple[CallBack, ...]] = callback_index.get(event_type)
+        if found is None:
+            found = tuple(cur_callback for cur_callback in callbacks.values() if cur_callback.is_target(event_type))
+            callback_index[event_type] = found
+        return found
 
     def __initialize_callback(self: "BBClient") -> None:
+        # default callbacks only log events, so don't make events decoded when they are not logged
+        if not self.__logger.isEnabledFor(DEBUG):
+            return
         self.__callbacks_lock.acquire()
+        callbacks: Dict[uuid.UUID, CallBack] = dict(self.__callbacks[0])
         for event_type in ALL_BB_EVENTS:
             if LogRecord == event_type:
                 continue
             unique_id: uuid.UUID = uuid.uuid4()
             cur_callback: CallBack = CallBack(event_type, BBClient.__default_event_callback)
-            self.__callbacks[unique_id] = cur_callback
+            callbacks[unique_id] = cur_callback
+        self.__callbacks = (callbacks, {})
         self.__callbacks_lock.release()
 
     @staticmethod
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+This file provides column oriented tables of recipe cache queries and symbol table shared by them
+"""
+
+import array
+import itertools
+import threading
+
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple, Type
+
+from .bbcommon import *
+
+class SymbolTable:
+    """Strings like recipe file paths, package names and class paths interned into small integer ids
+
+    Attributes:
+        __symbols (List[str]): string by id
+        __ids (Optional[Dict[str, int]]): id by string. None after compact until it's needed again.
+        __lock (threading.Lock): lock for interning
+
+    Note:
+        | Ids are 0, 1, 2, ... in the order strings are interned, and never change. Each string is stored once however many tables refer to it.
+        | The index from string to id costs more memory than the strings list. compact releases it for tables which are only read.
+        | BBClient has one as BBClient.symbols, and columnar results of the client share it, so ids of the same recipe file path are equal across queries.
+    """
+
+    def __init__(self: "SymbolTable", symbols: Iterable[str] = ()) -> None:
+        """Initialize
+
+        Args:
+            self (SymbolTable): none
+            symbols (Iterable[str]): strings to intern first. Defaults to ().
+        """
+        self.__symbols: List[str] = []
+        self.__ids: Optional[Dict[str, int]] = {}
+        self.__lock: threading.Lock = threading.Lock()
+        self.intern_all(symbols)
+
+    def intern(self: "SymbolTable", symbol: str) -> int:
+        """Get the id of a string, adding it if the table doesn't have it
+
+        Args:
+            self (SymbolTable): none
+            symbol (str): string like recipe file path
+
+        Returns:
+            int: id of the string
+        """
+        return self.intern_all((symbol,))[0]
+
+    def intern_all(self: "SymbolTable", symbols: Iterable[str]) -> array.array:
+        """Get the ids of strings, adding the ones the table doesn't have
+
+        Args:
+            self (SymbolTable): none
+            symbols (Iterable[str]): strings
+
+        Returns:
+            array.array: id of each string
+        """
+        if not isinstance(symbols, (list, tuple)):
+            symbols = list(symbols)
+        with self.__lock:
+            ids: Dict[str, int] = self.__get_ids()
+            # dedupe and number new strings in C, without Python code per string
+            new_symbols: List[str] = list(itertools.filterfalse(ids.__contains__, dict.fromkeys(symbols)))
+            ids.update(zip(new_symbols, itertools.count(len(self.__symbols))))
+            self.__symbols.extend(new_symbols)
+        return array.array("i", list(map(ids.__getitem__, symbols)))
+
+    def id_of(self: "SymbolTable", symbol: str) -> Optional[int]:
+        """Get the id of a string without adding it
+
+        Args:
+            self (SymbolTable): none
+            symbol (str): string like recipe file path
+
+        Returns:
+            Optional[int]: id of the string. None if the table doesn't have it.
+        """
+        with self.__lock:
+            return self.__get_ids().get(symbol)
+
+    def compact(self: "SymbolTable") -> None:
+        """Release the index from string to id. It's made again when a string is interned or looked up next time.
+
+        Args:
+            self (SymbolTable): none
+        """
+        with self.__lock:
+            self.__ids = None
+
+    def resolve(self: "SymbolTable", ids: Iterable[int]) -> List[str]:
+        """Get the strings of ids
+
+        Args:
+            self (SymbolTable): none
+            ids (Iterable[int]): ids
+
+        Returns:
+            List[str]: string of each id
+        """
+        return list(map(self.__symbols.__getitem__, ids))
+
+    def __getitem__(self: "SymbolTable", symbol_id: int) -> str:
+        return self.__symbols[symbol_id]
+
+    def __contains__(self: "SymbolTable", symbol: object) -> bool:
+        return self.id_of(symbol) is not None  # type: ignore
+
+    def __len__(self: "SymbolTable") -> int:
+        return len(self.__symbols)
+
+    def __reduce__(self: "SymbolTable") -> Tuple[Any, ...]:
+        # the lock can't be pickled, so the table is made again from the strings
+        return (SymbolTable, (self.__symbols,))
+
+    def __get_ids(self: "SymbolTable") -> Dict[str, int]:
+        if self.__ids is None:
+            self.__ids = dict(zip(self.__symbols, itertools.count()))
+        return self.__ids
+
+class ColumnarTable:
+    """Column oriented result of a recipe cache query
+
+    Attributes:
+        row_type (Type[Any]): result class of a row, like GetRecipeVersionsResult. Column names are its fields.
+        columns (Dict[str, array.array]): columns by field name. Each column has one value per row, except list columns.
+        offsets (Dict[str, array.array]): row boundaries of list columns. Values of row i are columns[name][offsets[name][i]:offsets[name][i + 1]].
+        coded (FrozenSet[str]): names of columns which have codes of symbols instead of values
+        symbols (SymbolTable): strings referred by codes. symbols[code] is the string.
+
+    Note:
+        | Strings like recipe file paths and package names are stored once in symbols, and columns have their integer codes in array.array, so the table has no object per row.
+        | Columns support buffer protocol, so numpy.frombuffer(column, dtype=column.typecode) makes a numpy array without copy.
+        | Codes are ids of symbols. Tables sharing a SymbolTable can be joined by the codes, and code_of gives the code to compare a column with instead of decoding the column.
+    """
+
+    def __init__(
+        self: "ColumnarTable",
+        row_type: Type[Any],
+        columns: Dict[str, array.array],
+        offsets: Dict[str, array.array],
+        coded: Iterable[str],
+        symbols: SymbolTable,
+    ) -> None:
+        """Initialize
+
+        Args:
+            self (ColumnarTable): none
+            row_type (Type[Any]): result class of a row
+            columns (Dict[str, array.array]): columns by field name
+            offsets (Dict[str, array.array]): row boundaries of list columns
+            coded (Iterable[str]): names of columns which have codes
+            symbols (SymbolTable): strings referred by codes
+        """
+        self.row_type: Type[Any] = row_type
+        self.columns: Dict[str, array.array] = columns
+        self.offsets: Dict[str, array.array] = offsets
+        self.coded: FrozenSet[str] = frozenset(coded)
+        self.symbols: SymbolTable = symbols
+
+    @classmethod
+    def from_lists(
+        cls: Type["ColumnarTable"], row_type: Type[Any], rows: Iterable[Tuple[str, Iterable[str]]], symbols: Optional[SymbolTable] = None
+    ) -> "ColumnarTable":
+        """Make table from rows of a string and a list of strings, like the reply of getRecipes and getRecipeDepends
+
+        Args:
+            row_type (Type[Any]): result class with two fields
+            rows (Iterable[Tuple[str, Iterable[str]]]): reply of bitbake server
+            symbols (Optional[SymbolTable]): symbol table to intern the strings. If None, the table has its own. Defaults to None.
+
+        Returns:
+            ColumnarTable: table with a coded column and a coded list column
+        """
+        keys, lists = list(zip(*rows)) or [(), ()]
+        own_symbols: bool = symbols is None
+        symbols = SymbolTable() if symbols is None else symbols
+        columns: Dict[str, array.array] = dict(zip(row_type._fields, (
+            symbols.intern_all(keys),
+            symbols.intern_all(itertools.chain.from_iterable(lists)),
+        )))
+        offsets: array.array = array.array("i", itertools.chain((0,), itertools.accumulate(map(len, lists))))
+        if own_symbols:
+            symbols.compact()
+        return cls(row_type, columns, {row_type._fields[1]: offsets}, row_type._fields, symbols)
+
+    @classmethod
+    def from_mapping(
+        cls: Type["ColumnarTable"], row_type: Type[Any], mapping: Mapping[str, int], symbols: Optional[SymbolTable] = None
+    ) -> "ColumnarTable":
+        """Make table from a mapping of string to int, like the reply of getBbFilePriority and getDefaultPreference
+
+        Args:
+            row_type (Type[Any]): result class with two fields
+            mapping (Mapping[str, int]): reply of bitbake server
+            symbols (Optional[SymbolTable]): symbol table to intern the strings. If None, the table has its own. Defaults to None.
+
+        Returns:
+            ColumnarTable: table with a coded column and an int column
+        """
+        own_symbols: bool = symbols is None
+        symbols = SymbolTable() if symbols is None else symbols
+        key_name, value_name = row_type._fields
+        columns: Dict[str, array.array] = {
+            key_name: symbols.intern_all(mapping),
+            value_name: array.array("l", mapping.values()),
+        }
+        if own_symbols:
+            symbols.compact()
+        return cls(row_type, columns, {}, [key_name], symbols)
+
+    @classmethod
+    def from_recipe_versions(
+        cls: Type["ColumnarTable"], mapping: Mapping[str, Sequence[str]], symbols: Optional[SymbolTable] = None
+    ) -> "ColumnarTable":
+        """Make table from the reply of getRecipeVersions
+
+        Args:
+            mapping (Mapping[str, Sequence[str]]): recipe file path to pe, pv and pr
+            symbols (Optional[SymbolTable]): symbol table to intern the strings. If None, the table has its own. Defaults to None.
+
+        Returns:
+            ColumnarTable: table of GetRecipeVersionsResult. All the columns are coded.
+        """
+        own_symbols: bool = symbols is None
+        symbols = SymbolTable() if symbols is None else symbols
+        columns: Dict[str, array.array] = {"recipe_file_path": symbols.intern_all(mapping)}
+        versions: List[Tuple[str, ...]] = list(zip(*mapping.values())) or [(), (), ()]
+        for name, values in zip(("pe", "pv", "pr"), versions):
+            columns[name] = symbols.intern_all(values)
+        if own_symbols:
+            symbols.compact()
+        return cls(GetRecipeVersionsResult, columns, {}, GetRecipeVersionsResult._fields, symbols)
+
+    @classmethod
+    def from_rows(
+        cls: Type["ColumnarTable"], row_type: Type[Any], rows: Iterable[Sequence[str]], symbols: Optional[SymbolTable] = None
+    ) -> "ColumnarTable":
+        """Make table from rows of strings, like the reply of getAllAppends
+
+        Args:
+            row_type (Type[Any]): result class which has a field for each string
+            rows (Iterable[Sequence[str]]): reply of bitbake server
+            symbols (Optional[SymbolTable]): symbol table to intern the strings. If None, the table has its own. Defaults to None.
+
+        Returns:
+            ColumnarTable: table whose columns are all coded
+        """
+        own_symbols: bool = symbols is None
+        symbols = SymbolTable() if symbols is None else symbols
+        fields: Tuple[str, ...] = row_type._fields
+        values: List[Tuple[str, ...]] = list(zip(*rows)) or [()] * len(fields)
+        columns: Dict[str, array.array] = {name: symbols.intern_all(column) for name, column in zip(fields, values)}
+        if own_symbols:
+            symbols.compact()
+        return cls(row_type, columns, {}, fields, symbols)
+
+    def __len__(self: "ColumnarTable") -> int:
+        return len(self.columns[self.row_type._fields[0]])
+
+    def code_of(self: "ColumnarTable", symbol: str) -> Optional[int]:
+        """Get the code of a string
+
+        Args:
+            self (ColumnarTable): none
+            symbol (str): string like recipe file path
+
+        Returns:
+            Optional[int]: code of the string. None if the table doesn't have it.
+        """
+        return self.symbols.id_of(symbol)
+
+    def column(self: "ColumnarTable", name: str) -> List[Any]:
+        """Get the values of a column
+
+        Args:
+            self (ColumnarTable): none
+            name (str): field name of row_type
+
+        Returns:
+            List[Any]: value of each row. Codes are decoded, and list columns are split into a list per row.
+        """
+        values: Sequence[Any] = self.columns[name]
+        if name in self.coded:
+            values = self.symbols.resolve(values)
+        offsets: Optional[array.array] = self.offsets.get(name)
+        if offsets is None:
+            return list(values)
+        return [values[begin:end] for begin, end in zip(offsets, offsets[1:])]
+
+    def row(self: "ColumnarTable", index: int) -> Any:
+        """Get a row, resolving its codes
+
+        Args:
+            self (ColumnarTable): none
+            index (int): row index
+
+        Returns:
+            Any: row_type
+        """
+        values: List[Any] = []
+        for name in self.row_type._fields:
+            offsets: Optional[array.array] = self.offsets.get(name)
+            value: Any = self.columns[name][offsets[index]:offsets[index + 1]] if offsets is not None else self.columns[name][index]
+            if name in self.coded:
+                value = self.symbols.resolve(value) if offsets is not None else self.symbols[value]
+            elif offsets is not None:
+                value = list(value)
+            values.append(value)
+        return self.row_type._make(values)
+
+    def to_results(self: "ColumnarTable") -> List[Any]:
+        """Convert to the results returned without columnar option
+
+        Args:
+            self (ColumnarTable): none
+
+        Returns:
+            List[Any]: list of row_type
+        """
+        return self.row_type._make_all(zip(*[self.column(name) for name in self.row_type._fields]))
+
+    def __str__(self: "ColumnarTable") -> str:
+        return f"{self.__class__.__name__}: {self.row_type.__name__} x {len(self)}"
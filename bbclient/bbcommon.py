@@ -4,8 +4,9 @@ This file provides common definition for ease of understanding in/out of command
 """
 
 import json
-from typing import Mapping, Any, List, Optional, Union
+from typing import Mapping, Any, Iterable, List, Optional, Tuple, Union
 from collections import namedtuple
+from functools import partial
 from enum import Enum
 
 VariableHistory = namedtuple(
@@ -26,7 +27,58 @@ class BBProjectNotFoundError(Exception):
     def __str__(self):
         return f"bbclient failed to find bitbake library in {self.__project_path}."
 
-class getAllKeysWithFlagsResult:
+class BBCommandError(Exception):
+    """BBCommandError
+
+    Attributes:
+        __command (str): command name sent to bitbake server
+        __reason (str): error message from bitbake server
+    """
+
+    def __init__(self, command: str, reason: str):
+        self.__command: str = command
+        self.__reason: str = reason
+
+    def __str__(self):
+        return f"bitbake server failed to run {self.__command} because {self.__reason}."
+
+class _ResultTuple(tuple):
+    """Base of result classes
+
+    Note:
+        | Results are immutable named tuples without __dict__. Fields are read by name like before, and _asdict() returns them as dict.
+        | Each result class keeps its constructor arguments. _make(fields) and _make_all(rows) create results from the field values without converting them.
+        | Being tuples, results can be iterated, unpacked and passed to len(). A result is equal only to a result of the same class with equal fields, never to a plain tuple.
+        | A result is hashable only if all its fields are. Results holding a list, like GetRecipesResult, raise TypeError on hash() and can't be put in a set or used as a dict key.
+    """
+    __slots__ = ()
+
+    def __eq__(self: "_ResultTuple", other: object) -> bool:
+        return type(other) is type(self) and tuple.__eq__(self, other)
+
+    def __ne__(self: "_ResultTuple", other: object) -> bool:
+        return not self == other
+
+    def __hash__(self: "_ResultTuple") -> int:
+        return hash((type(self), tuple(self)))
+
+    @classmethod
+    def _make_all(cls, rows: Iterable[Iterable[Any]]) -> List[Any]:
+        """Create results from rows of field values, without calling Python code for each row
+
+        Args:
+            rows (Iterable[Iterable[Any]]): field values of each result in the field order
+
+        Returns:
+            List[Any]: results
+        """
+        return list(map(partial(tuple.__new__, cls), rows))
+
+    def __reduce__(self: "_ResultTuple") -> Tuple[Any, ...]:
+        # constructors take the arguments before conversion, so pickle and copy use _make
+        return (self._make, (tuple(self),))  # type: ignore
+
+class getAllKeysWithFlagsResult(_ResultTuple, namedtuple("getAllKeysWithFlagsResult", ["name", "value", "histories", "flags"])):
     """getAllKeysWithFlagsResult
 
     Attributes:
@@ -35,24 +87,24 @@ class getAllKeysWithFlagsResult:
         histories (List[VariableHistory]): see VariableHistory.
         flags (Mapping[str, str]): flag and value map
     """
+    __slots__ = ()
 
-    def __init__(
-        self: "getAllKeysWithFlagsResult", name: str, data: Mapping[str, Any]
-    ) -> None:
-        self.name: str = name
-
+    def __new__(
+        cls, name: str, data: Mapping[str, Any]
+    ) -> "getAllKeysWithFlagsResult":
         try:
-            self.value: str = data["v"]
-            self.histories: List[VariableHistory] = [
-                self.__load_one_history(hist) for hist in data["history"]
+            value: str = data["v"]
+            histories: List[VariableHistory] = [
+                cls.__load_one_history(hist) for hist in data["history"]
             ]
-            self.flags: Mapping[str, str] = {
+            flags: Mapping[str, str] = {
                 key: value
                 for key, value in data.items()
                 if key != "v" and key != "history"
             }
         except:
             raise Exception
+        return tuple.__new__(cls, (name, value, histories, flags))
 
     @staticmethod
     def __truncate(string, length):
@@ -86,7 +138,7 @@ class BBFeature(Enum):
     SEND_SANITYEVENTS = 2
 
 
-class GetLayerPrioritiesResult:
+class GetLayerPrioritiesResult(_ResultTuple, namedtuple("GetLayerPrioritiesResult", ["name", "path", "path2", "priority"])):
     """getLayerPriorities Result
 
     Attributes:
@@ -95,39 +147,39 @@ class GetLayerPrioritiesResult:
         path2 (str): variable value
         priority (int): see VariableHistory.
     """
+    __slots__ = ()
 
-    def __init__(self: "GetLayerPrioritiesResult", data: List[Any]) -> None:
-        self.name: str = data[0]
-        self.path: str = data[1]
-        self.path2: str = data[2]
-        self.priority: int = data[3]
+    def __new__(cls, data: List[Any]) -> "GetLayerPrioritiesResult":
+        return tuple.__new__(cls, (data[0], data[1], data[2], data[3]))
 
 
-class GetRecipesResult:
+class GetRecipesResult(_ResultTuple, namedtuple("GetRecipesResult", ["package_name", "recipe_files"])):
     """getRecipes result
 
     Attributes:
         package_name (str): package name
         recipe_files (List[str]): recipe file paths
     """
-    def __init__(self: "GetRecipesResult", data: List[Any]) -> None:
-        self.package_name: str = data[0]
-        self.recipe_files: List[str] = data[1]
+    __slots__ = ()
+
+    def __new__(cls, data: List[Any]) -> "GetRecipesResult":
+        return tuple.__new__(cls, (data[0], data[1]))
 
 
-class GetRecipeDependsResult:
+class GetRecipeDependsResult(_ResultTuple, namedtuple("GetRecipeDependsResult", ["recipe_file_path", "depend_package_names"])):
     """getRecipeDepends result
 
     Attributes:
         recipe_file_path (str): recipe file path
         depend_package_names (List[str]): package names that the recipe file depends on
     """
-    def __init__(self: "GetRecipeDependsResult", data: List[Any]) -> None:
-        self.recipe_file_path: str = data[0]
-        self.depend_package_names: List[str] = data[1]
+    __slots__ = ()
 
+    def __new__(cls, data: List[Any]) -> "GetRecipeDependsResult":
+        return tuple.__new__(cls, (data[0], data[1]))
 
-class GetRecipeVersionsResult:
+
+class GetRecipeVersionsResult(_ResultTuple, namedtuple("GetRecipeVersionsResult", ["recipe_file_path", "pe", "pv", "pr"])):
     """getRecipeVersions result
 
     Attributes:
@@ -136,138 +188,145 @@ class GetRecipeVersionsResult:
         pv (str): package version
         pr (str): package revision
     """
-    def __init__(
-        self: "GetRecipeVersionsResult", version: List[str], recipe_file_path: str
-    ):
-        self.recipe_file_path: str = recipe_file_path
-        self.pe: str = version[0]
-        self.pv: str = version[1]
-        self.pr: str = version[2]
+    __slots__ = ()
+
+    def __new__(
+        cls, version: List[str], recipe_file_path: str
+    ) -> "GetRecipeVersionsResult":
+        return tuple.__new__(cls, (recipe_file_path, version[0], version[1], version[2]))
 
 
-class GetRecipeProvidesResult:
+class GetRecipeProvidesResult(_ResultTuple, namedtuple("GetRecipeProvidesResult", ["recipe_file_path", "packages"])):
     """getRecipeProvides result
 
     Attributes:
         recipe_file_path (str): recipe file path
         packages (List[str]): package names that the recipe file provides
     """
-    def __init__(
-        self: "GetRecipeProvidesResult", recipe_file_path: str, packages: List[str]
-    ):
-        self.recipe_file_path: str = recipe_file_path
-        self.packages: List[str] = packages
+    __slots__ = ()
 
+    def __new__(
+        cls, recipe_file_path: str, packages: List[str]
+    ) -> "GetRecipeProvidesResult":
+        return tuple.__new__(cls, (recipe_file_path, packages))
 
-class GetRecipePackagesResult:
+
+class GetRecipePackagesResult(_ResultTuple, namedtuple("GetRecipePackagesResult", ["package_name", "recipe_file_paths"])):
     """getRecipePackages result
 
     Attributes:
         package_name (str): package name 
         recipe_file_paths (List[str]): recipe file paths that provides the package
     """
-    def __init__(
-        self: "GetRecipePackagesResult", package_name: str, recipe_file_paths: List[str]
-    ):
-        self.package_name: str = package_name
-        self.recipe_file_paths: List[str] = recipe_file_paths
+    __slots__ = ()
+
+    def __new__(
+        cls, package_name: str, recipe_file_paths: List[str]
+    ) -> "GetRecipePackagesResult":
+        return tuple.__new__(cls, (package_name, recipe_file_paths))
 
 
-class GetRecipePackagesDynamicResult:
+class GetRecipePackagesDynamicResult(_ResultTuple, namedtuple("GetRecipePackagesDynamicResult", ["dynamic_package_name", "recipe_file_paths"])):
     """getRecipePackagesDynamic result
 
     Attributes:
         dynamic_package_name (str): dynamic package name 
         recipe_file_paths (List[str]): recipe file paths that provides the dynamic package
     """
-    def __init__(
-        self: "GetRecipePackagesDynamicResult",
+    __slots__ = ()
+
+    def __new__(
+        cls,
         dynamic_package_name: str,
         recipe_file_paths: List[str],
-    ):
-        self.dynamic_package_name: str = dynamic_package_name
-        self.recipe_file_paths: List[str] = recipe_file_paths
+    ) -> "GetRecipePackagesDynamicResult":
+        return tuple.__new__(cls, (dynamic_package_name, recipe_file_paths))
 
 
-class GetRProvidersResult:
+class GetRProvidersResult(_ResultTuple, namedtuple("GetRProvidersResult", ["package_alias_name", "recipe_file_paths"])):
     """getRProviders result
 
     Attributes:
         package_alias_name (str): package alias name 
         recipe_file_paths (List[str]): recipe file paths that provides the alias package 
     """
-    def __init__(
-        self: "GetRProvidersResult",
+    __slots__ = ()
+
+    def __new__(
+        cls,
         package_alias_name: str,
         recipe_file_paths: List[str],
-    ):
-        self.package_alias_name: str = package_alias_name
-        self.recipe_file_paths: List[str] = recipe_file_paths
+    ) -> "GetRProvidersResult":
+        return tuple.__new__(cls, (package_alias_name, recipe_file_paths))
 
 
-class GetRuntimeDependsResult:
+class GetRuntimeDependsResult(_ResultTuple, namedtuple("GetRuntimeDependsResult", ["recipe_file_path", "package_depenedncy"])):
     """getRProviders result
 
     Attributes:
         recipe_file_path (str): recipe file path 
         package_depenedncy (Mapping[str, List[str]]): package names that the recipe file depends on
     """
-    def __init__(
-        self: "GetRuntimeDependsResult",
+    __slots__ = ()
+
+    def __new__(
+        cls,
         recipe_file_path: str,
         package_depenedncy: Mapping[str, List[str]],
-    ) -> None:
-        self.recipe_file_path: str = recipe_file_path
-        self.package_depenedncy: Mapping[str, List[str]] = package_depenedncy
+    ) -> "GetRuntimeDependsResult":
+        return tuple.__new__(cls, (recipe_file_path, package_depenedncy))
 
 
-class GetRecipeInheritsResult:
+class GetRecipeInheritsResult(_ResultTuple, namedtuple("GetRecipeInheritsResult", ["recipe_file_path", "inherit_file_paths"])):
     """getRecipeInherits result
 
     Attributes:
         recipe_file_path (str): recipe file path 
         inherit_file_paths (List[str]): inherit recipe file paths that the recipe file inherits
     """
-    def __init__(
-        self: "GetRecipeInheritsResult",
+    __slots__ = ()
+
+    def __new__(
+        cls,
         recipe_file_path: str,
         inherit_file_paths: List[str],
-    ) -> None:
-        self.recipe_file_path: str = recipe_file_path
-        self.inherit_file_paths: List[str] = inherit_file_paths
+    ) -> "GetRecipeInheritsResult":
+        return tuple.__new__(cls, (recipe_file_path, inherit_file_paths))
 
 
-class GetBbFilePriorityResult:
+class GetBbFilePriorityResult(_ResultTuple, namedtuple("GetBbFilePriorityResult", ["recipe_file_path", "priority"])):
     """getBbFilePriority result
 
     Attributes:
         recipe_file_path (str): recipe file path 
         priority (int): priority of the recipe file
     """
-    def __init__(
-        self: "GetBbFilePriorityResult", recipe_file_path: str, priority: int
-    ) -> None:
-        self.recipe_file_path: str = recipe_file_path
-        self.priority: int = priority
+    __slots__ = ()
 
+    def __new__(
+        cls, recipe_file_path: str, priority: int
+    ) -> "GetBbFilePriorityResult":
+        return tuple.__new__(cls, (recipe_file_path, priority))
 
-class GetDefaultPreferenceResult:
+
+class GetDefaultPreferenceResult(_ResultTuple, namedtuple("GetDefaultPreferenceResult", ["recipe_file_path", "default_preference_version"])):
     """getDefaultPreference result
 
     Attributes:
         recipe_file_path (str): recipe file path 
         default_preference_version (int): DEFAULT_PRERENCE for the recipe file.
     """
-    def __init__(
-        self: "GetDefaultPreferenceResult",
+    __slots__ = ()
+
+    def __new__(
+        cls,
         recipe_file_path: str,
         default_preference_version: int,
-    ) -> None:
-        self.recipe_file_path: str = recipe_file_path
-        self.default_preference_version: int = default_preference_version
+    ) -> "GetDefaultPreferenceResult":
+        return tuple.__new__(cls, (recipe_file_path, default_preference_version))
 
 
-class GetSkippedRecipesResult:
+class GetSkippedRecipesResult(_ResultTuple, namedtuple("GetSkippedRecipesResult", ["recipe_file_path", "pn", "skipreason", "provides", "rprovides"])):
     """getSkippedRecipes result
 
     Attributes:
@@ -277,38 +336,55 @@ class GetSkippedRecipesResult:
         provides (List[str]): package names provided by the recipe file 
         rprovides (List[str]): package alias names provided by the recipe file
     """
-    def __init__(
-        self: "GetSkippedRecipesResult", recipe_file_path: str, data: Union[Mapping[str, Any], "SkippedPackage"]
-    ) -> None:
-        self.recipe_file_path: str = recipe_file_path
+    __slots__ = ()
 
+    def __new__(
+        cls, recipe_file_path: str, data: Union[Mapping[str, Any], "SkippedPackage"]
+    ) -> "GetSkippedRecipesResult":
         if isinstance(data, dict):
-            self.pn: str = data.get("pn", None)
-            self.skipreason: str = data.get("skipreason", None)
-            self.provides: List[str] = data.get("provides", None)
-            self.rprovides: List[str] = data.get("rprovides", None)
-            return
-
-        self.pn: str = data.pn if getattr(data, "pn") else None
-        self.skipreason: str =  data.skipreason if getattr(data, "skipreason") else None
-        self.provides: List[str] =  data.provides if getattr(data, "provides") else None
-        self.rprovides: List[str] =  data.rprovides if getattr(data, "rprovides") else None
-
-class GetAllAppendsResult:
+            return tuple.__new__(cls, (
+                recipe_file_path,
+                data.get("pn", None),
+                data.get("skipreason", None),
+                data.get("provides", None),
+                data.get("rprovides", None),
+            ))
+
+        return tuple.__new__(cls, (
+            recipe_file_path,
+            data.pn if getattr(data, "pn") else None,
+            data.skipreason if getattr(data, "skipreason") else None,
+            data.provides if getattr(data, "provides") else None,
+            data.rprovides if getattr(data, "rprovides") else None,
+        ))
+
+class GetAllAppendsResult(_ResultTuple, namedtuple("GetAllAppendsResult", ["target_recipe_name", "append_file_path"])):
     """getAllAppends result
 
     Attributes:
         target_recipe_name (str): recipe file name 
         append_file_path (str): append recipe file path for the recipe file name
     """
-    def __init__(
-        self: "GetAllAppendsResult", target_recipe_name: str, append_file_path: str
-    ) -> None:
-        self.target_recipe_name = target_recipe_name
-        self.append_file_path = append_file_path
-
-
-class FindProvidersResult:
+    __slots__ = ()
+
+    def __new__(
+        cls, target_recipe_name: str, append_file_path: str
+    ) -> "GetAllAppendsResult":
+        return tuple.__new__(cls, (target_recipe_name, append_file_path))
+
+
+class FindProvidersResult(_ResultTuple, namedtuple("FindProvidersResult", [
+    "package_name",
+    "latest_pe",
+    "latest_pv",
+    "latest_pr",
+    "latest_recipe_file_path",
+    "preffered_pe",
+    "preffered_pv",
+    "preffered_pr",
+    "preffered_recipe_file_path",
+    "required_version",
+])):
     """findProviders result
 
     Attributes:
@@ -323,79 +399,58 @@ class FindProvidersResult:
         preffered_recipe_file_path (List[Any]): preffered package recipe file path
         required_version (Optional[bool]): whether required version exists or not. If the yocto version is old, it does not support this and will be None.
     """
-    def __init__(
-        self: "FindProvidersResult",
+    __slots__ = ()
+
+    def __new__(
+        cls,
         package_name: str,
         latest_version: List[Any],
         perffered_version: List[Any],
         required_version: Optional[bool],
-    ) -> None:
-        self.package_name: str = package_name
-        self.latest_pe: List[Any] = latest_version[0][0]
-        self.latest_pv: List[Any] = latest_version[0][1]
-        self.latest_pr: List[Any] = latest_version[0][2]
-        self.latest_recipe_file_path: List[Any] = latest_version[1]
-        self.preffered_pe: List[Any] = perffered_version[0][0]
-        self.preffered_pv: List[Any] = perffered_version[0][1]
-        self.preffered_pr: List[Any] = perffered_version[0][2]
-        self.preffered_recipe_file_path: List[Any] = perffered_version[1]
-        self.required_version: Optional[bool] = required_version
-
-
-class AllProvidersResult:
+    ) -> "FindProvidersResult":
+        return tuple.__new__(cls, (
+            package_name,
+            latest_version[0][0],
+            latest_version[0][1],
+            latest_version[0][2],
+            latest_version[1],
+            perffered_version[0][0],
+            perffered_version[0][1],
+            perffered_version[0][2],
+            perffered_version[1],
+            required_version,
+        ))
+
+
+class AllProvidersResult(_ResultTuple, namedtuple("AllProvidersResult", ["package_name", "recipes"])):
     """allProviders result
 
     Attributes:
         package_name (str): package name
         recipes (List[GetRecipeVersionsResult]): recipe file path and its pe, pv, pr
     """
-    def __init__(
-        self: "AllProvidersResult", package_name: str, recipe_file: List[Any]
-    ) -> None:
-        self.package_name: str = package_name
-        self.recipes: List[GetRecipeVersionsResult] = [
+    __slots__ = ()
+
+    def __new__(
+        cls, package_name: str, recipe_file: List[Any]
+    ) -> "AllProvidersResult":
+        return tuple.__new__(cls, (package_name, [
             GetRecipeVersionsResult(*i) for i in recipe_file
-        ]
+        ]))
 
 
 GetRuntimeRecommendsResult = GetRuntimeDependsResult
 
 class JsonEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, getAllKeysWithFlagsResult):
-            return obj.__dict__
-        if isinstance(obj, GetLayerPrioritiesResult):
-            return obj.__dict__
-        if isinstance(obj, GetRecipesResult):
-            return obj.__dict__
-        if isinstance(obj, GetRecipeDependsResult):
-            return obj.__dict__
-        if isinstance(obj, GetRecipeVersionsResult):
-            return obj.__dict__
-        if isinstance(obj, GetRecipeProvidesResult):
-            return obj.__dict__
-        if isinstance(obj, GetRecipePackagesResult):
-            return obj.__dict__
-        if isinstance(obj, GetRecipePackagesDynamicResult):
-            return obj.__dict__
-        if isinstance(obj, GetRProvidersResult):
-            return obj.__dict__
-        if isinstance(obj, GetRuntimeDependsResult):
-            return obj.__dict__
-        if isinstance(obj, GetRuntimeRecommendsResult):
-            return obj.__dict__
-        if isinstance(obj, GetRecipeInheritsResult):
-            return obj.__dict__
-        if isinstance(obj, GetBbFilePriorityResult):
-            return obj.__dict__
-        if isinstance(obj, GetDefaultPreferenceResult):
-            return obj.__dict__
-        if isinstance(obj, GetSkippedRecipesResult):
-            return obj.__dict__
-        if isinstance(obj, GetAllAppendsResult):
-            return obj.__dict__
-        if isinstance(obj, FindProvidersResult):
-            return obj.__dict__
-        if isinstance(obj, AllProvidersResult):
-            return obj.__dict__
-        return json.JSONEncoder.default(self, obj)
+    # results are tuples, which JSONEncoder writes as lists without calling default, so they are converted to dicts first
+    def iterencode(self, o, _one_shot=False):
+        return super().iterencode(_to_json_value(o), _one_shot)
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, _ResultTuple):
+        return {key: _to_json_value(field) for key, field in zip(value._fields, value)}  # type: ignore
+    if isinstance(value, (list, tuple)):
+        return [_to_json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_json_value(item) for key, item in value.items()}
+    return value
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+This file provides daemon server and client which keep one bitbake server warm for bbclient command
+"""
+
+import os
+import json
+import stat
+import time
+import socket
+import struct
+import hashlib
+import tempfile
+import threading
+
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+from .bbclient import BBClient
+from .bbcommon import JsonEncoder
+
+DAEMON_REQUEST_STATUS: str = "__status__"
+DAEMON_REQUEST_STOP: str = "__stop__"
+
+class BBDaemonNotRunningError(Exception):
+    """BBDaemonNotRunningError
+
+    Attributes:
+        __socket_path (str): socket path of the daemon
+    """
+
+    def __init__(self, socket_path: str):
+        self.__socket_path: str = socket_path
+
+    def __str__(self):
+        return f"bbclient daemon is not running at {self.__socket_path}."
+
+class BBDaemonUnsafeSocketError(Exception):
+    """BBDaemonUnsafeSocketError
+
+    Attributes:
+        __socket_dir (str): directory of the socket
+        __reason (str): why the directory is not used
+    """
+
+    def __init__(self, socket_dir: str, reason: str):
+        self.__socket_dir: str = socket_dir
+        self.__reason: str = reason
+
+    def __str__(self):
+        return f"bbclient daemon socket directory {self.__socket_dir} is not used because {self.__reason}."
+
+class BBDaemonCommandError(Exception):
+    """BBDaemonCommandError
+
+    Attributes:
+        __command (str): command name sent to the daemon
+        __reason (str): error message from the daemon
+    """
+
+    def __init__(self, command: str, reason: str):
+        self.__command: str = command
+        self.__reason: str = reason
+
+    def __str__(self):
+        return f"bbclient daemon failed to run {self.__command} because {self.__reason}."
+
+def get_default_socket_path(project_path: str) -> str:
+    """Get default socket path for the project
+
+    Args:
+        project_path (str): path to bitbake project, basically poky dir
+
+    Returns:
+        str: socket path. The socket is placed in a directory only the current user can access.
+
+    Note:
+        | The directory is $XDG_RUNTIME_DIR/bbclient if XDG_RUNTIME_DIR is set, otherwise bbclient-<uid> in the temporary directory.
+    """
+    project_hash: str = hashlib.sha1(os.path.abspath(project_path).encode()).hexdigest()[:16]
+    runtime_dir: Optional[str] = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        socket_dir: str = os.path.join(runtime_dir, "bbclient")
+    else:
+        socket_dir = os.path.join(tempfile.gettempdir(), f"bbclient-{os.getuid()}")
+    return os.path.join(socket_dir, f"{project_hash}.sock")
+
+def check_socket_dir(socket_path: str) -> None:
+    """Check that only the current user can access the directory of the socket
+
+    Args:
+        socket_path (str): unix socket path
+
+    Raises:
+        BBDaemonUnsafeSocketError: the directory is a symbolic link, is owned by another user or can be accessed by other users
+
+    Note:
+        | Another user who can create the directory or the socket first could answer commands instead of the daemon, so both are checked before they are used.
+    """
+    socket_dir: str = os.path.dirname(os.path.abspath(socket_path))
+    dir_stat: os.stat_result = os.lstat(socket_dir)
+    if not stat.S_ISDIR(dir_stat.st_mode):
+        raise BBDaemonUnsafeSocketError(socket_dir, "it is not a directory")
+    if dir_stat.st_uid != os.getuid():
+        raise BBDaemonUnsafeSocketError(socket_dir, f"it is owned by uid {dir_stat.st_uid}")
+    if stat.S_IMODE(dir_stat.st_mode) != 0o700:
+        raise BBDaemonUnsafeSocketError(socket_dir, f"its mode is {stat.S_IMODE(dir_stat.st_mode):o}, not 700")
+
+class BBDaemonServer:
+    """Serve one BBClient instance over a unix socket
+
+    Attributes:
+        socket_path (str): unix socket path
+        __client (BBClient): warm BBClient instance. The caller starts and stops it.
+        __client_lock (threading.Lock): serializes commands to the bitbake server
+        __socket (Optional[socket.socket]): listening socket
+        __is_running (bool): server is running or not
+        __start_time (float): time when serve_forever started
+        __request_count (int): number of commands served
+    """
+
+    def __init__(self: "BBDaemonServer", client: BBClient, socket_path: str) -> None:
+        """Initialize
+
+        Args:
+            self (BBDaemonServer): none
+            client (BBClient): BBClient instance whose server is already started
+            socket_path (str): unix socket path
+        """
+        self.socket_path: str = socket_path
+        self.__client: BBClient = client
+        self.__client_lock: threading.Lock = threading.Lock()
+        self.__socket: Optional[socket.socket] = None
+        self.__is_running: bool = False
+        self.__start_time: float = 0.0
+        self.__request_count: int = 0
+
+    def bind(self: "BBDaemonServer") -> None:
+        """Create and listen the unix socket
+
+        Args:
+            self (BBDaemonServer): none
+
+        Raises:
+            BBDaemonUnsafeSocketError: other users can access the directory of the socket
+
+        Note:
+            | If a stale socket file is left by a dead daemon, it will be removed.
+        """
+        socket_dir: str = os.path.dirname(os.path.abspath(self.socket_path))
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+        check_socket_dir(self.socket_path)
+        if os.path.exists(self.socket_path):
+            if is_daemon_running(self.socket_path):
+                raise OSError(f"bbclient daemon is already running at {self.socket_path}.")
+            os.unlink(self.socket_path)
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self.__socket.listen()
+
+    def serve_forever(self: "BBDaemonServer") -> None:
+        """Accept requests until stop request comes
+
+        Args:
+            self (BBDaemonServer): none
+        """
+        if not self.__socket:
+            self.bind()
+        self.__is_running = True
+        self.__start_time = time.time()
+        while self.__is_running:
+            try:
+                connection, _ = self.__socket.accept()  # type: ignore
+            except OSError:
+                break
+            threading.Thread(target=self.__serve_connection, args=(connection,), daemon=True).start()
+        self.__close()
+
+    def shutdown(self: "BBDaemonServer") -> None:
+        """Stop serve_forever
+
+        Args:
+            self (BBDaemonServer): none
+        """
+        self.__is_running = False
+        if self.__socket:
+            self.__socket.shutdown(socket.SHUT_RDWR)
+
+    def __serve_connection(self: "BBDaemonServer", connection: socket.socket) -> None:
+        with connection:
+            while True:
+                try:
+                    request: Optional[Any] = _receive_message(connection)
+                    command, args, kwargs = request  # type: ignore
+                    if not (isinstance(command, str) and isinstance(args, list) and isinstance(kwargs, dict)):
+                        raise ValueError("malformed request")
+                except (TypeError, ValueError):
+                    return
+                try:
+                    _send_message(connection, self.__handle_request(command, tuple(args), kwargs))
+                except (TypeError, ValueError) as e:
+                    # the result can't be written as JSON, like ColumnarTable
+                    _send_message(connection, (False, repr(e)))
+                if command == DAEMON_REQUEST_STOP:
+                    self.shutdown()
+                    return
+
+    def __handle_request(self: "BBDaemonServer", command: str, args: Tuple[Any, ...], kwargs: Mapping[str, Any]) -> Tuple[bool, Any]:
+        if command == DAEMON_REQUEST_STATUS:
+            return True, {
+                "pid": os.getpid(),
+                "project_path": self.__client.project_path,
+                "socket_path": self.socket_path,
+                "uptime": time.time() - self.__start_time,
+                "request_count": self.__request_count,
+            }
+        if command == DAEMON_REQUEST_STOP:
+            return True, None
+        if command.startswith("_") or command in ("start_server", "stop_server", "register_callback", "unregister_callback"):
+            return False, f"{command} is not available via daemon"
+        method: Optional[Callable] = getattr(self.__client, command, None)
+        if not callable(method):
+            return False, f"{command} is not a BBClient command"
+        try:
+            with self.__client_lock:
+                self.__request_count += 1
+                return True, method(*args, **kwargs)
+        except Exception as e:
+            return False, repr(e)
+
+    def __close(self: "BBDaemonServer") -> None:
+        if self.__socket:
+            self.__socket.close()
+            self.__socket = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+class BBDaemonClient:
+    """Proxy of BBClient which runs commands on the daemon
+
+    Attributes:
+        socket_path (str): unix socket path
+        __socket (socket.socket): connection to the daemon
+
+    Note:
+        | BBClient commands are available as methods, like daemon_client.get_recipes().
+        | Callbacks can't be registered via daemon because events are not forwarded.
+        | Commands and results are sent as JSON, so results come back as JSON values. Result classes like GetRecipesResult are dicts of their fields.
+    """
+
+    def __init__(self: "BBDaemonClient", socket_path: str, timeout: Optional[float] = None) -> None:
+        """Connect to the daemon
+
+        Args:
+            self (BBDaemonClient): none
+            socket_path (str): unix socket path
+            timeout (Optional[float]): timeout for each command. (seconds)
+
+        Raises:
+            BBDaemonNotRunningError: there is no daemon at socket_path
+            BBDaemonUnsafeSocketError: other users can access the directory of the socket or the socket is owned by another user
+        """
+        self.socket_path: str = socket_path
+        try:
+            check_socket_dir(socket_path)
+            socket_stat: os.stat_result = os.lstat(socket_path)
+        except FileNotFoundError:
+            raise BBDaemonNotRunningError(socket_path)
+        if socket_stat.st_uid != os.getuid():
+            raise BBDaemonUnsafeSocketError(os.path.dirname(os.path.abspath(socket_path)), f"the socket is owned by uid {socket_stat.st_uid}")
+        self.__socket: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.settimeout(timeout)
+        try:
+            self.__socket.connect(socket_path)
+        except OSError:
+            self.__socket.close()
+            raise BBDaemonNotRunningError(socket_path)
+
+    def __getattr__(self: "BBDaemonClient", command: str) -> Callable[..., Any]:
+        if command.startswith("_"):
+            raise AttributeError(command)
+        def remote_command(*args: Any, **kwargs: Any) -> Any:
+            return self.__request(command, args, kwargs)
+        remote_command.__name__ = command
+        return remote_command
+
+    def status(self: "BBDaemonClient") -> Mapping[str, Any]:
+        """Get daemon status
+
+        Args:
+            self (BBDaemonClient): none
+
+        Returns:
+            Mapping[str, Any]: pid, project_path, socket_path, uptime and request_count of the daemon
+        """
+        return self.__request(DAEMON_REQUEST_STATUS, (), {})
+
+    def stop(self: "BBDaemonClient") -> None:
+        """Stop the daemon
+
+        Args:
+            self (BBDaemonClient): none
+        """
+        self.__request(DAEMON_REQUEST_STOP, (), {})
+
+    def close(self: "BBDaemonClient") -> None:
+        """Close the connection
+
+        Args:
+            self (BBDaemonClient): none
+        """
+        self.__socket.close()
+
+    def __enter__(self: "BBDaemonClient") -> "BBDaemonClient":
+        return self
+
+    def __exit__(self: "BBDaemonClient", *_: Any) -> None:
+        self.close()
+
+    def __request(self: "BBDaemonClient", command: str, args: Tuple[Any, ...], kwargs: Mapping[str, Any]) -> Any:
+        _send_message(self.__socket, (command, args, kwargs))
+        try:
+            response: Optional[Tuple[bool, Any]] = _receive_message(self.__socket)
+        except ValueError:
+            response = None
+        if response is None:
+            raise BBDaemonNotRunningError(self.socket_path)
+        is_succeeded, ret = response
+        if not is_succeeded:
+            raise BBDaemonCommandError(command, ret)
+        return ret
+
+def is_daemon_running(socket_path: str) -> bool:
+    """Check whether the daemon responds at socket_path
+
+    Args:
+        socket_path (str): unix socket path
+
+    Returns:
+        bool: daemon is running or not
+    """
+    try:
+        with BBDaemonClient(socket_path, timeout=5) as client:
+            client.status()
+    except (BBDaemonNotRunningError, BBDaemonUnsafeSocketError, OSError):
+        return False
+    return True
+
+def _send_message(connection: socket.socket, message: Any) -> None:
+    # JSON, not pickle, so a peer can't make this process run code by the message
+    payload: bytes = json.dumps(message, cls=JsonEncoder).encode()
+    connection.sendall(struct.pack("!Q", len(payload)) + payload)
+
+def _receive_message(connection: socket.socket) -> Optional[Any]:
+    header: Optional[bytes] = _receive_exactly(connection, 8)
+    if header is None:
+        return None
+    payload: Optional[bytes] = _receive_exactly(connection, struct.unpack("!Q", header)[0])
+    if payload is None:
+        return None
+    return json.loads(payload)
+
+def _receive_exactly(connection: socket.socket, size: int) -> Optional[bytes]:
+    chunks: bytearray = bytearray()
+    while len(chunks) < size:
+        chunk: bytes = connection.recv(min(size - len(chunks), 1 << 20))
+        if not chunk:
+            return None
+        chunks.extend(chunk)
+    return bytes(chunks)
+
+def start_daemon(project_path: str, socket_path: str) -> bool:
+    """Start the daemon in background and wait until it gets ready
+
+    Args:
+        project_path (str): path to bitbake project, basically poky dir
+        socket_path (str): unix socket path
+
+    Returns:
+        bool: whether the daemon got ready or not
+
+    Note:
+        | The daemon inherits current environment, so please initialize env by oe-init-build-env in advance.
+        | This function blocks until the bitbake server finishes parsing all recipes.
+    """
+    read_fd, write_fd = os.pipe()
+    pid: int = os.fork()
+    if pid:
+        os.close(write_fd)
+        with os.fdopen(read_fd, "rb") as ready_pipe:
+            is_ready: bool = ready_pipe.read(1) == b"1"
+        os.waitpid(pid, 0)
+        return is_ready
+
+    # first child: detach from the terminal and fork again so the daemon is not a session leader
+    os.close(read_fd)
+    os.setsid()
+    if os.fork():
+        os._exit(0)
+    devnull: int = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    exit_code: int = 1
+    try:
+        exit_code = _run_daemon(project_path, socket_path, write_fd)
+    finally:
+        os._exit(exit_code)
+
+def _run_daemon(project_path: str, socket_path: str, ready_fd: int) -> int:
+    client: BBClient = BBClient(project_path)
+    if not client.start_server():
+        os.write(ready_fd, b"0")
+        os.close(ready_fd)
+        return 1
+    server: BBDaemonServer = BBDaemonServer(client, socket_path)
+    try:
+        server.bind()
+    except (OSError, BBDaemonUnsafeSocketError):
+        os.write(ready_fd, b"0")
+        os.close(ready_fd)
+        client.stop_server()
+        return 1
+    os.write(ready_fd, b"1")
+    os.close(ready_fd)
+    try:
+        server.serve_forever()
+    finally:
+        client.stop_server()
+    return 0
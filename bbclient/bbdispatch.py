@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+This file provides dispatcher which runs callback functions for events from bitbake server
+"""
+
+import time
+import threading
+import collections
+
+from concurrent.futures import Executor
+from logging import Logger
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+DISPATCH_MODES: List[str] = ["inline", "pool", "ordered"]
+OVERFLOW_POLICIES: List[str] = ["drop_oldest", "drop_newest", "block"]
+
+class CallbackStats:
+    """Statistics of a callback function
+
+    Attributes:
+        dispatched (int): number of events passed to the callback function
+        dropped (int): number of events dropped by overflow policy
+        failed (int): number of events the callback function raised exception for
+        pending (int): number of events waiting for the callback function
+        max_pending (int): max of pending so far
+        lag (float): time the last event waited until the callback function started. (seconds)
+        max_lag (float): max of lag so far. (seconds)
+    """
+
+    def __init__(
+        self: "CallbackStats",
+        dispatched: int = 0,
+        dropped: int = 0,
+        failed: int = 0,
+        pending: int = 0,
+        max_pending: int = 0,
+        lag: float = 0.0,
+        max_lag: float = 0.0,
+    ) -> None:
+        self.dispatched: int = dispatched
+        self.dropped: int = dropped
+        self.failed: int = failed
+        self.pending: int = pending
+        self.max_pending: int = max_pending
+        self.lag: float = lag
+        self.max_lag: float = max_lag
+
+    def __str__(self: "CallbackStats") -> str:
+        return self.__class__.__name__ + ": " + str(vars(self))
+
+class CallbackDispatcher:
+    """Run a callback function for events
+
+    Attributes:
+        callback (Callable[[Any, Any], None]): callback function which receives BBClient and event
+        mode (str): dispatch mode. see __init__.
+        __max_pending (int): max number of events waiting for the callback function
+        __overflow (str): overflow policy. see __init__.
+        __executor (Optional[Executor]): thread pool for "pool" mode
+        __logger (Optional[Logger]): logger for exceptions from the callback function
+        __events (Deque[Tuple[Any, Any, float]]): client, event and the time it was queued
+        __condition (threading.Condition): lock for __events and __stats
+        __stats (CallbackStats): statistics
+        __is_closed (bool): closed or not
+    """
+
+    def __init__(
+        self: "CallbackDispatcher",
+        callback: Callable[[Any, Any], None],
+        mode: str = "inline",
+        max_pending: int = 1000,
+        overflow: str = "drop_oldest",
+        executor: Optional[Executor] = None,
+        logger: Optional[Logger] = None,
+    ) -> None:
+        """Initialize
+
+        Args:
+            self (CallbackDispatcher): none
+            callback (Callable[[Any, Any], None]): callback function which receives BBClient and event
+            mode (str): how to run the callback function. Defaults to "inline".
+                * "inline": run in the event monitor thread. Slow callback delays all the other callbacks.
+                * "pool": run in the thread pool. Events may be handled in parallel and out of order.
+                * "ordered": run in the thread for this callback. Events are handled one by one in order.
+            max_pending (int): max number of events waiting for the callback function. This is ignored in "inline" mode.
+            overflow (str): what to do when max_pending events are waiting. Defaults to "drop_oldest".
+                * "drop_oldest": drop the oldest waiting event
+                * "drop_newest": drop the new event
+                * "block": wait until the callback function handles an event. Please note that this stops the event monitor thread.
+            executor (Optional[Executor]): thread pool for "pool" mode
+            logger (Optional[Logger]): logger for exceptions from the callback function
+        """
+        if mode not in DISPATCH_MODES:
+            raise ValueError(f"mode must be one of {DISPATCH_MODES}, but {mode} is given.")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, but {overflow} is given.")
+        if mode == "pool" and not executor:
+            raise ValueError("pool mode needs executor.")
+        if max_pending <= 0:
+            raise ValueError(f"max_pending must be positive, but {max_pending} is given.")
+        self.callback: Callable[[Any, Any], None] = callback
+        self.mode: str = mode
+        self.__max_pending: int = max_pending
+        self.__overflow: str = overflow
+        self.__executor: Optional[Executor] = executor
+        self.__logger: Optional[Logger] = logger
+        self.__events: Deque[Tuple[Any, Any, float]] = collections.deque()
+        self.__condition: threading.Condition = threading.Condition()
+        self.__stats: CallbackStats = CallbackStats()
+        self.__is_closed: bool = False
+        if mode == "ordered":
+            threading.Thread(target=self.__run_ordered, name="bbclient-callback", daemon=True).start()
+
+    def submit(self: "CallbackDispatcher", client: Any, event: Any) -> None:
+        """Pass an event to the callback function
+
+        Args:
+            self (CallbackDispatcher): none
+            client (Any): BBClient
+            event (Any): event from bitbake server
+        """
+        if self.mode == "inline":
+            self.__run(client, event, time.perf_counter())
+            return
+        with self.__condition:
+            if self.__is_closed:
+                return
+            if len(self.__events) >= self.__max_pending:
+                if self.__overflow == "drop_newest":
+                    self.__stats.dropped += 1
+                    return
+                if self.__overflow == "drop_oldest":
+                    self.__events.popleft()
+                    self.__stats.dropped += 1
+                while len(self.__events) >= self.__max_pending and not self.__is_closed:
+                    self.__condition.wait()
+            self.__events.append((client, event, time.perf_counter()))
+            self.__stats.max_pending = max(self.__stats.max_pending, len(self.__events))
+            self.__condition.notify_all()
+        if self.mode == "pool":
+            self.__executor.submit(self.__run_next) # type: ignore
+
+    def close(self: "CallbackDispatcher") -> None:
+        """Stop receiving events
+
+        Args:
+            self (CallbackDispatcher): none
+
+        Note:
+            | Events already queued are still passed to the callback function.
+        """
+        with self.__condition:
+            self.__is_closed = True
+            self.__condition.notify_all()
+
+    def get_stats(self: "CallbackDispatcher") -> CallbackStats:
+        """Get statistics
+
+        Args:
+            self (CallbackDispatcher): none
+
+        Returns:
+            CallbackStats: snapshot of statistics
+        """
+        with self.__condition:
+            stats: CallbackStats = CallbackStats(**vars(self.__stats))
+            stats.pending = len(self.__events)
+        return stats
+
+    def __run_next(self: "CallbackDispatcher") -> None:
+        with self.__condition:
+            if not self.__events:
+                # the event was dropped by overflow policy
+                return
+            client, event, queued_time = self.__events.popleft()
+            self.__condition.notify_all()
+        self.__run(client, event, queued_time)
+
+    def __run_ordered(self: "CallbackDispatcher") -> None:
+        while True:
+            with self.__condition:
+                while not self.__events and not self.__is_closed:
+                    self.__condition.wait()
+                if not self.__events:
+                    return
+                client, event, queued_time = self.__events.popleft()
+                self.__condition.notify_all()
+            self.__run(client, event, queued_time)
+
+    def __run(self: "CallbackDispatcher", client: Any, event: Any, queued_time: float) -> None:
+        lag: float = time.perf_counter() - queued_time
+        with self.__condition:
+            self.__stats.dispatched += 1
+            self.__stats.lag = lag
+            self.__stats.max_lag = max(self.__stats.max_lag, lag)
+        try:
+            self.callback(client, event)
+        except Exception as e:
+            with self.__condition:
+                self.__stats.failed += 1
+            if self.__logger:
+                self.__logger.error(f"callback for {event.__class__.__name__} failed because {e!r}.")
+
+class EventWaiter:
+    """Wait for an event passed from the event monitor thread
+
+    Attributes:
+        __condition (threading.Condition): condition to wake up the waiting thread
+        __event (Optional[Any]): the first event passed by notify
+    """
+
+    def __init__(self: "EventWaiter") -> None:
+        self.__condition: threading.Condition = threading.Condition()
+        self.__event: Optional[Any] = None
+
+    def notify(self: "EventWaiter", client: Any, event: Any) -> None:
+        """Pass an event and wake up the waiting thread. This has the same signature as callback functions.
+
+        Args:
+            self (EventWaiter): none
+            client (Any): BBClient
+            event (Any): event from bitbake server
+        """
+        with self.__condition:
+            if self.__event is None:
+                self.__event = event
+                self.__condition.notify_all()
+
+    def wait(self: "EventWaiter", timeout: Optional[float] = None) -> Optional[Any]:
+        """Wait for an event without polling
+
+        Args:
+            self (EventWaiter): none
+            timeout (Optional[float]): timeout. (seconds)
+
+        Returns:
+            Optional[Any]: the first event passed by notify or None if timeout
+        """
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.__event is not None, timeout)
+            return self.__event
+
+class EventStream:
+    """Iterator of events passed from the event monitor thread, backed by a bounded ring buffer
+
+    Attributes:
+        __predicate (Optional[Callable[[Any], bool]]): filter for events. Only events it returns True for are kept.
+        __timeout (Optional[float]): max time to wait for the next event. (seconds)
+        __maxsize (int): max number of events kept in the ring buffer
+        __overflow (str): overflow policy. see __init__.
+        __on_close (Optional[Callable[[], None]]): function called once when this stream is closed
+        __events (Deque[Tuple[int, Any]]): sequence number and event. Events already read are kept for seek until they are overwritten.
+        __condition (threading.Condition): lock for the ring buffer and counters
+        __next_sequence (int): sequence number of the next event
+        __sequence (int): sequence number of the last event read
+        __dropped (int): number of events dropped before they were read
+        __is_closed (bool): closed or not
+    """
+
+    def __init__(
+        self: "EventStream",
+        predicate: Optional[Callable[[Any], bool]] = None,
+        timeout: Optional[float] = None,
+        maxsize: int = 1000,
+        overflow: str = "drop_oldest",
+        on_close: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Initialize
+
+        Args:
+            self (EventStream): none
+            predicate (Optional[Callable[[Any], bool]]): filter for events. It runs in the event monitor thread.
+            timeout (Optional[float]): max time to wait for the next event. Iteration stops if no event arrives in time. None means no limit.
+            maxsize (int): max number of events kept in the ring buffer
+            overflow (str): what to do when maxsize events are not read yet. Defaults to "drop_oldest".
+                * "drop_oldest": overwrite the oldest event
+                * "drop_newest": drop the new event
+                * "block": wait until the consumer reads an event. This is backpressure: the event monitor thread stops and bitbake server keeps events.
+            on_close (Optional[Callable[[], None]]): function called once when this stream is closed
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, but {overflow} is given.")
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, but {maxsize} is given.")
+        self.__predicate: Optional[Callable[[Any], bool]] = predicate
+        self.__timeout: Optional[float] = timeout
+        self.__maxsize: int = maxsize
+        self.__overflow: str = overflow
+        self.__on_close: Optional[Callable[[], None]] = on_close
+        self.__events: Deque[Tuple[int, Any]] = collections.deque()
+        self.__condition: threading.Condition = threading.Condition()
+        self.__next_sequence: int = 1
+        self.__sequence: int = 0
+        self.__dropped: int = 0
+        self.__is_closed: bool = False
+
+    def __enter__(self: "EventStream") -> "EventStream":
+        return self
+
+    def __exit__(self: "EventStream", *_: Any) -> None:
+        self.close()
+
+    def __iter__(self: "EventStream") -> "EventStream":
+        return self
+
+    def __next__(self: "EventStream") -> Any:
+        with self.__condition:
+            if not self.__condition.wait_for(lambda: self.__has_unread() or self.__is_closed, self.__timeout) or not self.__has_unread():
+                is_timeout: bool = not self.__is_closed
+            else:
+                sequence, event = self.__events[max(self.__sequence + 1 - self.__events[0][0], 0)]
+                self.__sequence = sequence
+                self.__condition.notify_all()
+                return event
+        if is_timeout:
+            self.close()
+        raise StopIteration
+
+    @property
+    def sequence(self: "EventStream") -> int:
+        """int: sequence number of the last event read. 0 if no event is read yet."""
+        with self.__condition:
+            return self.__sequence
+
+    @property
+    def dropped(self: "EventStream") -> int:
+        """int: number of events dropped by overflow policy before they were read"""
+        with self.__condition:
+            return self.__dropped
+
+    @property
+    def pending(self: "EventStream") -> int:
+        """int: number of events not read yet"""
+        with self.__condition:
+            return self.__next_sequence - 1 - max(self.__sequence, self.__events[0][0] - 1 if self.__events else self.__sequence)
+
+    def seek(self: "EventStream", sequence: int) -> None:
+        """Resume from the event after the sequence number
+
+        Args:
+            self (EventStream): none
+            sequence (int): sequence number of the last event the consumer handled
+
+        Note:
+            | Events are kept in the ring buffer after they are read, so the consumer can read them again until they are overwritten.
+            | If the next event is already overwritten, iteration resumes from the oldest event in the ring buffer.
+        """
+        with self.__condition:
+            self.__sequence = min(max(sequence, 0), self.__next_sequence - 1)
+            self.__condition.notify_all()
+
+    def notify(self: "EventStream", client: Any, event: Any) -> None:
+        """Put an event into the ring buffer. This has the same signature as callback functions.
+
+        Args:
+            self (EventStream): none
+            client (Any): BBClient
+            event (Any): event from bitbake server
+        """
+        if self.__predicate and not self.__predicate(event):
+            return
+        with self.__condition:
+            while len(self.__events) >= self.__maxsize and not self.__is_closed:
+                if self.__events[0][0] <= self.__sequence:
+                    self.__events.popleft()
+                elif self.__overflow == "drop_oldest":
+                    self.__events.popleft()
+                    self.__dropped += 1
+                elif self.__overflow == "drop_newest":
+                    self.__dropped += 1
+                    return
+                else:
+                    self.__condition.wait()
+            if self.__is_closed:
+                return
+            self.__events.append((self.__next_sequence, event))
+            self.__next_sequence += 1
+            self.__condition.notify_all()
+
+    def close(self: "EventStream") -> None:
+        """Stop receiving events
+
+        Args:
+            self (EventStream): none
+
+        Note:
+            | Events already in the ring buffer can still be read.
+        """
+        with self.__condition:
+            if self.__is_closed:
+                return
+            self.__is_closed = True
+            self.__condition.notify_all()
+        if self.__on_close:
+            self.__on_close()
+
+    def __has_unread(self: "EventStream") -> bool:
+        return bool(self.__events) and self.__events[-1][0] > self.__sequence
+
+class ProgressCoalescer:
+    """Keep only the latest progress event for each key until the window ends
+
+    Attributes:
+        window (float): how long progress events are kept. (seconds)
+        __events (Dict[Hashable, Tuple[Any, Any]]): key and pid and the latest event for it, in the order the keys arrived
+        __deadline (Optional[float]): time to pass the kept events. None if no event is kept.
+
+    Note:
+        | This is used only in the event monitor thread, so it has no lock.
+    """
+
+    def __init__(self: "ProgressCoalescer", window: float) -> None:
+        """Initialize
+
+        Args:
+            self (ProgressCoalescer): none
+            window (float): how long progress events are kept. (seconds)
+        """
+        if window <= 0:
+            raise ValueError(f"window must be positive, but {window} is given.")
+        self.window: float = window
+        self.__events: Dict[Hashable, Tuple[Any, Any]] = {}
+        self.__deadline: Optional[float] = None
+
+    def add(self: "ProgressCoalescer", key: Hashable, pid: Any, event: Any) -> bool:
+        """Keep a progress event
+
+        Args:
+            self (ProgressCoalescer): none
+            key (Hashable): progress events with the same key replace each other
+            pid (Any): pid of the process which sent the event
+            event (Any): progress event
+
+        Returns:
+            bool: True if an older event is replaced
+        """
+        if not self.__events:
+            self.__deadline = time.monotonic() + self.window
+        is_replaced: bool = key in self.__events
+        self.__events[key] = (pid, event)
+        return is_replaced
+
+    def get_timeout(self: "ProgressCoalescer", timeout: Optional[float]) -> Optional[float]:
+        """Get how long the caller can wait for the next event
+
+        Args:
+            self (ProgressCoalescer): none
+            timeout (Optional[float]): how long the caller wants to wait. (seconds)
+
+        Returns:
+            Optional[float]: timeout shortened to the end of the window. (seconds)
+        """
+        if self.__deadline is None:
+            return timeout
+        remaining: float = max(self.__deadline - time.monotonic(), 0.0)
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def pop(self: "ProgressCoalescer", pid: Any = None) -> List[Any]:
+        """Take kept events
+
+        Args:
+            self (ProgressCoalescer): none
+            pid (Any): take only events from this process. None means all.
+
+        Returns:
+            List[Any]: kept events in the order their keys arrived
+        """
+        if not self.__events:
+            return []
+        if pid is None:
+            events: List[Any] = [event for _, event in self.__events.values()]
+            self.__events.clear()
+        else:
+            keys: List[Hashable] = [key for key, (event_pid, _) in self.__events.items() if event_pid == pid]
+            events = [self.__events.pop(key)[1] for key in keys]
+        if not self.__events:
+            self.__deadline = None
+        return events
+
+    def pop_expired(self: "ProgressCoalescer") -> List[Any]:
+        """Take all kept events if the window has ended
+
+        Args:
+            self (ProgressCoalescer): none
+
+        Returns:
+            List[Any]: kept events in the order their keys arrived
+        """
+        if self.__deadline is None or time.monotonic() < self.__deadline:
+            return []
+        return self.pop()
@@ -2,33 +2,168 @@
 This file provides definition for events from bitbake server
 """
 
-from typing import Mapping, Any, List, Type, Callable, Optional, Iterable
+import time
+import threading
+
+from typing import Mapping, Any, Dict, List, Type, Callable, Optional, Iterable, Tuple
+
+class EventDecodeStats:
+    """Statistics of decoding events from bitbake server
+
+    Attributes:
+        received (int): number of events received from bitbake server
+        skipped (int): number of events nobody subscribes to. They are not decoded at all.
+        coalesced (int): number of progress events replaced by newer ones before they were decoded. see BBClient.start_server.
+        decoded (int): number of events decoded to event classes
+        lookup_time (float): total time to find event classes and subscribers. (seconds)
+        decode_time (float): total time to decode events to event classes. (seconds)
+    """
+
+    def __init__(
+        self: "EventDecodeStats",
+        received: int = 0,
+        skipped: int = 0,
+        coalesced: int = 0,
+        decoded: int = 0,
+        lookup_time: float = 0.0,
+        decode_time: float = 0.0,
+    ) -> None:
+        self.received: int = received
+        self.skipped: int = skipped
+        self.coalesced: int = coalesced
+        self.decoded: int = decoded
+        self.lookup_time: float = lookup_time
+        self.decode_time: float = decode_time
+
+    @property
+    def time_per_event(self: "EventDecodeStats") -> float:
+        """Average time to decode an event. (seconds)"""
+        return (self.lookup_time + self.decode_time) / self.received if self.received else 0.0
+
+    def __str__(self: "EventDecodeStats") -> str:
+        return self.__class__.__name__ + ": " + str(dict(vars(self), time_per_event=self.time_per_event))
 
 class BBEventBase:
     """Base class for all the events
 
     Attributes:
-        event_name (str): event name like "bb.build.TaskProgress"
+        event_name (str): event name like "bb.build.TaskProgress". This is EVENT_NAME of the class.
+        pid (int): pid of the process which fired the event
+        __lazy_args (Tuple[Optional[EventDecodeStats], Tuple[Any, ...]]): arguments of __init__ until the event is decoded. see decode_lazily.
+
+    Note:
+        | BBClient makes event objects by decode or decode_lazily. The latter ones are decoded on first attribute access.
+        | All the event classes have __slots__ to keep buffered events small. Event classes defined outside of bbclient don't need them.
     """
+    __slots__ = ("pid", "__lazy_args")
+
     EVENT_NAME: str = "bb.build.TaskFailed"
 
+    __decode_lock: threading.Lock = threading.Lock()
+    __field_names: Dict[type, Tuple[str, ...]] = {}
+
     def __init__(self: "BBEventBase", event_name: str, data: Mapping[str, Any]) -> None:
         """init
 
         Args:
             self (BBEventBase): none
-            event_name (str): event name like "bb.build.TaskProgress"
+            event_name (str): event name like "bb.build.TaskProgress". It's not kept because it's the same as EVENT_NAME.
         """
-        self.event_name: str = event_name
         self.pid: int = data.get("pid", "")
 
+    @property
+    def event_name(self: "BBEventBase") -> str:
+        """str: event name like bb.build.TaskProgress"""
+        return self.EVENT_NAME
+
     def __str__(self: "BBEventBase") -> str:
         """__str__
 
         Returns:
             str: brief description of the class
         """
-        return self.__class__.__name__ + ": " + str(vars(self))
+        self.__decode()
+        return self.__class__.__name__ + ": " + str(self.__get_fields())
+
+    def __getattr__(self: "BBEventBase", name: str) -> Any:
+        if name.startswith("__") or name == "_BBEventBase__lazy_args":
+            raise AttributeError(name)
+        self.__decode()
+        return object.__getattribute__(self, name)
+
+    def __get_fields(self: "BBEventBase") -> Dict[str, Any]:
+        """Get attributes of the event
+
+        Args:
+            self (BBEventBase): none
+
+        Returns:
+            Dict[str, Any]: attribute name and value, starting with event_name
+        """
+        field_names: Optional[Tuple[str, ...]] = BBEventBase.__field_names.get(type(self))
+        if field_names is None:
+            names: Dict[str, None] = {}
+            for event_type in reversed(type(self).__mro__):
+                slots: Any = vars(event_type).get("__slots__", ())
+                names.update((name, None) for name in ((slots,) if isinstance(slots, str) else slots) if not name.startswith("__"))
+            field_names = tuple(names)
+            BBEventBase.__field_names[type(self)] = field_names
+        fields: Dict[str, Any] = {"event_name": self.event_name}
+        fields.update((name, object.__getattribute__(self, name)) for name in field_names if hasattr(self, name))
+        fields.update(getattr(self, "__dict__", {}))
+        return fields
+
+    @classmethod
+    def decode(cls, stats: Optional[EventDecodeStats], *args: Any) -> "BBEventBase":
+        """Make an event object
+
+        Args:
+            stats (Optional[EventDecodeStats]): statistics to record decoded and decode_time
+            args (Any): arguments of __init__ like data of the event
+
+        Returns:
+            BBEventBase: event object
+        """
+        start_time: float = time.perf_counter()
+        event: BBEventBase = cls(*args)
+        if stats:
+            with BBEventBase.__decode_lock:
+                stats.decoded += 1
+                stats.decode_time += time.perf_counter() - start_time
+        return event
+
+    @classmethod
+    def decode_lazily(cls, stats: Optional[EventDecodeStats], *args: Any) -> "BBEventBase":
+        """Make an event object which is decoded on first attribute access
+
+        Args:
+            stats (Optional[EventDecodeStats]): statistics to record decoded and decode_time
+            args (Any): arguments of __init__ like data of the event
+
+        Returns:
+            BBEventBase: event object. isinstance works before it is decoded.
+
+        Note:
+            | The first attribute access costs a few microseconds more than decode, so use this only when the event may not be accessed or is accessed in another thread.
+        """
+        event: BBEventBase = cls.__new__(cls)
+        event.__lazy_args = (stats, args)
+        return event
+
+    def __decode(self: "BBEventBase") -> None:
+        if getattr(self, "_BBEventBase__lazy_args", None) is None:
+            return
+        with BBEventBase.__decode_lock:
+            lazy_args: Optional[Tuple[Optional[EventDecodeStats], Tuple[Any, ...]]] = getattr(self, "_BBEventBase__lazy_args", None)
+            if not lazy_args:
+                return
+            del self.__lazy_args
+            stats, args = lazy_args
+            start_time: float = time.perf_counter()
+            self.__init__(*args) # type: ignore
+            if stats:
+                stats.decoded += 1
+                stats.decode_time += time.perf_counter() - start_time
 
     @classmethod
     def is_target(cls, event_name: str) -> bool:
@@ -43,6 +178,8 @@ class BBEventBase:
         return cls.EVENT_NAME == event_name
 
 class TaskBase(BBEventBase):
+    __slots__ = ("task", "fn", "package", "mc", "taskfile", "taskname", "logfile", "time", "pn", "pv", "message")
+
     EVENT_NAME: str = "bb.build.TaskBase"
 
     def __init__(self: "TaskFailedEvent", event_name: str, data: Mapping[str, Any]) -> None:
@@ -60,6 +197,8 @@ class TaskBase(BBEventBase):
         self.message = data.get("_message")
 
 class TaskFailedEvent(TaskBase):
+    __slots__ = ("is_err_printed",)
+
     EVENT_NAME: str = "bb.build.TaskFailed"
 
     def __init__(self: "TaskFailedEvent", data: Mapping[str, Any]) -> None:
@@ -67,6 +206,8 @@ class TaskFailedEvent(TaskBase):
         self.is_err_printed = data.get("errprinted")
 
 class TaskProgressEvent(BBEventBase):
+    __slots__ = ("progress", "rate")
+
     EVENT_NAME: str = "bb.build.TaskProgress"
 
     def __init__(self: "TaskProgressEvent", data: Mapping[str, Any]) -> None:
@@ -75,6 +216,8 @@ class TaskProgressEvent(BBEventBase):
         self.rate: str = data["rate"]
 
 class TaskStartedEvent(TaskBase):
+    __slots__ = ("taskflags",)
+
     EVENT_NAME: str = "bb.build.TaskStarted"
 
     def __init__(self: "TaskStartedEvent", data: Mapping[str, Any]) -> None:
@@ -82,18 +225,24 @@ class TaskStartedEvent(TaskBase):
         self.taskflags: Any = data["taskflags"]
 
 class TaskSucceededEvent(TaskBase):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.build.TaskSucceeded"
 
     def __init__(self: "TaskSucceededEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class CommandCompletedEvent(BBEventBase):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.command.CommandCompleted"
 
     def __init__(self: "CommandCompletedEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class CommandExitEvent(BBEventBase):
+    __slots__ = ("exitcode",)
+
     EVENT_NAME: str = "bb.command.CommandExit"
 
     def __init__(self: "CommandExitEvent", data: Mapping[str, Any], event_name: str = EVENT_NAME) -> None:
@@ -101,6 +250,8 @@ class CommandExitEvent(BBEventBase):
         self.exitcode: str = data["exitcode"]
 
 class CommandFailedEvent(CommandExitEvent):
+    __slots__ = ("error",)
+
     EVENT_NAME: str = "bb.command.CommandFailed"
 
     def __init__(self: "CommandFailedEvent", data: Mapping[str, Any]) -> None:
@@ -108,6 +259,9 @@ class CommandFailedEvent(CommandExitEvent):
         self.error: str = data["error"]
 
 class OperationStarted(BBEventBase):
+    # fields are in the subclasses, so that BuildStartedEvent can inherit both BuildBaseEvent and OperationStarted
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.event.OperationStarted"
 
     def __init__(self: "OperationStarted", event_name: str, data: Mapping[str, Any]) -> None:
@@ -115,6 +269,8 @@ class OperationStarted(BBEventBase):
         self.msg = data["msg"]
 
 class OperationProgress(BBEventBase):
+    __slots__ = ("current", "total", "msg")
+
     EVENT_NAME: str = "bb.event.OperationProgress"
 
     def __init__(self: "OperationProgress", event_name: str, data: Mapping[str, Any]) -> None:
@@ -124,6 +280,8 @@ class OperationProgress(BBEventBase):
         self.msg = data["msg"]
 
 class OperationCompletedEvent(BBEventBase):
+    __slots__ = ("total", "msg")
+
     EVENT_NAME: str = "bb.event.OperationCompletedEvent"
 
     def __init__(self: "CacheLoadCompletedEvent", event_name: str, data: Mapping[str, Any]) -> None:
@@ -132,6 +290,8 @@ class OperationCompletedEvent(BBEventBase):
         self.msg = data.get("msg", "")
 
 class CacheLoadCompletedEvent(OperationCompletedEvent):
+    __slots__ = ("num_entries",)
+
     EVENT_NAME: str = "bb.event.CacheLoadCompleted"
 
     def __init__(self: "CacheLoadCompletedEvent", data: Mapping[str, Any]) -> None:
@@ -139,12 +299,16 @@ class CacheLoadCompletedEvent(OperationCompletedEvent):
         self.num_entries: int = data["num_entries"]
 
 class CacheLoadProgressEvent(OperationProgress):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.event.CacheLoadProgress"
 
     def __init__(self: "CacheLoadProgressEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class CacheLoadStartedEvent(OperationStarted):
+    __slots__ = ("msg", "total")
+
     EVENT_NAME: str = "bb.event.CacheLoadStarted"
 
     def __init__(self: "CacheLoadStartedEvent", data: Mapping[str, Any]) -> None:
@@ -152,6 +316,8 @@ class CacheLoadStartedEvent(OperationStarted):
         self.total: int = data["total"]
 
 class ConfigFilePathFoundEvent(BBEventBase):
+    __slots__ = ("path",)
+
     EVENT_NAME: str = "bb.event.ConfigFilePathFound"
 
     def __init__(self: "ConfigFilePathFoundEvent", data: Mapping[str, Any]) -> None:
@@ -159,6 +325,8 @@ class ConfigFilePathFoundEvent(BBEventBase):
         self.path: str = data["_path"]
 
 class ConfigFilesFoundEvent(BBEventBase):
+    __slots__ = ("variable", "values")
+
     EVENT_NAME: str = "bb.event.ConfigFilesFound"
 
     def __init__(self: "ConfigFilesFoundEvent", data: Mapping[str, Any]) -> None:
@@ -167,12 +335,16 @@ class ConfigFilesFoundEvent(BBEventBase):
         self.values: List[str] = data["_values"]
 
 class ConfigParsedEvent(BBEventBase):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.event.ConfigParsed"
 
     def __init__(self: "ConfigParsedEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class DepTreeGeneratedEvent(BBEventBase):
+    __slots__ = ("depgraph",)
+
     EVENT_NAME: str = "bb.event.DepTreeGenerated"
 
     def __init__(self: "DepTreeGeneratedEvent", data: Mapping[str, Any]) -> None:
@@ -181,6 +353,8 @@ class DepTreeGeneratedEvent(BBEventBase):
         self.depgraph : Mapping[str, Any] = data["_depgraph"]
 
 class FilesMatchingFoundEvent(BBEventBase):
+    __slots__ = ("pattern", "matches")
+
     EVENT_NAME: str = "bb.event.FilesMatchingFound"
 
     def __init__(self: "FilesMatchingFoundEvent", data: Mapping[str, Any]) -> None:
@@ -188,7 +362,19 @@ class FilesMatchingFoundEvent(BBEventBase):
         self.pattern: str = data["_pattern"]
         self.matches: List[str] = data["_matches"]
 
+class FindSigInfoResultEvent(BBEventBase):
+    __slots__ = ("result",)
+
+    EVENT_NAME: str = "bb.event.FindSigInfoResult"
+
+    def __init__(self: "FindSigInfoResultEvent", data: Mapping[str, Any]) -> None:
+        super().__init__(self.EVENT_NAME, data)
+        # hash to siginfo file path, or to dict with "path" key in newer bitbake
+        self.result: Mapping[str, Any] = data["result"]
+
 class ProcessFinishedEvent(BBEventBase):
+    __slots__ = ("processname",)
+
     EVENT_NAME: str = "bb.event.ProcessFinished"
 
     def __init__(self: "ProcessFinishedEvent", data: Mapping[str, Any]) -> None:
@@ -196,6 +382,8 @@ class ProcessFinishedEvent(BBEventBase):
         self.processname: str = data["processname"]
 
 class ProcessProgressEvent(BBEventBase):
+    __slots__ = ("processname", "progress")
+
     EVENT_NAME: str = "bb.event.ProcessProgress"
 
     def __init__(self: "ProcessProgressEvent", data: Mapping[str, Any]) -> None:
@@ -204,6 +392,8 @@ class ProcessProgressEvent(BBEventBase):
         self.progress: float = data["progress"]
 
 class ProcessStartedEvent(BBEventBase):
+    __slots__ = ("processname", "total")
+
     EVENT_NAME: str = "bb.event.ProcessStarted"
 
     def __init__(self: "ProcessStartedEvent", data: Mapping[str, Any]) -> None:
@@ -212,6 +402,8 @@ class ProcessStartedEvent(BBEventBase):
         self.total: int = data["total"]
 
 class ReachableStampsEvent(BBEventBase):
+    __slots__ = ("stamps",)
+
     EVENT_NAME: str = "bb.event.ReachableStamps"
 
     def __init__(self: "ReachableStampsEvent", data: Mapping[str, Any]) -> None:
@@ -220,6 +412,8 @@ class ReachableStampsEvent(BBEventBase):
         self.stamps: Mapping[str, str] = data["stamps"]
 
 class RecipeEvent(BBEventBase):
+    __slots__ = ("fn",)
+
     EVENT_NAME: str = "bb.event.RecipeEvent"
 
     def __init__(self: "RecipeEvent", event_name: str, data: Mapping[str, Any]) -> None:
@@ -227,24 +421,32 @@ class RecipeEvent(BBEventBase):
         self.fn: str = data["fn"]
 
 class RecipeParsedEvent(RecipeEvent):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.event.RecipeParsed"
 
     def __init__(self: "RecipeParsedEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class RecipePostKeyExpansionEvent(RecipeEvent):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.event.RecipePostKeyExpansion"
 
     def __init__(self: "RecipePostKeyExpansionEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class RecipePreFinaliseEvent(RecipeEvent):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.event.RecipePreFinalise"
 
     def __init__(self: "RecipePreFinaliseEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class RecipeTaskPreProcessEvent(RecipeEvent):
+    __slots__ = ("tasklist",)
+
     EVENT_NAME: str = "bb.event.RecipeTaskPreProcess"
 
     def __init__(self: "RecipeTaskPreProcessEvent", data: Mapping[str, Any]) -> None:
@@ -252,6 +454,8 @@ class RecipeTaskPreProcessEvent(RecipeEvent):
         self.tasklist: List[str] = data["tasklist"]
 
 class TargetsTreeGeneratedEvent(BBEventBase):
+    __slots__ = ("model",)
+
     EVENT_NAME: str = "bb.event.TargetsTreeGenerated"
 
     def __init__(self: "TargetsTreeGeneratedEvent", data: Mapping[str, Any]) -> None:
@@ -259,24 +463,32 @@ class TargetsTreeGeneratedEvent(BBEventBase):
         self.model: Mapping[str, Any] = data["_model"]
 
 class TreeDataPreparationCompletedEvent(OperationCompletedEvent):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.event.TreeDataPreparationCompleted"
 
     def __init__(self: "TreeDataPreparationCompletedEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class TreeDataPreparationProgressEvent(OperationProgress):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.event.TreeDataPreparationProgress"
 
     def __init__(self: "TreeDataPreparationProgressEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class TreeDataPreparationStartedEvent(OperationStarted):
+    __slots__ = ("msg",)
+
     EVENT_NAME: str = "bb.event.TreeDataPreparationStarted"
 
     def __init__(self: "TreeDataPreparationStartedEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class runQueueEvent(BBEventBase):
+    __slots__ = ("taskid", "taskstring", "taskname", "taskfile", "taskhash", "stats")
+
     EVENT_NAME: str = "bb.runqueue.runQueueEvent"
 
     def __init__(self: "runQueueEvent", event_name: str, data: Mapping[str, Any]) -> None:
@@ -286,9 +498,11 @@ class runQueueEvent(BBEventBase):
         self.taskname = data["taskname"]
         self.taskfile = data["taskfile"]
         self.taskhash = data["taskhash"]
-        self.stats = data["stats"].__dict__
+        self.stats: Mapping[str, Any] = data["stats"].__dict__
 
 class runQueueTaskFailedEvent(runQueueEvent):
+    __slots__ = ("exitcode",)
+
     EVENT_NAME: str = "bb.runqueue.runQueueTaskFailed"
 
     def __init__(self: "runQueueTaskFailedEvent", data: Mapping[str, Any]) -> None:
@@ -296,6 +510,8 @@ class runQueueTaskFailedEvent(runQueueEvent):
         self.exitcode = data["exitcode"]
 
 class runQueueTaskStartedEvent(runQueueEvent):
+    __slots__ = ("noexec",)
+
     EVENT_NAME: str = "bb.runqueue.runQueueTaskStarted"
 
     def __init__(self: "runQueueTaskStartedEvent", data: Mapping[str, Any]) -> None:
@@ -303,6 +519,8 @@ class runQueueTaskStartedEvent(runQueueEvent):
         self.noexec: bool = data["noexec"]
 
 class runQueueTaskSkippedEvent(runQueueEvent):
+    __slots__ = ("reason",)
+
     EVENT_NAME: str = "bb.runqueue.runQueueTaskSkipped"
 
     def __init__(self: "runQueueTaskSkippedEvent", data: Mapping[str, Any]) -> None:
@@ -310,6 +528,8 @@ class runQueueTaskSkippedEvent(runQueueEvent):
         self.reason: str = data["reason"]
 
 class sceneQueueEvent(runQueueEvent):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.runqueue.sceneQueueEvent"
 
     def __init__(self: "sceneQueueEvent", event_name: str, data: Mapping[str, Any]) -> None:
@@ -320,6 +540,8 @@ class sceneQueueEvent(runQueueEvent):
         self.taskhash = data["taskhash"]
 
 class sceneQueueCompleteEvent(sceneQueueEvent):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.runqueue.sceneQueueComplete"
 
     def __init__(self: "sceneQueueCompleteEvent", data: Mapping[str, Any]) -> None:
@@ -328,13 +550,44 @@ class sceneQueueCompleteEvent(sceneQueueEvent):
         BBEventBase.__init__(self, self.EVENT_NAME, data)
         self.stats: Any = data["stats"]
 
+class sceneQueueTaskStartedEvent(sceneQueueEvent):
+    __slots__ = ("noexec",)
+
+    EVENT_NAME: str = "bb.runqueue.sceneQueueTaskStarted"
+
+    def __init__(self: "sceneQueueTaskStartedEvent", data: Mapping[str, Any]) -> None:
+        super().__init__(self.EVENT_NAME, data)
+        self.noexec: bool = data.get("noexec", False)
+
+class sceneQueueTaskCompletedEvent(sceneQueueEvent):
+    __slots__ = ()
+
+    EVENT_NAME: str = "bb.runqueue.sceneQueueTaskCompleted"
+
+    def __init__(self: "sceneQueueTaskCompletedEvent", data: Mapping[str, Any]) -> None:
+        super().__init__(self.EVENT_NAME, data)
+
+class sceneQueueTaskFailedEvent(sceneQueueEvent):
+    __slots__ = ("exitcode",)
+
+    EVENT_NAME: str = "bb.runqueue.sceneQueueTaskFailed"
+
+    def __init__(self: "sceneQueueTaskFailedEvent", data: Mapping[str, Any]) -> None:
+        super().__init__(self.EVENT_NAME, data)
+        self.exitcode = data["exitcode"]
+
 class runQueueTaskCompletedEvent(runQueueEvent):
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.runqueue.runQueueTaskCompleted"
 
     def __init__(self: "runQueueTaskCompletedEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class BuildBaseEvent(BBEventBase):
+    # fields are in the subclasses, so that BuildStartedEvent can inherit both BuildBaseEvent and OperationStarted
+    __slots__ = ()
+
     EVENT_NAME: str = "bb.event.BuildBase"
 
     def __init__(self: "BuildBaseEvent", event_name: str, data: Mapping[str, Any]) -> None:
@@ -344,12 +597,16 @@ class BuildBaseEvent(BBEventBase):
         self.failures = data["_failures"]
 
 class BuildInitEvent(BuildBaseEvent):
+    __slots__ = ("name", "pkgs", "failures")
+
     EVENT_NAME: str = "bb.event.BuildInit"
 
     def __init__(self: "BuildInitEvent", data: Mapping[str, Any]) -> None:
         super().__init__(self.EVENT_NAME, data)
 
 class BuildStartedEvent(BuildBaseEvent, OperationStarted):
+    __slots__ = ("name", "pkgs", "failures", "msg")
+
     EVENT_NAME: str = "bb.event.BuildStarted"
 
     def __init__(self: "BuildStartedEvent", data: Mapping[str, Any]) -> None:
@@ -357,6 +614,8 @@ class BuildStartedEvent(BuildBaseEvent, OperationStarted):
         OperationStarted.__init__(self, self.EVENT_NAME, data)
 
 class HeartbeatEvent(BBEventBase):
+    __slots__ = ("time",)
+
     EVENT_NAME: str = "bb.event.HeartbeatEvent"
 
     def __init__(self: "HeartbeatEvent", data: Mapping[str, Any]) -> None:
@@ -364,6 +623,8 @@ class HeartbeatEvent(BBEventBase):
         self.time: float = data["time"]
 
 class NoProviderEvent(BBEventBase):
+    __slots__ = ("item", "runtime", "dependees", "reasons", "close_matches")
+
     EVENT_NAME: str = "bb.event.NoProvider"
 
     def __init__(self: "NoProviderEvent", data: Mapping[str, Any]) -> None:
@@ -376,6 +637,8 @@ class NoProviderEvent(BBEventBase):
         
 
 class MonitorDiskEventEvent(BBEventBase):
+    __slots__ = ("disk_usage",)
+
     EVENT_NAME: str = "bb.event.MonitorDiskEvent"
 
     def __init__(self: "MonitorDiskEventEvent", data: Mapping[str, Any]) -> None:
@@ -383,6 +646,8 @@ class MonitorDiskEventEvent(BBEventBase):
         self.disk_usage: Mapping[str, Any] = data["disk_usage"]
 
 class LogRecord(BBEventBase):
+    __slots__ = ("log",)
+
     EVENT_NAME: str = "logging.LogRecord"
 
     def __init__(self: "LogRecord", data: Mapping[str, Any]) -> None:
@@ -390,9 +655,12 @@ class LogRecord(BBEventBase):
         self.log: Mapping[str, Any] = data
 
 class UnknownEvent(BBEventBase):
+    __slots__ = ("event_name", "data")
 
     def __init__(self: "UnknownEvent", event_name: str, data: Mapping[str, Any]) -> None:
         super().__init__(event_name, data)
+        # unknown events don't have EVENT_NAME
+        self.event_name: str = event_name # type: ignore
         self.data: Mapping[str, Any] = data
 
 ALL_BB_EVENTS: List[Type[BBEventBase]] = [
@@ -411,6 +679,7 @@ ALL_BB_EVENTS: List[Type[BBEventBase]] = [
     ConfigParsedEvent,
     DepTreeGeneratedEvent,
     FilesMatchingFoundEvent,
+    FindSigInfoResultEvent,
     ProcessFinishedEvent,
     ProcessProgressEvent,
     ProcessStartedEvent,
@@ -427,6 +696,9 @@ ALL_BB_EVENTS: List[Type[BBEventBase]] = [
     runQueueTaskStartedEvent,
     runQueueTaskSkippedEvent,
     sceneQueueCompleteEvent,
+    sceneQueueTaskStartedEvent,
+    sceneQueueTaskCompletedEvent,
+    sceneQueueTaskFailedEvent,
     runQueueTaskCompletedEvent,
     BuildInitEvent,
     BuildStartedEvent,
@@ -434,4 +706,59 @@ ALL_BB_EVENTS: List[Type[BBEventBase]] = [
     NoProviderEvent,
     MonitorDiskEventEvent,
     LogRecord,
-]
\ No newline at end of file
+]
+
+PROGRESS_EVENTS: List[Type[BBEventBase]] = [
+    TaskProgressEvent,
+    ProcessProgressEvent,
+    CacheLoadProgressEvent,
+    TreeDataPreparationProgressEvent,
+]
+
+EVENT_REGISTRY: Dict[str, Type[BBEventBase]] = {}
+
+__raw_event_types: Dict[type, Tuple[str, Optional[Type[BBEventBase]]]] = {}
+
+def register_event(event_class: Type[BBEventBase]) -> Type[BBEventBase]:
+    """Register event class for the event from bitbake server
+
+    Args:
+        event_class (Type[BBEventBase]): event class. Its EVENT_NAME is used as the key. If the key is already registered, it is overwritten.
+
+    Returns:
+        Type[BBEventBase]: event_class as is
+
+    Note:
+        | This can be used as class decorator for plugin event classes like below.
+        | @register_event
+        | class MyEvent(BBEventBase):
+        |     EVENT_NAME: str = "my.module.MyEvent"
+    """
+    EVENT_REGISTRY[event_class.EVENT_NAME] = event_class
+    if event_class not in ALL_BB_EVENTS:
+        ALL_BB_EVENTS.append(event_class)
+    __raw_event_types.clear()
+    return event_class
+
+def get_event_class(raw_event_type: type) -> Tuple[str, Optional[Type[BBEventBase]]]:
+    """Get event class for the type of the event from bitbake server
+
+    Args:
+        raw_event_type (type): type of the event object bitbake server sent
+
+    Returns:
+        Tuple[str, Optional[Type[BBEventBase]]]: event name like "bb.build.TaskProgress" and its event class. The class is None if it is not registered.
+
+    Note:
+        | The result is cached for each type, so this costs only one dict lookup after the first event of the type.
+    """
+    found: Optional[Tuple[str, Optional[Type[BBEventBase]]]] = __raw_event_types.get(raw_event_type)
+    if found is None:
+        # f"<class '{event_name}'>" -> event_name
+        event_name: str = str(raw_event_type)[8:-2]
+        found = (event_name, EVENT_REGISTRY.get(event_name))
+        __raw_event_types[raw_event_type] = found
+    return found
+
+for __event_class in ALL_BB_EVENTS:
+    EVENT_REGISTRY.setdefault(__event_class.EVENT_NAME, __event_class)
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+This file provides append-only journal of events from bitbake server and its reader
+"""
+
+import os
+import gzip
+import json
+import time
+import uuid
+import threading
+
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Mapping, Optional, Set, Type, Union
+
+from .bbclient import CallBack
+from .bbevent import *
+
+JOURNAL_INDEX_FILE: str = "index.json"
+JOURNAL_SEGMENT_PREFIX: str = "events-"
+
+class JournalSegment:
+    """Index entry of a journal file
+
+    Attributes:
+        file_name (str): file name in the journal directory like "events-000001.jsonl.gz"
+        first_time (float): time the first event was received. (seconds since the epoch)
+        last_time (float): time the last event was received. (seconds since the epoch)
+        first_sequence (int): sequence number of the first event
+        last_sequence (int): sequence number of the last event
+        event_counts (Dict[str, int]): event name like "bb.build.TaskStarted" and number of the events
+    """
+
+    def __init__(
+        self: "JournalSegment",
+        file_name: str,
+        first_time: float = 0.0,
+        last_time: float = 0.0,
+        first_sequence: int = 0,
+        last_sequence: int = 0,
+        event_counts: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.file_name: str = file_name
+        self.first_time: float = first_time
+        self.last_time: float = last_time
+        self.first_sequence: int = first_sequence
+        self.last_sequence: int = last_sequence
+        self.event_counts: Dict[str, int] = event_counts if event_counts is not None else {}
+
+    def __str__(self: "JournalSegment") -> str:
+        return self.__class__.__name__ + ": " + str(vars(self))
+
+class JournalRecord:
+    """An event in the journal
+
+    Attributes:
+        sequence (int): sequence number in the journal
+        time (float): time the event was received. (seconds since the epoch)
+        event_name (str): event name like "bb.build.TaskStarted"
+        data (Mapping[str, Any]): attributes of the event bitbake server sent. Objects in them are restored as SimpleNamespace.
+    """
+
+    __slots__ = ("sequence", "time", "event_name", "data")
+
+    def __init__(self: "JournalRecord", sequence: int, time: float, event_name: str, data: Mapping[str, Any]) -> None:
+        self.sequence: int = sequence
+        self.time: float = time
+        self.event_name: str = event_name
+        self.data: Mapping[str, Any] = data
+
+    def decode(self: "JournalRecord") -> BBEventBase:
+        """Decode to the event class
+
+        Args:
+            self (JournalRecord): none
+
+        Returns:
+            BBEventBase: event object. UnknownEvent if the event class is not registered.
+        """
+        event_class: Optional[Type[BBEventBase]] = EVENT_REGISTRY.get(self.event_name)
+        if event_class:
+            return event_class.decode(None, self.data)
+        return UnknownEvent.decode(None, self.event_name, self.data)
+
+class EventJournal:
+    """Append-only journal of events from bitbake server
+
+    Attributes:
+        directory (str): directory for journal files
+        __max_bytes (int): size to rotate journal file
+        __compress (bool): whether rotated journal files are compressed
+        __max_segments (Optional[int]): max number of journal files to keep
+        __flush_interval (float): max time events stay in the buffer. (seconds)
+        __segments (List[JournalSegment]): index of journal files. The last one is being written.
+        __file (Optional[IO[str]]): journal file being written
+        __size (int): size of the journal file being written
+        __segment_number (int): number of the last journal file
+        __sequence (int): sequence number of the last event
+        __last_flush_time (float): time of the last flush
+        __compress_threads (List[threading.Thread]): threads compressing rotated journal files
+        __lock (threading.Lock): lock for all the members
+        __is_closed (bool): closed or not
+
+    Note:
+        | Each event is one JSON line like {"seq": 1, "time": 1700000000.0, "type": "bb.build.TaskStarted", "data": {...}}.
+        | The file being written is plain JSONL, so events until the last flush survive crash. Rotated files are compressed by gzip in background.
+        | index.json has the time range, sequence range and number of events of each type for each file, so the reader skips files it doesn't need.
+    """
+
+    def __init__(
+        self: "EventJournal",
+        directory: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        compress: bool = True,
+        max_segments: Optional[int] = None,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """Initialize
+
+        Args:
+            self (EventJournal): none
+            directory (str): directory for journal files. If it already has a journal, events are appended to it.
+            max_bytes (int): size to rotate journal file. Defaults to 64MiB.
+            compress (bool): if True, rotated journal files are compressed by gzip. Defaults to True.
+            max_segments (Optional[int]): max number of journal files to keep. The oldest ones are deleted. None means unlimited.
+            flush_interval (float): max time events stay in the buffer. (seconds) Defaults to 1.0.
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes must be positive, but {max_bytes} is given.")
+        if max_segments is not None and max_segments <= 0:
+            raise ValueError(f"max_segments must be positive, but {max_segments} is given.")
+        self.directory: str = directory
+        self.__max_bytes: int = max_bytes
+        self.__compress: bool = compress
+        self.__max_segments: Optional[int] = max_segments
+        self.__flush_interval: float = flush_interval
+        os.makedirs(directory, exist_ok=True)
+        self.__segments: List[JournalSegment] = _load_index(directory)
+        self.__file: Optional[IO[str]] = None
+        self.__size: int = 0
+        self.__segment_number: int = _get_segment_number(self.__segments[-1].file_name) if self.__segments else 0
+        self.__sequence: int = self.__segments[-1].last_sequence if self.__segments else 0
+        self.__last_flush_time: float = time.monotonic()
+        self.__compress_threads: List[threading.Thread] = []
+        self.__lock: threading.Lock = threading.Lock()
+        self.__is_closed: bool = False
+
+    def __enter__(self: "EventJournal") -> "EventJournal":
+        return self
+
+    def __exit__(self: "EventJournal", *_: Any) -> None:
+        self.close()
+
+    def write(self: "EventJournal", event_name: str, data: Mapping[str, Any], timestamp: Optional[float] = None) -> None:
+        """Append an event
+
+        Args:
+            self (EventJournal): none
+            event_name (str): event name like "bb.build.TaskStarted"
+            data (Mapping[str, Any]): attributes of the event bitbake server sent
+            timestamp (Optional[float]): time the event was received. Defaults to now. (seconds since the epoch)
+
+        Note:
+            | Events written after close are ignored.
+        """
+        received_time: float = time.time() if timestamp is None else timestamp
+        with self.__lock:
+            if self.__is_closed:
+                return
+            self.__sequence += 1
+            line: str = _encode_record(self.__sequence, received_time, event_name, data)
+            if not self.__file:
+                self.__open_segment(received_time)
+            self.__file.write(line) # type: ignore
+            self.__size += len(line)
+            segment: JournalSegment = self.__segments[-1]
+            segment.last_time = received_time
+            segment.last_sequence = self.__sequence
+            segment.event_counts[event_name] = segment.event_counts.get(event_name, 0) + 1
+            if self.__size >= self.__max_bytes:
+                self.__rotate()
+            elif time.monotonic() - self.__last_flush_time >= self.__flush_interval:
+                self.__flush()
+
+    def flush(self: "EventJournal") -> None:
+        """Write buffered events and the index to the files
+
+        Args:
+            self (EventJournal): none
+        """
+        with self.__lock:
+            if not self.__is_closed:
+                self.__flush()
+
+    def close(self: "EventJournal") -> None:
+        """Close the journal and wait for compression of rotated files
+
+        Args:
+            self (EventJournal): none
+        """
+        with self.__lock:
+            if self.__is_closed:
+                return
+            self.__is_closed = True
+            if self.__file:
+                self.__file.close()
+                self.__file = None
+            _store_index(self.directory, self.__segments)
+            compress_threads: List[threading.Thread] = list(self.__compress_threads)
+        for compress_thread in compress_threads:
+            compress_thread.join()
+
+    def get_segments(self: "EventJournal") -> List[JournalSegment]:
+        """Get index of journal files
+
+        Args:
+            self (EventJournal): none
+
+        Returns:
+            List[JournalSegment]: copy of index entries from the oldest file
+        """
+        with self.__lock:
+            return [JournalSegment(**dict(vars(segment), event_counts=dict(segment.event_counts))) for segment in self.__segments]
+
+    def __open_segment(self: "EventJournal", received_time: float) -> None:
+        self.__segment_number += 1
+        file_name: str = f"{JOURNAL_SEGMENT_PREFIX}{self.__segment_number:06d}.jsonl"
+        self.__file = open(os.path.join(self.directory, file_name), "w", encoding="utf-8")
+        self.__size = 0
+        self.__segments.append(JournalSegment(file_name, received_time, received_time, self.__sequence, self.__sequence))
+
+    def __flush(self: "EventJournal") -> None:
+        if self.__file:
+            self.__file.flush()
+        _store_index(self.directory, self.__segments)
+        self.__last_flush_time = time.monotonic()
+
+    def __rotate(self: "EventJournal") -> None:
+        self.__file.close() # type: ignore
+        self.__file = None
+        segment: JournalSegment = self.__segments[-1]
+        if self.__max_segments is not None:
+            # leave room for the next file
+            removed: int = max(len(self.__segments) - self.__max_segments + 1, 0)
+            for old_segment in self.__segments[:removed]:
+                _remove_file(os.path.join(self.directory, old_segment.file_name))
+            self.__segments = self.__segments[removed:]
+        if self.__compress and segment in self.__segments:
+            compress_thread: threading.Thread = threading.Thread(target=self.__compress_segment, args=(segment,), name="bbclient-journal", daemon=True)
+            self.__compress_threads = [thread for thread in self.__compress_threads if thread.is_alive()] + [compress_thread]
+            compress_thread.start()
+        self.__flush()
+
+    def __compress_segment(self: "EventJournal", segment: JournalSegment) -> None:
+        plain_path: str = os.path.join(self.directory, segment.file_name)
+        try:
+            with open(plain_path, "rb") as plain_file, gzip.open(plain_path + ".gz.tmp", "wb", compresslevel=6) as compressed_file:
+                while True:
+                    chunk: bytes = plain_file.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    compressed_file.write(chunk)
+        except OSError:
+            # deleted by max_segments while compressing. Otherwise, the file is kept uncompressed.
+            _remove_file(plain_path + ".gz.tmp")
+            return
+        with self.__lock:
+            if segment not in self.__segments:
+                # deleted by max_segments while compressing
+                _remove_file(plain_path + ".gz.tmp")
+                return
+            os.replace(plain_path + ".gz.tmp", plain_path + ".gz")
+            segment.file_name += ".gz"
+            _store_index(self.directory, self.__segments)
+            _remove_file(plain_path)
+
+class JournalReader:
+    """Reader of the journal which replays events through the callback API
+
+    Attributes:
+        directory (str): directory for journal files
+        __callbacks (Dict[uuid.UUID, CallBack]): registered callbacks
+
+    Note:
+        | Callback functions receive this reader instead of BBClient, so callbacks which only use the event work both online and offline.
+    """
+
+    def __init__(self: "JournalReader", directory: str) -> None:
+        """Initialize
+
+        Args:
+            self (JournalReader): none
+            directory (str): directory for journal files
+        """
+        self.directory: str = directory
+        self.__callbacks: Dict[uuid.UUID, CallBack] = {}
+
+    def get_segments(self: "JournalReader") -> List[JournalSegment]:
+        """Get index of journal files
+
+        Args:
+            self (JournalReader): none
+
+        Returns:
+            List[JournalSegment]: index entries from the oldest file
+        """
+        return _load_index(self.directory)
+
+    def read(
+        self: "JournalReader",
+        event_types: Optional[Iterable[Union[str, Type[BBEventBase]]]] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Iterator[JournalRecord]:
+        """Read events in the order they were received
+
+        Args:
+            self (JournalReader): none
+            event_types (Optional[Iterable[Union[str, Type[BBEventBase]]]]): event names or event classes to read. None means all.
+            start (Optional[float]): read events received at or after this time. (seconds since the epoch)
+            end (Optional[float]): read events received at or before this time. (seconds since the epoch)
+
+        Yields:
+            JournalRecord: event in the journal
+
+        Note:
+            | Files which have no event in the time range or of the event types are skipped by the index.
+            | A broken line at the end of a file, which is left by crash, is ignored.
+        """
+        event_names: Optional[Set[str]] = None
+        if event_types is not None:
+            event_names = {event_type if isinstance(event_type, str) else event_type.EVENT_NAME for event_type in event_types}
+        for segment in self.get_segments():
+            if start is not None and segment.last_time < start:
+                continue
+            if end is not None and segment.first_time > end:
+                continue
+            if event_names is not None and not event_names.intersection(segment.event_counts):
+                continue
+            for record in _read_segment(os.path.join(self.directory, segment.file_name)):
+                if start is not None and record.time < start:
+                    continue
+                if end is not None and record.time > end:
+                    break
+                if event_names is None or record.event_name in event_names:
+                    yield record
+
+    def register_callback(
+        self: "JournalReader",
+        target: Type[BBEventBase],
+        callback: Callable[[Any, BBEventBase], None],
+        include_subclasses: bool = False,
+    ) -> uuid.UUID:
+        """Register callback functions for events
+
+        Args:
+            self (JournalReader): none
+            target (Type[BBEventBase]): trigger event type for callback function
+            callback (Callable[[Any, BBEventBase], None]): callback function. It receives this reader and the event.
+            include_subclasses (bool): if True, subclasses of target also trigger callback function. Defaults to False.
+
+        Returns:
+            uuid.UUID: Callback id. The user can use this to unregister.
+        """
+        unique_id: uuid.UUID = uuid.uuid4()
+        self.__callbacks[unique_id] = CallBack(target, callback, include_subclasses)
+        return unique_id
+
+    def unregister_callback(self: "JournalReader", unique_id: uuid.UUID) -> None:
+        """Unregister callback functions for events
+
+        Args:
+            self (JournalReader): none
+            unique_id (uuid.UUID): Callback id. The user can get this when registering.
+        """
+        self.__callbacks.pop(unique_id)
+
+    def replay(self: "JournalReader", start: Optional[float] = None, end: Optional[float] = None) -> int:
+        """Pass events in the journal to registered callbacks
+
+        Args:
+            self (JournalReader): none
+            start (Optional[float]): replay events received at or after this time. (seconds since the epoch)
+            end (Optional[float]): replay events received at or before this time. (seconds since the epoch)
+
+        Returns:
+            int: number of events passed to callbacks
+
+        Note:
+            | Events nobody subscribes to are not decoded.
+        """
+        callbacks: List[CallBack] = list(self.__callbacks.values())
+        found_callbacks: Dict[str, List[CallBack]] = {}
+        replayed: int = 0
+        for record in self.read(None, start, end):
+            targets: Optional[List[CallBack]] = found_callbacks.get(record.event_name)
+            if targets is None:
+                event_type: Type[BBEventBase] = EVENT_REGISTRY.get(record.event_name, UnknownEvent)
+                targets = [cur_callback for cur_callback in callbacks if cur_callback.is_target(event_type)]
+                found_callbacks[record.event_name] = targets
+            if not targets:
+                continue
+            event: BBEventBase = record.decode()
+            for cur_callback in targets:
+                cur_callback.callback(self, event)
+            replayed += 1
+        return replayed
+
+def _encode_value(value: Any) -> Any:
+    # objects in events like RunQueueStats are kept with their attributes
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    if hasattr(value, "__dict__") and not isinstance(value, BaseException):
+        return {"__object__": str(type(value))[8:-2], "__dict__": vars(value)}
+    return repr(value)
+
+def _to_json_value(value: Any) -> Any:
+    # slow path for values json module can't encode, like dict with tuple keys
+    if isinstance(value, Mapping):
+        return {str(key): _to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_to_json_value(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    encoded: Any = _encode_value(value)
+    return _to_json_value(encoded) if not isinstance(encoded, str) else encoded
+
+_record_encoder: json.JSONEncoder = json.JSONEncoder(separators=(",", ":"), default=_encode_value)
+
+def _encode_record(sequence: int, received_time: float, event_name: str, data: Mapping[str, Any]) -> str:
+    record: Dict[str, Any] = {"seq": sequence, "time": received_time, "type": event_name, "data": data}
+    try:
+        return _record_encoder.encode(record) + "\n"
+    except (TypeError, ValueError, RecursionError):
+        pass
+    try:
+        record["data"] = _to_json_value(data)
+    except RecursionError:
+        record["data"] = {"__repr__": repr(data)}
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+def _decode_object(value: Dict[str, Any]) -> Any:
+    if "__object__" in value and "__dict__" in value:
+        return SimpleNamespace(**value["__dict__"])
+    return value
+
+def _read_segment(path: str) -> Iterator[JournalRecord]:
+    if not os.path.exists(path) and os.path.exists(path + ".gz"):
+        # compressed after the index was read
+        path += ".gz"
+    opener: Callable[..., IO[str]] = gzip.open if path.endswith(".gz") else open # type: ignore
+    try:
+        with opener(path, "rt", encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    record: Dict[str, Any] = json.loads(line, object_hook=_decode_object)
+                except ValueError:
+                    return
+                yield JournalRecord(record["seq"], record["time"], record["type"], record["data"])
+    except (OSError, EOFError):
+        return
+
+def _get_segment_number(file_name: str) -> int:
+    return int(file_name[len(JOURNAL_SEGMENT_PREFIX):].split(".", 1)[0])
+
+def _load_index(directory: str) -> List[JournalSegment]:
+    try:
+        with open(os.path.join(directory, JOURNAL_INDEX_FILE), encoding="utf-8") as index_file:
+            return [JournalSegment(**segment) for segment in json.load(index_file)]
+    except (OSError, ValueError):
+        return []
+
+def _store_index(directory: str, segments: List[JournalSegment]) -> None:
+    index_path: str = os.path.join(directory, JOURNAL_INDEX_FILE)
+    with open(index_path + ".tmp", "w", encoding="utf-8") as index_file:
+        json.dump([vars(segment) for segment in segments], index_file)
+    os.replace(index_path + ".tmp", index_path)
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
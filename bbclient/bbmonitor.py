@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+This file provides live model of build state made from runQueue and task events
+"""
+
+import time
+import uuid
+import threading
+import collections
+
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
+
+from .bbevent import *
+
+class TaskCounts:
+    """Number of tasks in each state
+
+    Attributes:
+        started (int): number of started tasks
+        completed (int): number of completed tasks
+        failed (int): number of failed tasks
+        skipped (int): number of skipped tasks
+        total (int): number of tasks bitbake server will run. 0 until the first event with stats arrives.
+    """
+
+    def __init__(
+        self: "TaskCounts",
+        started: int = 0,
+        completed: int = 0,
+        failed: int = 0,
+        skipped: int = 0,
+        total: int = 0,
+    ) -> None:
+        self.started: int = started
+        self.completed: int = completed
+        self.failed: int = failed
+        self.skipped: int = skipped
+        self.total: int = total
+
+    @property
+    def remaining(self: "TaskCounts") -> int:
+        """Number of tasks which are not finished yet"""
+        return max(self.total - self.completed - self.failed - self.skipped, 0)
+
+    def __str__(self: "TaskCounts") -> str:
+        return self.__class__.__name__ + ": " + str(dict(vars(self), remaining=self.remaining))
+
+class RunningTask:
+    """Task running on bitbake server
+
+    Attributes:
+        taskfile (str): recipe file path of the task
+        taskname (str): task name like "do_compile". Setscene tasks end with "_setscene".
+        is_setscene (bool): whether the task is setscene task or not
+        start_time (float): time the task started. (seconds in the clock of BuildMonitor)
+        pid (Optional[int]): pid of the worker running the task. None until TaskStartedEvent arrives.
+        logfile (Optional[str]): log file of the task. None until TaskStartedEvent arrives.
+    """
+
+    def __init__(
+        self: "RunningTask",
+        taskfile: str,
+        taskname: str,
+        is_setscene: bool,
+        start_time: float,
+        pid: Optional[int] = None,
+        logfile: Optional[str] = None,
+    ) -> None:
+        self.taskfile: str = taskfile
+        self.taskname: str = taskname
+        self.is_setscene: bool = is_setscene
+        self.start_time: float = start_time
+        self.pid: Optional[int] = pid
+        self.logfile: Optional[str] = logfile
+
+    def __str__(self: "RunningTask") -> str:
+        return self.__class__.__name__ + ": " + str(vars(self))
+
+class BuildSnapshot:
+    """State of the build at a moment
+
+    Attributes:
+        time (float): time of the snapshot. (seconds in the clock of BuildMonitor)
+        elapsed (float): time since the first task started. (seconds)
+        tasks (TaskCounts): real tasks
+        setscene_tasks (TaskCounts): setscene tasks
+        is_setscene_done (bool): whether setscene tasks are finished or not
+        running (List[RunningTask]): running tasks in the order they started
+        failed_tasks (List[Tuple[str, str]]): taskfile and taskname of failed real tasks
+        throughput (float): real tasks finished per second in the throughput window
+        eta (Optional[float]): estimated time until all the real tasks finish. None if it can't be estimated yet. (seconds)
+    """
+
+    def __init__(
+        self: "BuildSnapshot",
+        time: float,
+        elapsed: float,
+        tasks: TaskCounts,
+        setscene_tasks: TaskCounts,
+        is_setscene_done: bool,
+        running: List[RunningTask],
+        failed_tasks: List[Tuple[str, str]],
+        throughput: float,
+        eta: Optional[float],
+    ) -> None:
+        self.time: float = time
+        self.elapsed: float = elapsed
+        self.tasks: TaskCounts = tasks
+        self.setscene_tasks: TaskCounts = setscene_tasks
+        self.is_setscene_done: bool = is_setscene_done
+        self.running: List[RunningTask] = running
+        self.failed_tasks: List[Tuple[str, str]] = failed_tasks
+        self.throughput: float = throughput
+        self.eta: Optional[float] = eta
+
+    def __str__(self: "BuildSnapshot") -> str:
+        return (
+            f"{self.__class__.__name__}: elapsed={self.elapsed:.1f}s tasks={self.tasks.completed}/{self.tasks.total} "
+            f"failed={self.tasks.failed} setscene={self.setscene_tasks.completed}/{self.setscene_tasks.total} "
+            f"running={len(self.running)} throughput={self.throughput:.2f}/s eta={self.eta}"
+        )
+
+class BuildMonitor:
+    """Live model of build state
+
+    Attributes:
+        throughput_window (float): how long finished tasks are counted for throughput. (seconds)
+        __clock (Callable[[], float]): function to get current time
+        __lock (threading.Lock): lock for the build state
+        __tasks (TaskCounts): real tasks
+        __setscene_tasks (TaskCounts): setscene tasks
+        __is_setscene_done (bool): whether sceneQueueCompleteEvent arrived or not
+        __running (Dict[Tuple[str, str], RunningTask]): running tasks by taskfile and taskname
+        __failed_tasks (List[Tuple[str, str]]): taskfile and taskname of failed real tasks
+        __finish_times (Deque[float]): times real tasks finished in the throughput window
+        __start_time (Optional[float]): time the first task started
+        __handlers (Dict[type, Callable[[BBEventBase], None]]): handler for each event type
+        __subscriptions (List[Tuple[Any, uuid.UUID]]): client and callback id registered by attach
+
+    Note:
+        | Each event updates the state in O(1), so the callback can run inline in the event monitor thread.
+        | Counts are made from events, so attach the monitor before the build starts. total is taken from stats bitbake server sends.
+    """
+
+    def __init__(self: "BuildMonitor", throughput_window: float = 60.0, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize
+
+        Args:
+            self (BuildMonitor): none
+            throughput_window (float): how long finished tasks are counted for throughput and ETA. (seconds) Defaults to 60.
+            clock (Callable[[], float]): function to get current time. Defaults to time.monotonic.
+        """
+        if throughput_window <= 0:
+            raise ValueError(f"throughput_window must be positive, but {throughput_window} is given.")
+        self.throughput_window: float = throughput_window
+        self.__clock: Callable[[], float] = clock
+        self.__lock: threading.Lock = threading.Lock()
+        self.__handlers: Dict[type, Callable[[BBEventBase], None]] = {}
+        self.__subscriptions: List[Tuple[Any, uuid.UUID]] = []
+        self.reset()
+
+    def attach(self: "BuildMonitor", client: Any) -> None:
+        """Receive events from the client
+
+        Args:
+            self (BuildMonitor): none
+            client (Any): BBClient, or JournalReader to rebuild the state from the journal
+        """
+        for event_type in (runQueueEvent, TaskBase):
+            self.__subscriptions.append((client, client.register_callback(event_type, self.handle, True)))
+
+    def detach(self: "BuildMonitor") -> None:
+        """Stop receiving events
+
+        Args:
+            self (BuildMonitor): none
+        """
+        for client, unique_id in self.__subscriptions:
+            client.unregister_callback(unique_id)
+        self.__subscriptions = []
+
+    def reset(self: "BuildMonitor") -> None:
+        """Clear the build state, for example before the next build
+
+        Args:
+            self (BuildMonitor): none
+        """
+        with self.__lock:
+            self.__tasks: TaskCounts = TaskCounts()
+            self.__setscene_tasks: TaskCounts = TaskCounts()
+            self.__is_setscene_done: bool = False
+            self.__running: Dict[Tuple[str, str], RunningTask] = {}
+            self.__failed_tasks: List[Tuple[str, str]] = []
+            self.__finish_times: Deque[float] = collections.deque()
+            self.__start_time: Optional[float] = None
+
+    def handle(self: "BuildMonitor", _: Any, event: BBEventBase) -> None:
+        """Update the build state. This has the same signature as callback functions.
+
+        Args:
+            self (BuildMonitor): none
+            _ (Any): BBClient
+            event (BBEventBase): runQueue, sceneQueue or task event
+        """
+        handler: Optional[Callable[[BBEventBase], None]] = self.__handlers.get(type(event))
+        if handler is None:
+            handler = self.__find_handler(type(event))
+            self.__handlers[type(event)] = handler
+        with self.__lock:
+            handler(event)
+
+    def snapshot(self: "BuildMonitor") -> BuildSnapshot:
+        """Get the build state
+
+        Args:
+            self (BuildMonitor): none
+
+        Returns:
+            BuildSnapshot: copy of the build state. It's not changed by later events.
+        """
+        with self.__lock:
+            now: float = self.__clock()
+            self.__expire_finish_times(now)
+            throughput: float = 0.0
+            if self.__finish_times and self.__start_time is not None:
+                throughput = len(self.__finish_times) / max(min(self.throughput_window, now - self.__start_time), 1e-9)
+            tasks: TaskCounts = TaskCounts(**vars(self.__tasks))
+            eta: Optional[float] = tasks.remaining / throughput if throughput and tasks.total else None
+            return BuildSnapshot(
+                now,
+                now - self.__start_time if self.__start_time is not None else 0.0,
+                tasks,
+                TaskCounts(**vars(self.__setscene_tasks)),
+                self.__is_setscene_done,
+                [RunningTask(**vars(task)) for task in self.__running.values()],
+                list(self.__failed_tasks),
+                throughput,
+                eta,
+            )
+
+    def __find_handler(self: "BuildMonitor", event_type: type) -> Callable[[BBEventBase], None]:
+        # subclasses first because sceneQueue events are runQueue events
+        handlers: List[Tuple[Type[BBEventBase], Callable[[BBEventBase], None]]] = [
+            (sceneQueueCompleteEvent, self.__on_setscene_complete),
+            (sceneQueueTaskStartedEvent, self.__on_task_started),
+            (sceneQueueTaskCompletedEvent, self.__on_task_completed),
+            (sceneQueueTaskFailedEvent, self.__on_task_failed),
+            (runQueueTaskStartedEvent, self.__on_task_started),
+            (runQueueTaskCompletedEvent, self.__on_task_completed),
+            (runQueueTaskFailedEvent, self.__on_task_failed),
+            (runQueueTaskSkippedEvent, self.__on_task_skipped),
+            (TaskStartedEvent, self.__on_worker_started),
+        ]
+        for handled_type, handler in handlers:
+            if issubclass(event_type, handled_type):
+                return handler
+        return lambda event: None
+
+    def __get_counts(self: "BuildMonitor", event: BBEventBase) -> TaskCounts:
+        counts: TaskCounts = self.__setscene_tasks if isinstance(event, sceneQueueEvent) else self.__tasks
+        total: Optional[int] = (getattr(event, "stats", None) or {}).get("total")
+        if total:
+            counts.total = total
+        return counts
+
+    def __on_task_started(self: "BuildMonitor", event: BBEventBase) -> None:
+        now: float = self.__clock()
+        if self.__start_time is None:
+            self.__start_time = now
+        self.__get_counts(event).started += 1
+        key: Tuple[str, str] = (event.taskfile, event.taskname) # type: ignore
+        self.__running[key] = RunningTask(key[0], key[1], isinstance(event, sceneQueueEvent), now)
+
+    def __on_task_completed(self: "BuildMonitor", event: BBEventBase) -> None:
+        self.__get_counts(event).completed += 1
+        self.__finish_task(event)
+
+    def __on_task_failed(self: "BuildMonitor", event: BBEventBase) -> None:
+        self.__get_counts(event).failed += 1
+        if not isinstance(event, sceneQueueEvent):
+            # failed setscene task is not a build failure. The real task runs instead.
+            self.__failed_tasks.append((event.taskfile, event.taskname)) # type: ignore
+        self.__finish_task(event)
+
+    def __on_task_skipped(self: "BuildMonitor", event: BBEventBase) -> None:
+        self.__get_counts(event).skipped += 1
+
+    def __on_setscene_complete(self: "BuildMonitor", event: BBEventBase) -> None:
+        self.__get_counts(event)
+        self.__is_setscene_done = True
+
+    def __on_worker_started(self: "BuildMonitor", event: BBEventBase) -> None:
+        running: Optional[RunningTask] = self.__running.get((event.taskfile, event.taskname)) # type: ignore
+        if running:
+            running.pid = event.pid
+            running.logfile = event.logfile # type: ignore
+
+    def __finish_task(self: "BuildMonitor", event: BBEventBase) -> None:
+        self.__running.pop((event.taskfile, event.taskname), None) # type: ignore
+        if isinstance(event, sceneQueueEvent):
+            return
+        now: float = self.__clock()
+        self.__finish_times.append(now)
+        self.__expire_finish_times(now)
+
+    def __expire_finish_times(self: "BuildMonitor", now: float) -> None:
+        while self.__finish_times and self.__finish_times[0] < now - self.throughput_window:
+            self.__finish_times.popleft()
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+This file provides sstate reuse analytics made from runQueue and sceneQueue events, and sqlite store of the history
+"""
+
+import time
+import uuid
+import sqlite3
+import threading
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .bbevent import *
+
+# tasks with setscene variant in openembedded-core. SetsceneAnalyzer adds setscene task names seen in events.
+SETSCENE_TASKS: Set[str] = {
+    "do_populate_sysroot",
+    "do_populate_lic",
+    "do_package",
+    "do_packagedata",
+    "do_package_qa",
+    "do_package_write_rpm",
+    "do_package_write_ipk",
+    "do_package_write_deb",
+    "do_package_write_tar",
+    "do_deploy",
+    "do_deploy_source_date_epoch",
+    "do_create_spdx",
+    "do_create_runtime_spdx",
+    "do_populate_sdk_ext",
+}
+
+class SetsceneTaskResult:
+    """What happened to one task in one build
+
+    Attributes:
+        recipe_file (str): recipe file of the task, taskfile in runQueue events
+        task (str): task name without "_setscene"
+        taskhash (str): task hash
+        setscene (int): SETSCENE_NONE, SETSCENE_HIT or SETSCENE_FAILED
+        executed (bool): whether the real task ran or not
+        skip_reason (Optional[str]): reason of runQueueTaskSkippedEvent like "covered"
+        has_setscene (bool): whether the task has setscene variant or not
+    """
+
+    SETSCENE_NONE: int = 0
+    SETSCENE_HIT: int = 1
+    SETSCENE_FAILED: int = 2
+
+    def __init__(
+        self: "SetsceneTaskResult",
+        recipe_file: str,
+        task: str,
+        taskhash: str,
+        setscene: int = 0,
+        executed: bool = False,
+        skip_reason: Optional[str] = None,
+        has_setscene: bool = False,
+    ) -> None:
+        self.recipe_file: str = recipe_file
+        self.task: str = task
+        self.taskhash: str = taskhash
+        self.setscene: int = setscene
+        self.executed: bool = executed
+        self.skip_reason: Optional[str] = skip_reason
+        self.has_setscene: bool = has_setscene
+
+    def is_miss(self: "SetsceneTaskResult") -> bool:
+        """Whether the task had to run because sstate was not reused
+
+        Args:
+            self (SetsceneTaskResult): none
+
+        Returns:
+            bool: True if the setscene task failed, or the task has setscene variant and ran without trying it
+        """
+        return self.setscene == self.SETSCENE_FAILED or (self.executed and self.setscene == self.SETSCENE_NONE and self.has_setscene)
+
+    def __str__(self: "SetsceneTaskResult") -> str:
+        return self.__class__.__name__ + ": " + str(vars(self))
+
+class ReuseRate:
+    """Setscene hit and miss count of a recipe or a task name
+
+    Attributes:
+        name (str): recipe file or task name
+        hits (int): number of setscene tasks which succeeded
+        misses (int): number of tasks which ran because sstate was not reused
+        covered (int): number of real tasks skipped because setscene tasks covered them
+        executed (int): number of real tasks which ran
+    """
+
+    def __init__(self: "ReuseRate", name: str, hits: int, misses: int, covered: int, executed: int) -> None:
+        self.name: str = name
+        self.hits: int = hits
+        self.misses: int = misses
+        self.covered: int = covered
+        self.executed: int = executed
+
+    @property
+    def hit_rate(self: "ReuseRate") -> Optional[float]:
+        """hits / (hits + misses). None if no setscene task is involved."""
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else None
+
+    def __str__(self: "ReuseRate") -> str:
+        return self.__class__.__name__ + ": " + str(dict(vars(self), hit_rate=self.hit_rate))
+
+class BuildReuse(ReuseRate):
+    """Reuse summary of one build
+
+    Attributes:
+        build_id (int): id of the build in SetsceneStore
+        started (float): time the first event of the build arrived. (seconds since epoch)
+        finished (float): time the build was saved. (seconds since epoch)
+        reexecuted (int): number of real tasks which ran although the same hash was built or restored in a previous build
+    """
+
+    def __init__(
+        self: "BuildReuse",
+        build_id: int,
+        name: str,
+        started: float,
+        finished: float,
+        hits: int,
+        misses: int,
+        covered: int,
+        executed: int,
+        reexecuted: int,
+    ) -> None:
+        super().__init__(name, hits, misses, covered, executed)
+        self.build_id: int = build_id
+        self.started: float = started
+        self.finished: float = finished
+        self.reexecuted: int = reexecuted
+
+class ReexecutedTask:
+    """Real task which ran although the same hash was built or restored before
+
+    Attributes:
+        recipe_file (str): recipe file of the task
+        task (str): task name
+        taskhash (str): task hash
+        previous_build_id (int): latest previous build which had the same hash
+        setscene (int): what happened to the setscene task in this build, SETSCENE_NONE or SETSCENE_FAILED
+    """
+
+    def __init__(self: "ReexecutedTask", recipe_file: str, task: str, taskhash: str, previous_build_id: int, setscene: int) -> None:
+        self.recipe_file: str = recipe_file
+        self.task: str = task
+        self.taskhash: str = taskhash
+        self.previous_build_id: int = previous_build_id
+        self.setscene: int = setscene
+
+    def __str__(self: "ReexecutedTask") -> str:
+        return self.__class__.__name__ + ": " + str(vars(self))
+
+class SetsceneStore:
+    """sqlite store of setscene results of builds
+
+    Attributes:
+        path (str): database file path. ":memory:" keeps it in memory.
+        __connection (sqlite3.Connection): connection to the database
+        __lock (threading.Lock): lock for the connection
+
+    Note:
+        | Recipe files, task names, skip reasons and hashes are stored once and referred by id. Hex hashes are stored as 32 bytes blobs.
+        | Counts of each build, recipe and task name, and re-executed tasks are calculated when the build is added, so queries don't scan task results.
+    """
+
+    def __init__(self: "SetsceneStore", path: str = ":memory:") -> None:
+        """Open or create the store
+
+        Args:
+            self (SetsceneStore): none
+            path (str): database file path. Defaults to ":memory:".
+        """
+        self.path: str = path
+        self.__lock: threading.Lock = threading.Lock()
+        self.__connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        with self.__connection:
+            self.__connection.executescript("""
+                CREATE TABLE IF NOT EXISTS builds (
+                    id INTEGER PRIMARY KEY, name TEXT, started REAL, finished REAL,
+                    hits INTEGER, misses INTEGER, covered INTEGER, executed INTEGER, reexecuted INTEGER);
+                CREATE TABLE IF NOT EXISTS recipes (id INTEGER PRIMARY KEY, file TEXT UNIQUE);
+                CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY, recipe_id INTEGER, name TEXT, UNIQUE (recipe_id, name));
+                CREATE TABLE IF NOT EXISTS reasons (id INTEGER PRIMARY KEY, reason TEXT UNIQUE);
+                CREATE TABLE IF NOT EXISTS hashes (
+                    id INTEGER PRIMARY KEY, task_id INTEGER, taskhash BLOB, produced_build INTEGER, UNIQUE (task_id, taskhash));
+                CREATE TABLE IF NOT EXISTS results (
+                    build_id INTEGER, task_id INTEGER, hash_id INTEGER, setscene INTEGER, executed INTEGER, has_setscene INTEGER,
+                    reason_id INTEGER, previous_build INTEGER, PRIMARY KEY (build_id, task_id)) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS recipe_rates (
+                    build_id INTEGER, recipe_id INTEGER, hits INTEGER, misses INTEGER, covered INTEGER, executed INTEGER,
+                    PRIMARY KEY (build_id, recipe_id)) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS task_rates (
+                    build_id INTEGER, name TEXT, hits INTEGER, misses INTEGER, covered INTEGER, executed INTEGER,
+                    PRIMARY KEY (build_id, name)) WITHOUT ROWID;
+            """)
+
+    def close(self: "SetsceneStore") -> None:
+        """Close the database
+
+        Args:
+            self (SetsceneStore): none
+        """
+        with self.__lock:
+            self.__connection.close()
+
+    def __enter__(self: "SetsceneStore") -> "SetsceneStore":
+        return self
+
+    def __exit__(self: "SetsceneStore", *_: Any) -> None:
+        self.close()
+
+    def add_build(self: "SetsceneStore", name: str, started: float, results: List[SetsceneTaskResult]) -> int:
+        """Save the results of a build
+
+        Args:
+            self (SetsceneStore): none
+            name (str): name of the build like a pipeline id
+            started (float): time the build started. (seconds since epoch)
+            results (List[SetsceneTaskResult]): results of the tasks
+
+        Returns:
+            int: build id
+        """
+        with self.__lock, self.__connection:
+            cursor: sqlite3.Cursor = self.__connection.cursor()
+            cursor.execute("INSERT INTO builds (name, started, finished) VALUES (?, ?, ?)", (name, started, time.time()))
+            build_id: int = cursor.lastrowid
+            recipe_ids: Dict[str, int] = dict(cursor.execute("SELECT file, id FROM recipes"))
+            task_ids: Dict[Tuple[int, str], int] = {(recipe_id, task): task_id for task_id, recipe_id, task in cursor.execute("SELECT id, recipe_id, name FROM tasks")}
+            reason_ids: Dict[str, int] = dict(cursor.execute("SELECT reason, id FROM reasons"))
+            rows: List[Tuple[Any, ...]] = []
+            recipe_rates: Dict[int, ReuseRate] = {}
+            task_rates: Dict[str, ReuseRate] = {}
+            total: ReuseRate = ReuseRate(name, 0, 0, 0, 0)
+            reexecuted: int = 0
+            for result in results:
+                recipe_id: Optional[int] = recipe_ids.get(result.recipe_file)
+                if recipe_id is None:
+                    cursor.execute("INSERT INTO recipes (file) VALUES (?)", (result.recipe_file,))
+                    recipe_id = recipe_ids[result.recipe_file] = cursor.lastrowid
+                task_id: Optional[int] = task_ids.get((recipe_id, result.task))
+                if task_id is None:
+                    cursor.execute("INSERT INTO tasks (recipe_id, name) VALUES (?, ?)", (recipe_id, result.task))
+                    task_id = task_ids[(recipe_id, result.task)] = cursor.lastrowid
+                reason_id: Optional[int] = None
+                if result.skip_reason is not None:
+                    reason_id = reason_ids.get(result.skip_reason)
+                    if reason_id is None:
+                        cursor.execute("INSERT INTO reasons (reason) VALUES (?)", (result.skip_reason,))
+                        reason_id = reason_ids[result.skip_reason] = cursor.lastrowid
+                hash_id, previous_build = self.__update_hash(cursor, build_id, task_id, result)
+                if previous_build is not None:
+                    reexecuted += 1
+                rows.append((build_id, task_id, hash_id, result.setscene, int(result.executed), int(result.has_setscene), reason_id, previous_build))
+                for rate in (recipe_rates.setdefault(recipe_id, ReuseRate("", 0, 0, 0, 0)), task_rates.setdefault(result.task, ReuseRate(result.task, 0, 0, 0, 0)), total):
+                    rate.hits += result.setscene == SetsceneTaskResult.SETSCENE_HIT
+                    rate.misses += result.is_miss()
+                    rate.covered += result.skip_reason == "covered"
+                    rate.executed += result.executed
+            cursor.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            cursor.executemany(
+                "INSERT INTO recipe_rates VALUES (?, ?, ?, ?, ?, ?)",
+                [(build_id, recipe_id, rate.hits, rate.misses, rate.covered, rate.executed) for recipe_id, rate in recipe_rates.items()],
+            )
+            cursor.executemany(
+                "INSERT INTO task_rates VALUES (?, ?, ?, ?, ?, ?)",
+                [(build_id, rate.name, rate.hits, rate.misses, rate.covered, rate.executed) for rate in task_rates.values()],
+            )
+            cursor.execute(
+                "UPDATE builds SET hits = ?, misses = ?, covered = ?, executed = ?, reexecuted = ? WHERE id = ?",
+                (total.hits, total.misses, total.covered, total.executed, reexecuted, build_id),
+            )
+            return build_id
+
+    def get_builds(self: "SetsceneStore", last: Optional[int] = None) -> List[BuildReuse]:
+        """Get the reuse summary of builds to see the trend
+
+        Args:
+            self (SetsceneStore): none
+            last (Optional[int]): number of the latest builds. None gets all. Defaults to None.
+
+        Returns:
+            List[BuildReuse]: builds from old to new
+        """
+        with self.__lock:
+            rows: List[Tuple[Any, ...]] = self.__connection.execute(
+                "SELECT id, name, started, finished, hits, misses, covered, executed, reexecuted FROM builds ORDER BY id DESC LIMIT ?",
+                (last if last is not None else -1,),
+            ).fetchall()
+        return [BuildReuse(*row) for row in reversed(rows)]
+
+    def get_recipe_rates(self: "SetsceneStore", last: Optional[int] = None) -> List[ReuseRate]:
+        """Get hit and miss count of each recipe
+
+        Args:
+            self (SetsceneStore): none
+            last (Optional[int]): number of the latest builds to sum. None sums all. Defaults to None.
+
+        Returns:
+            List[ReuseRate]: recipes, the most misses first
+        """
+        return self.__get_rates("recipe_rates JOIN recipes ON recipes.id = recipe_rates.recipe_id", "recipes.file", last)
+
+    def get_task_rates(self: "SetsceneStore", last: Optional[int] = None) -> List[ReuseRate]:
+        """Get hit and miss count of each task name like do_populate_sysroot
+
+        Args:
+            self (SetsceneStore): none
+            last (Optional[int]): number of the latest builds to sum. None sums all. Defaults to None.
+
+        Returns:
+            List[ReuseRate]: task names, the most misses first
+        """
+        return self.__get_rates("task_rates", "task_rates.name", last)
+
+    def get_reexecuted(self: "SetsceneStore", build_id: Optional[int] = None) -> List[ReexecutedTask]:
+        """Get the real tasks which ran although the same hash was built or restored in a previous build
+
+        Args:
+            self (SetsceneStore): none
+            build_id (Optional[int]): build id. None gets the latest build. Defaults to None.
+
+        Returns:
+            List[ReexecutedTask]: the tasks
+        """
+        with self.__lock:
+            rows: List[Tuple[Any, ...]] = self.__connection.execute(
+                """
+                SELECT recipes.file, tasks.name, hashes.taskhash, results.previous_build, results.setscene
+                FROM results JOIN tasks ON tasks.id = results.task_id JOIN recipes ON recipes.id = tasks.recipe_id
+                    JOIN hashes ON hashes.id = results.hash_id
+                WHERE results.build_id = COALESCE(?, (SELECT MAX(id) FROM builds)) AND results.previous_build IS NOT NULL
+                """,
+                (build_id,),
+            ).fetchall()
+        return [ReexecutedTask(recipe_file, task, _unpack_hash(taskhash), previous, setscene) for recipe_file, task, taskhash, previous, setscene in rows]
+
+    def __get_rates(self: "SetsceneStore", table: str, group: str, last: Optional[int]) -> List[ReuseRate]:
+        with self.__lock:
+            rows: List[Tuple[Any, ...]] = self.__connection.execute(
+                f"""
+                SELECT {group}, SUM(hits), SUM(misses), SUM(covered), SUM(executed) FROM {table}
+                WHERE build_id IN (SELECT id FROM builds ORDER BY id DESC LIMIT ?)
+                GROUP BY {group}
+                """,
+                (last if last is not None else -1,),
+            ).fetchall()
+        rates: List[ReuseRate] = [ReuseRate(*row) for row in rows]
+        rates.sort(key=lambda rate: (-rate.misses, rate.name))
+        return rates
+
+    @staticmethod
+    def __update_hash(cursor: sqlite3.Cursor, build_id: int, task_id: int, result: SetsceneTaskResult) -> Tuple[int, Optional[int]]:
+        # produced_build is the latest build which ran the task or restored it from sstate with the hash
+        taskhash: Any = _pack_hash(result.taskhash)
+        row: Optional[Tuple[int, Optional[int]]] = cursor.execute(
+            "SELECT id, produced_build FROM hashes WHERE task_id = ? AND taskhash = ?", (task_id, taskhash)
+        ).fetchone()
+        produced: bool = result.executed or result.setscene == SetsceneTaskResult.SETSCENE_HIT
+        if row is None:
+            cursor.execute("INSERT INTO hashes (task_id, taskhash, produced_build) VALUES (?, ?, ?)", (task_id, taskhash, build_id if produced else None))
+            return cursor.lastrowid, None
+        hash_id, produced_build = row
+        if produced:
+            cursor.execute("UPDATE hashes SET produced_build = ? WHERE id = ?", (build_id, hash_id))
+        return hash_id, produced_build if result.executed else None
+
+class SetsceneAnalyzer:
+    """Collect setscene results of a build and save them to SetsceneStore
+
+    Attributes:
+        store (SetsceneStore): store of the history
+        __lock (threading.Lock): lock for the results
+        __results (Dict[Tuple[str, str], SetsceneTaskResult]): results of the current build by recipe file and task
+        __started (Optional[float]): time the first event of the current build arrived
+        __scene_stats (Any): RunQueueStats of sceneQueueCompleteEvent
+        __setscene_tasks (Set[str]): task names with setscene variant
+        __subscriptions (List[Tuple[Any, uuid.UUID]]): client and callback id registered by attach
+
+    Note:
+        | Attach before the build starts, and call finish when it's done. Results of the build are kept until finish.
+    """
+
+    def __init__(self: "SetsceneAnalyzer", store: Optional[SetsceneStore] = None) -> None:
+        """Initialize
+
+        Args:
+            self (SetsceneAnalyzer): none
+            store (Optional[SetsceneStore]): store of the history. Defaults to a new store in memory.
+        """
+        self.store: SetsceneStore = store if store is not None else SetsceneStore()
+        self.__lock: threading.Lock = threading.Lock()
+        self.__subscriptions: List[Tuple[Any, uuid.UUID]] = []
+        self.__setscene_tasks: Set[str] = set(SETSCENE_TASKS)
+        self.reset()
+
+    def attach(self: "SetsceneAnalyzer", client: Any) -> None:
+        """Receive events from the client
+
+        Args:
+            self (SetsceneAnalyzer): none
+            client (Any): BBClient, or JournalReader to analyze the journal
+        """
+        self.__subscriptions.append((client, client.register_callback(runQueueEvent, self.handle, True)))
+
+    def detach(self: "SetsceneAnalyzer") -> None:
+        """Stop receiving events
+
+        Args:
+            self (SetsceneAnalyzer): none
+        """
+        for client, unique_id in self.__subscriptions:
+            client.unregister_callback(unique_id)
+        self.__subscriptions = []
+
+    def reset(self: "SetsceneAnalyzer") -> None:
+        """Drop the results of the current build
+
+        Args:
+            self (SetsceneAnalyzer): none
+        """
+        with self.__lock:
+            self.__results: Dict[Tuple[str, str], SetsceneTaskResult] = {}
+            self.__started: Optional[float] = None
+            self.__scene_stats: Any = None
+
+    @property
+    def scene_stats(self: "SetsceneAnalyzer") -> Any:
+        """RunQueueStats of the setscene tasks in sceneQueueCompleteEvent. None until it arrives."""
+        return self.__scene_stats
+
+    def get_results(self: "SetsceneAnalyzer") -> List[SetsceneTaskResult]:
+        """Get the results of the current build
+
+        Args:
+            self (SetsceneAnalyzer): none
+
+        Returns:
+            List[SetsceneTaskResult]: results of the tasks
+        """
+        with self.__lock:
+            for result in self.__results.values():
+                result.has_setscene = result.task in self.__setscene_tasks
+            return list(self.__results.values())
+
+    def handle(self: "SetsceneAnalyzer", _: Any, event: BBEventBase) -> None:
+        """Record the runQueue or sceneQueue event. This has the same signature as callback functions.
+
+        Args:
+            self (SetsceneAnalyzer): none
+            _ (Any): BBClient
+            event (BBEventBase): runQueue or sceneQueue event
+        """
+        with self.__lock:
+            if self.__started is None:
+                self.__started = time.time()
+            if isinstance(event, sceneQueueCompleteEvent):
+                self.__scene_stats = event.stats
+                return
+            if not isinstance(event, (sceneQueueTaskCompletedEvent, sceneQueueTaskFailedEvent, runQueueTaskStartedEvent, runQueueTaskSkippedEvent)):
+                return
+            task: str = event.taskname
+            if isinstance(event, sceneQueueEvent) and task.endswith("_setscene"):
+                task = task[:-len("_setscene")]
+                self.__setscene_tasks.add(task)
+            key: Tuple[str, str] = (event.taskfile, task)
+            result: Optional[SetsceneTaskResult] = self.__results.get(key)
+            if result is None:
+                result = self.__results[key] = SetsceneTaskResult(event.taskfile, task, event.taskhash)
+            if isinstance(event, sceneQueueTaskCompletedEvent):
+                result.setscene = SetsceneTaskResult.SETSCENE_HIT
+            elif isinstance(event, sceneQueueTaskFailedEvent):
+                result.setscene = SetsceneTaskResult.SETSCENE_FAILED
+            elif isinstance(event, runQueueTaskSkippedEvent):
+                result.skip_reason = event.reason
+            elif not event.noexec:
+                result.executed = True
+
+    def finish(self: "SetsceneAnalyzer", name: str = "") -> int:
+        """Save the current build to the store and start the next one
+
+        Args:
+            self (SetsceneAnalyzer): none
+            name (str): name of the build like a pipeline id. Defaults to "".
+
+        Returns:
+            int: build id in the store
+        """
+        results: List[SetsceneTaskResult] = self.get_results()
+        with self.__lock:
+            started: float = self.__started if self.__started is not None else time.time()
+        build_id: int = self.store.add_build(name, started, results)
+        self.reset()
+        return build_id
+
+def _pack_hash(taskhash: str) -> Any:
+    try:
+        return bytes.fromhex(taskhash)
+    except (TypeError, ValueError):
+        return taskhash
+
+def _unpack_hash(taskhash: Any) -> str:
+    return taskhash.hex() if isinstance(taskhash, bytes) else taskhash
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+This file provides on-disk index of task hash history to explain why tasks are rebuilt
+"""
+
+import time
+import uuid
+import sqlite3
+import threading
+
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from .bbcommon import BBCommandError
+from .bbevent import *
+from .bbsstate import _pack_hash, _unpack_hash
+
+class TaskHashBuild:
+    """Build recorded in TaskHashIndex
+
+    Attributes:
+        build_id (int): id of the build
+        name (str): name of the build like a pipeline id
+        started (float): time the first event of the build arrived. (seconds since epoch)
+        task_count (int): number of tasks seen in the build
+        changed_count (int): number of tasks whose hash changed from the previous build they appeared in
+    """
+
+    def __init__(self: "TaskHashBuild", build_id: int, name: str, started: float, task_count: int, changed_count: int) -> None:
+        self.build_id: int = build_id
+        self.name: str = name
+        self.started: float = started
+        self.task_count: int = task_count
+        self.changed_count: int = changed_count
+
+    def __str__(self: "TaskHashBuild") -> str:
+        return self.__class__.__name__ + ": " + str(vars(self))
+
+class TaskHashChange:
+    """Hash change of a task
+
+    Attributes:
+        taskfile (str): recipe file of the task
+        taskname (str): task name like "do_compile"
+        old_hash (Optional[str]): hash before the change. None if the task was not seen before.
+        new_hash (Optional[str]): hash after the change. None if the task was not seen yet.
+        build_id (int): build which has new_hash
+    """
+
+    def __init__(self: "TaskHashChange", taskfile: str, taskname: str, old_hash: Optional[str], new_hash: Optional[str], build_id: int) -> None:
+        self.taskfile: str = taskfile
+        self.taskname: str = taskname
+        self.old_hash: Optional[str] = old_hash
+        self.new_hash: Optional[str] = new_hash
+        self.build_id: int = build_id
+
+    def __str__(self: "TaskHashChange") -> str:
+        return self.__class__.__name__ + ": " + str(vars(self))
+
+class RebuildReason:
+    """Why a task ran in a build
+
+    Attributes:
+        taskfile (str): recipe file of the task
+        taskname (str): task name like "do_compile"
+        old_hash (Optional[str]): hash before the build. None if the task is new.
+        new_hash (str): hash in the build
+        previous_build_id (Optional[int]): previous build the task ran in
+        siginfo (Dict[str, str]): siginfo file path of each hash found by find_sigInfo
+        diff (List[str]): differences of the siginfo files from bb.siggen.compare_sigfiles. Empty if they are not found.
+    """
+
+    def __init__(
+        self: "RebuildReason",
+        taskfile: str,
+        taskname: str,
+        old_hash: Optional[str],
+        new_hash: str,
+        previous_build_id: Optional[int],
+        siginfo: Optional[Dict[str, str]] = None,
+        diff: Optional[List[str]] = None,
+    ) -> None:
+        self.taskfile: str = taskfile
+        self.taskname: str = taskname
+        self.old_hash: Optional[str] = old_hash
+        self.new_hash: str = new_hash
+        self.previous_build_id: Optional[int] = previous_build_id
+        self.siginfo: Dict[str, str] = siginfo if siginfo is not None else {}
+        self.diff: List[str] = diff if diff is not None else []
+
+    @property
+    def is_hash_changed(self: "RebuildReason") -> bool:
+        """Whether the hash is different from the previous build. False means the task ran with the same hash, like sstate miss or forced run."""
+        return self.old_hash != self.new_hash
+
+    def __str__(self: "RebuildReason") -> str:
+        return self.__class__.__name__ + ": " + str(vars(self))
+
+class TaskHashIndex:
+    """On-disk index of (taskfile, taskname) to hash history across builds
+
+    Attributes:
+        path (str): database file path. ":memory:" keeps it in memory.
+        __connection (sqlite3.Connection): connection to the database
+        __lock (threading.Lock): lock for the connection and the current build
+        __hashes (Dict[Tuple[str, str], str]): hash of each task in the current build
+        __executed (Set[Tuple[str, str]]): tasks which ran in the current build
+        __pns (Dict[str, str]): recipe name with multiconfig of each recipe file, from task events
+        __started (Optional[float]): time the first event of the current build arrived
+        __subscriptions (List[Tuple[Any, uuid.UUID]]): client and callback id registered by attach
+
+    Note:
+        | Only hash changes are stored, so unchanged tasks don't grow the index. Tasks which ran are stored for each build.
+        | Attach before the build starts, and call finish when it's done.
+    """
+
+    def __init__(self: "TaskHashIndex", path: str = ":memory:") -> None:
+        """Open or create the index
+
+        Args:
+            self (TaskHashIndex): none
+            path (str): database file path. Defaults to ":memory:".
+        """
+        self.path: str = path
+        self.__lock: threading.Lock = threading.Lock()
+        self.__subscriptions: List[Tuple[Any, uuid.UUID]] = []
+        self.__pns: Dict[str, str] = {}
+        self.__connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        with self.__connection:
+            self.__connection.executescript("""
+                CREATE TABLE IF NOT EXISTS builds (
+                    id INTEGER PRIMARY KEY, name TEXT, started REAL, task_count INTEGER, changed_count INTEGER);
+                CREATE TABLE IF NOT EXISTS recipes (id INTEGER PRIMARY KEY, file TEXT UNIQUE, pn TEXT);
+                CREATE INDEX IF NOT EXISTS recipes_pn ON recipes (pn);
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY, recipe_id INTEGER, name TEXT, last_hash BLOB, UNIQUE (recipe_id, name));
+                CREATE TABLE IF NOT EXISTS changes (
+                    task_id INTEGER, build_id INTEGER, taskhash BLOB, PRIMARY KEY (task_id, build_id)) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS changes_build ON changes (build_id);
+                CREATE TABLE IF NOT EXISTS executions (
+                    build_id INTEGER, task_id INTEGER, PRIMARY KEY (build_id, task_id)) WITHOUT ROWID;
+            """)
+        self.reset()
+
+    def close(self: "TaskHashIndex") -> None:
+        """Close the database
+
+        Args:
+            self (TaskHashIndex): none
+        """
+        with self.__lock:
+            self.__connection.close()
+
+    def __enter__(self: "TaskHashIndex") -> "TaskHashIndex":
+        return self
+
+    def __exit__(self: "TaskHashIndex", *_: Any) -> None:
+        self.close()
+
+    def attach(self: "TaskHashIndex", client: Any) -> None:
+        """Receive events from the client
+
+        Args:
+            self (TaskHashIndex): none
+            client (Any): BBClient, or JournalReader to index the journal
+        """
+        for event_type in (runQueueEvent, TaskStartedEvent):
+            self.__subscriptions.append((client, client.register_callback(event_type, self.handle, True)))
+
+    def detach(self: "TaskHashIndex") -> None:
+        """Stop receiving events
+
+        Args:
+            self (TaskHashIndex): none
+        """
+        for client, unique_id in self.__subscriptions:
+            client.unregister_callback(unique_id)
+        self.__subscriptions = []
+
+    def reset(self: "TaskHashIndex") -> None:
+        """Drop the hashes of the current build
+
+        Args:
+            self (TaskHashIndex): none
+        """
+        with self.__lock:
+            self.__hashes: Dict[Tuple[str, str], str] = {}
+            self.__executed: Set[Tuple[str, str]] = set()
+            self.__started: Optional[float] = None
+
+    def handle(self: "TaskHashIndex", _: Any, event: BBEventBase) -> None:
+        """Record the hash in the runQueue event. This has the same signature as callback functions.
+
+        Args:
+            self (TaskHashIndex): none
+            _ (Any): BBClient
+            event (BBEventBase): runQueue, sceneQueue or TaskStartedEvent
+        """
+        with self.__lock:
+            if self.__started is None:
+                self.__started = time.time()
+            if isinstance(event, TaskStartedEvent):
+                if event.taskfile and event.pn:
+                    self.__pns[event.taskfile] = f"mc:{event.mc}:{event.pn}" if event.mc else event.pn
+                return
+            if not isinstance(event, runQueueEvent) or isinstance(event, sceneQueueCompleteEvent):
+                return
+            taskname: str = event.taskname
+            if isinstance(event, sceneQueueEvent) and taskname.endswith("_setscene"):
+                taskname = taskname[:-len("_setscene")]
+            key: Tuple[str, str] = (event.taskfile, taskname)
+            self.__hashes[key] = event.taskhash
+            if isinstance(event, runQueueTaskStartedEvent) and not event.noexec:
+                self.__executed.add(key)
+
+    def finish(self: "TaskHashIndex", name: str = "") -> int:
+        """Save the hashes of the current build and start the next one
+
+        Args:
+            self (TaskHashIndex): none
+            name (str): name of the build like a pipeline id. Defaults to "".
+
+        Returns:
+            int: build id
+        """
+        with self.__lock, self.__connection:
+            cursor: sqlite3.Cursor = self.__connection.cursor()
+            started: float = self.__started if self.__started is not None else time.time()
+            cursor.execute("INSERT INTO builds (name, started, task_count) VALUES (?, ?, ?)", (name, started, len(self.__hashes)))
+            build_id: int = cursor.lastrowid
+            recipe_ids: Dict[str, int] = dict(cursor.execute("SELECT file, id FROM recipes"))
+            tasks: Dict[Tuple[int, str], Tuple[int, Any]] = {
+                (recipe_id, taskname): (task_id, last_hash) for task_id, recipe_id, taskname, last_hash in cursor.execute("SELECT id, recipe_id, name, last_hash FROM tasks")
+            }
+            for taskfile, pn in self.__pns.items():
+                if taskfile in recipe_ids:
+                    cursor.execute("UPDATE recipes SET pn = ? WHERE id = ?", (pn, recipe_ids[taskfile]))
+            changes: List[Tuple[int, int, Any]] = []
+            executions: List[Tuple[int, int]] = []
+            for (taskfile, taskname), taskhash in self.__hashes.items():
+                recipe_id: Optional[int] = recipe_ids.get(taskfile)
+                if recipe_id is None:
+                    cursor.execute("INSERT INTO recipes (file, pn) VALUES (?, ?)", (taskfile, self.__pns.get(taskfile)))
+                    recipe_id = recipe_ids[taskfile] = cursor.lastrowid
+                packed: Any = _pack_hash(taskhash)
+                task: Optional[Tuple[int, Any]] = tasks.get((recipe_id, taskname))
+                if task is None:
+                    cursor.execute("INSERT INTO tasks (recipe_id, name, last_hash) VALUES (?, ?, ?)", (recipe_id, taskname, packed))
+                    task = (cursor.lastrowid, None)
+                elif task[1] != packed:
+                    cursor.execute("UPDATE tasks SET last_hash = ? WHERE id = ?", (packed, task[0]))
+                if task[1] != packed:
+                    changes.append((task[0], build_id, packed))
+                if (taskfile, taskname) in self.__executed:
+                    executions.append((build_id, task[0]))
+            cursor.executemany("INSERT INTO changes VALUES (?, ?, ?)", changes)
+            cursor.executemany("INSERT INTO executions VALUES (?, ?)", executions)
+            cursor.execute("UPDATE builds SET changed_count = ? WHERE id = ?", (len(changes), build_id))
+            self.__hashes = {}
+            self.__executed = set()
+            self.__started = None
+            return build_id
+
+    def get_builds(self: "TaskHashIndex", last: Optional[int] = None) -> List[TaskHashBuild]:
+        """Get the builds in the index
+
+        Args:
+            self (TaskHashIndex): none
+            last (Optional[int]): number of the latest builds. None gets all. Defaults to None.
+
+        Returns:
+            List[TaskHashBuild]: builds from old to new
+        """
+        with self.__lock:
+            rows: List[Tuple[Any, ...]] = self.__connection.execute(
+                "SELECT id, name, started, task_count, changed_count FROM builds ORDER BY id DESC LIMIT ?", (last if last is not None else -1,)
+            ).fetchall()
+        return [TaskHashBuild(*row) for row in reversed(rows)]
+
+    def get_history(self: "TaskHashIndex", taskfile: str, taskname: str) -> List[TaskHashChange]:
+        """Get the hash history of a task
+
+        Args:
+            self (TaskHashIndex): none
+            taskfile (str): recipe file of the task
+            taskname (str): task name like "do_compile"
+
+        Returns:
+            List[TaskHashChange]: hash changes from old to new. The first one has None as old_hash.
+        """
+        with self.__lock:
+            rows: List[Tuple[Any, ...]] = self.__connection.execute(
+                """
+                SELECT changes.build_id, changes.taskhash FROM changes
+                    JOIN tasks ON tasks.id = changes.task_id JOIN recipes ON recipes.id = tasks.recipe_id
+                WHERE recipes.file = ? AND tasks.name = ? ORDER BY changes.build_id
+                """,
+                (taskfile, taskname),
+            ).fetchall()
+        history: List[TaskHashChange] = []
+        old_hash: Optional[str] = None
+        for build_id, taskhash in rows:
+            history.append(TaskHashChange(taskfile, taskname, old_hash, _unpack_hash(taskhash), build_id))
+            old_hash = history[-1].new_hash
+        return history
+
+    def get_changed_since(self: "TaskHashIndex", build_id: int, until: Optional[int] = None) -> List[TaskHashChange]:
+        """Get the tasks whose hash changed since the build
+
+        Args:
+            self (TaskHashIndex): none
+            build_id (int): base build
+            until (Optional[int]): build to compare with. None compares with the latest hash of each task. Defaults to None.
+
+        Returns:
+            List[TaskHashChange]: tasks with the hash at build_id as old_hash and the hash at until as new_hash. Tasks which changed and changed back are not included.
+        """
+        until = until if until is not None else 1 << 62
+        with self.__lock:
+            rows: List[Tuple[Any, ...]] = self.__connection.execute(
+                """
+                SELECT recipes.file, tasks.name,
+                    (SELECT taskhash FROM changes WHERE task_id = tasks.id AND build_id <= ? ORDER BY build_id DESC LIMIT 1),
+                    (SELECT taskhash FROM changes WHERE task_id = tasks.id AND build_id <= ? ORDER BY build_id DESC LIMIT 1),
+                    (SELECT MAX(build_id) FROM changes WHERE task_id = tasks.id AND build_id <= ?)
+                FROM tasks JOIN recipes ON recipes.id = tasks.recipe_id
+                WHERE tasks.id IN (SELECT task_id FROM changes WHERE build_id > ? AND build_id <= ?)
+                ORDER BY recipes.file, tasks.name
+                """,
+                (build_id, until, until, build_id, until),
+            ).fetchall()
+        return [
+            TaskHashChange(taskfile, taskname, _unpack_hash(old_hash), _unpack_hash(new_hash), changed_build)
+            for taskfile, taskname, old_hash, new_hash, changed_build in rows
+            if old_hash != new_hash
+        ]
+
+    def explain_rebuild(
+        self: "TaskHashIndex", recipe: str, build_id: Optional[int] = None, client: Any = None, timeout: Optional[float] = 60.0
+    ) -> List[RebuildReason]:
+        """Explain why the tasks of the recipe ran in the build
+
+        Args:
+            self (TaskHashIndex): none
+            recipe (str): recipe file or recipe name
+            build_id (Optional[int]): build. None means the latest build. Defaults to None.
+            client (Any): started BBClient. If it's given, siginfo files of the old and new hash are found by find_sigInfo_async and compared. Defaults to None.
+            timeout (Optional[float]): max time to wait for each find_sigInfo. Defaults to 60. (seconds)
+
+        Returns:
+            List[RebuildReason]: tasks of the recipe which ran in the build
+        """
+        with self.__lock:
+            cursor: sqlite3.Cursor = self.__connection.cursor()
+            if build_id is None:
+                build_id = cursor.execute("SELECT MAX(id) FROM builds").fetchone()[0]
+            rows: List[Tuple[Any, ...]] = cursor.execute(
+                """
+                SELECT recipes.file, recipes.pn, tasks.name,
+                    (SELECT taskhash FROM changes WHERE task_id = tasks.id AND build_id <= :build ORDER BY build_id DESC LIMIT 1),
+                    (SELECT taskhash FROM changes WHERE task_id = tasks.id AND build_id < :build ORDER BY build_id DESC LIMIT 1),
+                    (SELECT MAX(build_id) FROM executions WHERE task_id = tasks.id AND build_id < :build)
+                FROM executions JOIN tasks ON tasks.id = executions.task_id JOIN recipes ON recipes.id = tasks.recipe_id
+                WHERE executions.build_id = :build AND (recipes.file = :recipe OR recipes.pn = :recipe)
+                ORDER BY tasks.name
+                """,
+                {"build": build_id, "recipe": recipe},
+            ).fetchall()
+        reasons: List[RebuildReason] = []
+        for taskfile, pn, taskname, new_hash, old_hash, previous_build in rows:
+            reason: RebuildReason = RebuildReason(taskfile, taskname, _unpack_hash(old_hash), _unpack_hash(new_hash), previous_build)
+            if client is not None and pn and reason.old_hash is not None and reason.is_hash_changed:
+                reason.siginfo = _find_siginfo(client, pn, taskname, [reason.old_hash, reason.new_hash], timeout)
+                if reason.old_hash in reason.siginfo and reason.new_hash in reason.siginfo:
+                    reason.diff = _compare_siginfo(reason.siginfo[reason.old_hash], reason.siginfo[reason.new_hash])
+            reasons.append(reason)
+        return reasons
+
+def _find_siginfo(client: Any, pn: str, taskname: str, hashes: List[str], timeout: Optional[float]) -> Dict[str, str]:
+    with client.events(FindSigInfoResultEvent, timeout=timeout) as stream:
+        future: Future = client.find_sigInfo_async(pn, taskname, hashes)
+        try:
+            future.result(timeout)
+        except TimeoutError:
+            # stop it, otherwise find_sigInfo of the next reasons waits for it
+            future.cancel()
+            return {}
+        except BBCommandError:
+            return {}
+        event: Optional[FindSigInfoResultEvent] = next(stream, None)
+    if event is None:
+        return {}
+    # newer bitbake returns dict with "path" instead of path
+    return {taskhash: value["path"] if isinstance(value, Mapping) else value for taskhash, value in event.result.items()}
+
+def _compare_siginfo(old_path: str, new_path: str) -> List[str]:
+    try:
+        # bitbake lib is in sys.path after start_server
+        import bb.siggen # type: ignore
+    except ImportError:
+        return []
+    return bb.siggen.compare_sigfiles(old_path, new_path)
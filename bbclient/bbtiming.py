@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+This file provides task timing analytics and critical path report made from task events
+"""
+
+import io
+import math
+import csv
+import json
+import uuid
+import threading
+import collections
+
+from typing import Any, Deque, Dict, IO, List, Mapping, Optional, Tuple, Union
+
+from .bbevent import *
+
+class TaskTiming:
+    """Wall-clock time of one task
+
+    Attributes:
+        pn (str): recipe name
+        task (str): task name like "do_compile"
+        start (float): time the task started. (seconds since epoch)
+        end (float): time the task finished. (seconds since epoch)
+        succeeded (bool): whether the task succeeded or failed
+    """
+
+    def __init__(self: "TaskTiming", pn: str, task: str, start: float, end: float, succeeded: bool) -> None:
+        self.pn: str = pn
+        self.task: str = task
+        self.start: float = start
+        self.end: float = end
+        self.succeeded: bool = succeeded
+
+    @property
+    def duration(self: "TaskTiming") -> float:
+        """Wall-clock duration of the task (seconds)"""
+        return self.end - self.start
+
+    def __str__(self: "TaskTiming") -> str:
+        return self.__class__.__name__ + ": " + str(dict(vars(self), duration=self.duration))
+
+class RecipeTiming:
+    """Total time of the tasks in one recipe
+
+    Attributes:
+        pn (str): recipe name
+        duration (float): sum of the task durations (seconds)
+        task_count (int): number of finished tasks
+    """
+
+    def __init__(self: "RecipeTiming", pn: str, duration: float, task_count: int) -> None:
+        self.pn: str = pn
+        self.duration: float = duration
+        self.task_count: int = task_count
+
+    def __str__(self: "RecipeTiming") -> str:
+        return self.__class__.__name__ + ": " + str(vars(self))
+
+class TaskTimingReport:
+    """Timing report of a build
+
+    Attributes:
+        start (float): time the first task started. (seconds since epoch)
+        end (float): time the last task finished. (seconds since epoch)
+        tasks (List[TaskTiming]): all the finished tasks in the order they started
+        slowest_tasks (List[TaskTiming]): slowest tasks first
+        slowest_recipes (List[RecipeTiming]): recipes with the longest total task time first
+        bucket_width (float): width of each parallelism bucket (seconds)
+        parallelism (List[float]): average number of running tasks in each bucket from start
+        critical_path (List[TaskTiming]): longest chain of dependent tasks, from first to last. Empty without dependency tree.
+        critical_path_duration (float): sum of the task durations in critical_path (seconds)
+
+    Note:
+        | If critical_path_duration is close to elapsed, the build is limited by dependencies, not by the machine.
+        | Low parallelism far from critical_path_duration shows the time the machine waits for a few long tasks.
+    """
+
+    def __init__(
+        self: "TaskTimingReport",
+        start: float,
+        end: float,
+        tasks: List[TaskTiming],
+        slowest_tasks: List[TaskTiming],
+        slowest_recipes: List[RecipeTiming],
+        bucket_width: float,
+        parallelism: List[float],
+        critical_path: List[TaskTiming],
+    ) -> None:
+        self.start: float = start
+        self.end: float = end
+        self.tasks: List[TaskTiming] = tasks
+        self.slowest_tasks: List[TaskTiming] = slowest_tasks
+        self.slowest_recipes: List[RecipeTiming] = slowest_recipes
+        self.bucket_width: float = bucket_width
+        self.parallelism: List[float] = parallelism
+        self.critical_path: List[TaskTiming] = critical_path
+        self.critical_path_duration: float = sum(timing.duration for timing in critical_path)
+
+    @property
+    def elapsed(self: "TaskTimingReport") -> float:
+        """Time from the first task start to the last task end (seconds)"""
+        return self.end - self.start
+
+    def to_dict(self: "TaskTimingReport") -> Dict[str, Any]:
+        """Convert the report to JSON compatible dict
+
+        Args:
+            self (TaskTimingReport): none
+
+        Returns:
+            Dict[str, Any]: the report
+        """
+        def task_dict(timing: TaskTiming) -> Dict[str, Any]:
+            return dict(vars(timing), duration=timing.duration)
+        return {
+            "start": self.start,
+            "end": self.end,
+            "elapsed": self.elapsed,
+            "critical_path_duration": self.critical_path_duration,
+            "slowest_tasks": [task_dict(timing) for timing in self.slowest_tasks],
+            "slowest_recipes": [vars(recipe) for recipe in self.slowest_recipes],
+            "bucket_width": self.bucket_width,
+            "parallelism": self.parallelism,
+            "critical_path": [task_dict(timing) for timing in self.critical_path],
+            "tasks": [task_dict(timing) for timing in self.tasks],
+        }
+
+    def write_json(self: "TaskTimingReport", file: Union[str, IO[str]]) -> None:
+        """Write the report as JSON
+
+        Args:
+            self (TaskTimingReport): none
+            file (Union[str, IO[str]]): file path or text file object
+        """
+        if isinstance(file, str):
+            with open(file, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+        else:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def write_csv(self: "TaskTimingReport", file: Union[str, IO[str]], table: str = "tasks") -> None:
+        """Write one table of the report as CSV
+
+        Args:
+            self (TaskTimingReport): none
+            file (Union[str, IO[str]]): file path or text file object
+            table (str): "tasks" for all the tasks with critical path flag, "recipes" for total time of each recipe or "parallelism" for the histogram. Defaults to "tasks".
+
+        Raises:
+            ValueError: unknown table is given
+        """
+        rows: List[List[Any]]
+        if table == "tasks":
+            critical: set = {(timing.pn, timing.task) for timing in self.critical_path}
+            rows = [["pn", "task", "start", "end", "duration", "succeeded", "critical_path"]]
+            rows += [
+                [timing.pn, timing.task, timing.start, timing.end, timing.duration, timing.succeeded, (timing.pn, timing.task) in critical]
+                for timing in self.tasks
+            ]
+        elif table == "recipes":
+            recipes: List[RecipeTiming] = sorted(_sum_recipes(self.tasks), key=lambda recipe: recipe.duration, reverse=True)
+            rows = [["pn", "duration", "task_count"]] + [[recipe.pn, recipe.duration, recipe.task_count] for recipe in recipes]
+        elif table == "parallelism":
+            rows = [["offset", "running"]] + [[index * self.bucket_width, running] for index, running in enumerate(self.parallelism)]
+        else:
+            raise ValueError(f"table must be tasks, recipes or parallelism, but {table} is given.")
+        if isinstance(file, str):
+            with open(file, "w", newline="") as f:
+                csv.writer(f).writerows(rows)
+        else:
+            csv.writer(file).writerows(rows)
+
+    def __str__(self: "TaskTimingReport") -> str:
+        stream: io.StringIO = io.StringIO()
+        stream.write(f"elapsed {self.elapsed:.1f}s, critical path {self.critical_path_duration:.1f}s, {len(self.tasks)} tasks\n")
+        if self.parallelism:
+            stream.write(f"average parallelism {sum(self.parallelism) / len(self.parallelism):.2f}\n")
+        stream.write("slowest tasks:\n")
+        for timing in self.slowest_tasks:
+            stream.write(f"  {timing.duration:10.1f}s {timing.pn}:{timing.task}\n")
+        stream.write("slowest recipes:\n")
+        for recipe in self.slowest_recipes:
+            stream.write(f"  {recipe.duration:10.1f}s {recipe.pn} ({recipe.task_count} tasks)\n")
+        stream.write("critical path:\n")
+        for timing in self.critical_path:
+            stream.write(f"  {timing.duration:10.1f}s {timing.pn}:{timing.task}\n")
+        return stream.getvalue()
+
+class TaskTimingAnalyzer:
+    """Collect task timings and make TaskTimingReport
+
+    Attributes:
+        __lock (threading.Lock): lock for the timings
+        __started (Dict[Tuple[str, str, str], float]): start time of running tasks by mc, pn and task
+        __timings (List[TaskTiming]): finished tasks
+        __task_depends (Dict[str, List[str]]): dependencies of each "pn.task" from DepTreeGeneratedEvent
+        __subscriptions (List[Tuple[Any, uuid.UUID]]): client and callback id registered by attach
+
+    Note:
+        | Durations come from the time field of TaskStartedEvent, TaskSucceededEvent and TaskFailedEvent, so they are measured on bitbake server.
+        | Run generate_dep_tree_event for the same targets while attached, or call set_dep_tree, to get the critical path.
+    """
+
+    def __init__(self: "TaskTimingAnalyzer") -> None:
+        """Initialize
+
+        Args:
+            self (TaskTimingAnalyzer): none
+        """
+        self.__lock: threading.Lock = threading.Lock()
+        self.__subscriptions: List[Tuple[Any, uuid.UUID]] = []
+        self.__task_depends: Dict[str, List[str]] = {}
+        self.reset()
+
+    def attach(self: "TaskTimingAnalyzer", client: Any) -> None:
+        """Receive events from the client
+
+        Args:
+            self (TaskTimingAnalyzer): none
+            client (Any): BBClient, or JournalReader to analyze the journal
+        """
+        for event_type in (TaskStartedEvent, TaskSucceededEvent, TaskFailedEvent, DepTreeGeneratedEvent):
+            self.__subscriptions.append((client, client.register_callback(event_type, self.handle)))
+
+    def detach(self: "TaskTimingAnalyzer") -> None:
+        """Stop receiving events
+
+        Args:
+            self (TaskTimingAnalyzer): none
+        """
+        for client, unique_id in self.__subscriptions:
+            client.unregister_callback(unique_id)
+        self.__subscriptions = []
+
+    def reset(self: "TaskTimingAnalyzer") -> None:
+        """Clear the timings, for example before the next build. The dependency tree is kept.
+
+        Args:
+            self (TaskTimingAnalyzer): none
+        """
+        with self.__lock:
+            self.__started: Dict[Tuple[str, str, str], float] = {}
+            self.__timings: List[TaskTiming] = []
+
+    def set_dep_tree(self: "TaskTimingAnalyzer", depgraph: Mapping[str, Any]) -> None:
+        """Set the dependency tree used for the critical path
+
+        Args:
+            self (TaskTimingAnalyzer): none
+            depgraph (Mapping[str, Any]): depgraph of DepTreeGeneratedEvent. Only "tdepends" is used.
+        """
+        task_depends: Dict[str, List[str]] = {name: list(depends) for name, depends in depgraph.get("tdepends", {}).items()}
+        with self.__lock:
+            self.__task_depends = task_depends
+
+    def handle(self: "TaskTimingAnalyzer", _: Any, event: BBEventBase) -> None:
+        """Record the task event. This has the same signature as callback functions.
+
+        Args:
+            self (TaskTimingAnalyzer): none
+            _ (Any): BBClient
+            event (BBEventBase): task event or DepTreeGeneratedEvent
+        """
+        if isinstance(event, DepTreeGeneratedEvent):
+            self.set_dep_tree(event.depgraph)
+            return
+        if not isinstance(event, TaskBase) or event.time is None:
+            return
+        key: Tuple[str, str, str] = (event.mc or "", event.pn, event.taskname)
+        with self.__lock:
+            if isinstance(event, TaskStartedEvent):
+                self.__started[key] = event.time
+                return
+            start: Optional[float] = self.__started.pop(key, None)
+            if start is not None:
+                self.__timings.append(TaskTiming(event.pn, event.taskname, start, event.time, isinstance(event, TaskSucceededEvent)))
+
+    def report(self: "TaskTimingAnalyzer", top: int = 20, bucket_width: float = 10.0) -> TaskTimingReport:
+        """Make the report from the tasks finished so far
+
+        Args:
+            self (TaskTimingAnalyzer): none
+            top (int): number of slowest tasks and recipes. Defaults to 20.
+            bucket_width (float): width of each parallelism bucket (seconds). Defaults to 10.
+
+        Returns:
+            TaskTimingReport: the report
+
+        Raises:
+            ValueError: bucket_width is not positive
+        """
+        if bucket_width <= 0:
+            raise ValueError(f"bucket_width must be positive, but {bucket_width} is given.")
+        with self.__lock:
+            timings: List[TaskTiming] = sorted(self.__timings, key=lambda timing: timing.start)
+            task_depends: Dict[str, List[str]] = self.__task_depends
+        if not timings:
+            return TaskTimingReport(0.0, 0.0, [], [], [], bucket_width, [], [])
+        start: float = timings[0].start
+        end: float = max(timing.end for timing in timings)
+        return TaskTimingReport(
+            start,
+            end,
+            timings,
+            sorted(timings, key=lambda timing: timing.duration, reverse=True)[:top],
+            sorted(_sum_recipes(timings), key=lambda recipe: recipe.duration, reverse=True)[:top],
+            bucket_width,
+            self.__get_parallelism(timings, start, end, bucket_width),
+            self.__get_critical_path(timings, task_depends),
+        )
+
+    @staticmethod
+    def __get_parallelism(timings: List[TaskTiming], start: float, end: float, bucket_width: float) -> List[float]:
+        # busy seconds in each bucket divided by the width is the average number of running tasks
+        busy: List[float] = [0.0] * max(math.ceil((end - start) / bucket_width), 1)
+        for timing in timings:
+            first: int = int((timing.start - start) / bucket_width)
+            last: int = min(int((timing.end - start) / bucket_width), len(busy) - 1)
+            for index in range(first, last + 1):
+                bucket_start: float = start + index * bucket_width
+                busy[index] += min(timing.end, bucket_start + bucket_width) - max(timing.start, bucket_start)
+        return [seconds / bucket_width for seconds in busy]
+
+    @staticmethod
+    def __get_critical_path(timings: List[TaskTiming], task_depends: Dict[str, List[str]]) -> List[TaskTiming]:
+        # longest path in the task graph weighted by the durations. Tasks not run (e.g. covered by setscene) weigh 0.
+        if not task_depends:
+            return []
+        durations: Dict[str, TaskTiming] = {f"{timing.pn}.{timing.task}": timing for timing in timings}
+        dependents: Dict[str, List[str]] = collections.defaultdict(list)
+        waiting: Dict[str, int] = {}
+        for name, depends in task_depends.items():
+            waiting[name] = len(depends)
+            for depend in depends:
+                dependents[depend].append(name)
+                waiting.setdefault(depend, 0)
+        ready: Deque[str] = collections.deque(name for name, count in waiting.items() if count == 0)
+        cost: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        while ready:
+            name: str = ready.popleft()
+            longest: Optional[str] = max(task_depends.get(name, []), key=lambda depend: cost[depend], default=None)
+            timing: Optional[TaskTiming] = durations.get(name)
+            cost[name] = (cost[longest] if longest is not None else 0.0) + (timing.duration if timing else 0.0)
+            previous[name] = longest
+            for dependent in dependents[name]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+        if not cost:
+            return []
+        path: List[TaskTiming] = []
+        current: Optional[str] = max(cost, key=lambda name: cost[name])
+        while current is not None:
+            timing = durations.get(current)
+            if timing:
+                path.append(timing)
+            current = previous[current]
+        path.reverse()
+        return path
+
+def _sum_recipes(timings: List[TaskTiming]) -> List[RecipeTiming]:
+    recipes: Dict[str, RecipeTiming] = {}
+    for timing in timings:
+        recipe: Optional[RecipeTiming] = recipes.get(timing.pn)
+        if recipe is None:
+            recipe = recipes[timing.pn] = RecipeTiming(timing.pn, 0.0, 0)
+        recipe.duration += timing.duration
+        recipe.task_count += 1
+    return list(recipes.values())
@@ -4,7 +4,9 @@ This file provides cli interface of bbclient
 """
 
 from .bbclient import *
+from .bbdaemon import *
 
+import sys
 import json
 from argparse import ArgumentParser, Namespace, _SubParsersAction 
 from typing import List, Union
@@ -13,7 +15,7 @@ from collections import namedtuple
 
 Config = namedtuple(
     "Config",
-    ["project_path", "subcommand", "command_args"],
+    ["project_path", "daemon_socket", "subcommand", "command_args"],
 )
 
 
@@ -22,8 +24,20 @@ def main() -> None:
     if not config.subcommand:
         print("bbclient command needs subcommand. See bbclient --help.")
         return 
+    if config.subcommand == daemon_command:
+        daemon_command(config)
+        return
+    if not config.command_args.no_daemon:
+        try:
+            with BBDaemonClient(config.daemon_socket) as daemon_client:
+                config.subcommand(daemon_client, config.command_args)
+            return
+        except BBDaemonNotRunningError:
+            pass
+        except BBDaemonUnsafeSocketError as e:
+            print(e, file=sys.stderr)
     client: BBClient = BBClient(config.project_path)
-    if not client.start_server():
+    if not client.start_server(parse="lazy"):
         print("bbclient command uses current path as your project path. If the parent dir of current dir isn't your project path, please use --project_path option.")
         return
     config.subcommand(client, config.command_args)
@@ -32,6 +46,8 @@ def main() -> None:
 def get_config() -> List[Union[str, int]]:
     parser: ArgumentParser = ArgumentParser(description='')
     parser.add_argument("-p", "--project_path", default="../", help="path to bitbake project, basically poky dir")
+    parser.add_argument("-s", "--daemon_socket", default=None, help="unix socket path of bbclient daemon. The default is decided by project path.")
+    parser.add_argument("--no_daemon", default=False, help="don't attach to bbclient daemon even if it is running.", action='store_true')
 
     # sub commands
     sub_parsers: _SubParsersAction = parser.add_subparsers(title='get_all_keys_with_flags', description='valid subcommands', help='additional help')
@@ -125,11 +141,37 @@ def get_config() -> List[Union[str, int]]:
     all_providers_subcommands.add_argument("-m", "--mutli_conf_name",  default="", help="target multi-config. Defaults to ''")
     all_providers_subcommands.set_defaults(subcommand=all_providers)
 
+    daemon_subcommands: ArgumentParser = sub_parsers.add_parser("daemon", help="Start, stop or show bbclient daemon that keeps bitbake server warm. Other subcommands attach to the daemon automatically.")
+    daemon_subcommands.add_argument("action", choices=["start", "stop", "status"], help="daemon action")
+    daemon_subcommands.set_defaults(subcommand=daemon_command)
 
     args: Namespace = parser.parse_args()
 
     # TODO: support remote server
-    return Config(args.project_path, getattr(args, "subcommand", None), args)
+    daemon_socket: str = args.daemon_socket if args.daemon_socket else get_default_socket_path(args.project_path)
+    return Config(args.project_path, daemon_socket, getattr(args, "subcommand", None), args)
+
+
+def daemon_command(config: Config) -> None:
+    action: str = config.command_args.action
+    if action == "start":
+        if is_daemon_running(config.daemon_socket):
+            print(f"bbclient daemon is already running at {config.daemon_socket}.")
+            return
+        if not start_daemon(config.project_path, config.daemon_socket):
+            print("bbclient daemon failed to start. Please check your project path and environment.")
+            return
+        print(f"bbclient daemon started at {config.daemon_socket}.")
+        return
+    try:
+        with BBDaemonClient(config.daemon_socket) as daemon_client:
+            if action == "stop":
+                daemon_client.stop()
+                print("bbclient daemon stopped.")
+                return
+            print(json.dumps(daemon_client.status()))
+    except (BBDaemonNotRunningError, BBDaemonUnsafeSocketError) as e:
+        print(e)
 
 
 def get_all_keys_with_flags_command(
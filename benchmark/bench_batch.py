@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark of BBClient.batch against a local fake server with round trip latency
+
+Usage: python3 benchmark/bench_batch.py
+"""
+
+import os
+import sys
+import time
+
+from typing import Any, Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import FakeServerConnection, install_fake_server
+
+ROUND_TRIP_LATENCY: float = 0.002
+RECIPE_COUNT: int = 2000
+MULTI_CONFIGS: List[str] = ["", "mc1", "mc2", "mc3"]
+
+def make_responses() -> Any:
+    recipe_files: List[str] = [f"/PATH/TO/POKY/meta/recipes-core/recipe{i}/recipe{i}_1.0.bb" for i in range(RECIPE_COUNT)]
+    return {
+        "getRecipes": [[f"recipe{i}", [path]] for i, path in enumerate(recipe_files)],
+        "getRecipeVersions": {path: ["", "1.0", "r0"] for path in recipe_files},
+        "getRecipeProvides": {path: [f"recipe{i}"] for i, path in enumerate(recipe_files)},
+        "getRecipeInherits": {path: ["/PATH/TO/POKY/meta/classes/base.bbclass"] for path in recipe_files},
+        "getBbFilePriority": {path: 5 for path in recipe_files},
+    }
+
+def sequential(client: BBClient) -> None:
+    for multi_config in MULTI_CONFIGS:
+        client.get_recipes(multi_config)
+        client.get_recipe_versions(multi_config)
+        client.get_recipe_provides(multi_config)
+        client.get_recipe_inherits(multi_config)
+        client.get_bb_file_priority(multi_config)
+
+def batched(client: BBClient) -> BBBatch:
+    futures: List[CommandFuture] = []
+    with client.batch() as batch:
+        for multi_config in MULTI_CONFIGS:
+            futures.append(batch.get_recipes(multi_config))
+            futures.append(batch.get_recipe_versions(multi_config))
+            futures.append(batch.get_recipe_provides(multi_config))
+            futures.append(batch.get_recipe_inherits(multi_config))
+            futures.append(batch.get_bb_file_priority(multi_config))
+    for future in futures:
+        future.result()
+    return batch
+
+def measure(name: str, run: Callable[[BBClient], Any]) -> None:
+    servers: List[FakeServerConnection] = []
+    def make_server() -> FakeServerConnection:
+        servers.append(FakeServerConnection(responses=make_responses(), round_trip_latency=ROUND_TRIP_LATENCY))
+        return servers[-1]
+    install_fake_server(BBClient, make_server)
+    client: BBClient = BBClient(".", env_cache_dir=None)
+    client.start_server()
+    round_trips_before: int = servers[-1].connection.round_trip_count
+    start: float = time.perf_counter()
+    ret: Any = run(client)
+    elapsed: float = time.perf_counter() - start
+    round_trips: int = servers[-1].connection.round_trip_count - round_trips_before
+    saved: str = f"  round trips saved {ret.round_trips_saved:3d}" if isinstance(ret, BBBatch) else ""
+    print(f"{name:<12} {elapsed * 1000:8.1f} ms  round trips {round_trips:3d}{saved}")
+    client.stop_server()
+
+def main() -> None:
+    measure("sequential", sequential)
+    measure("batch", batched)
+
+if __name__ == "__main__":
+    main()
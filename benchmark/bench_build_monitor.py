@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark of BuildMonitor updates and snapshots
+
+Usage: python3 benchmark/bench_build_monitor.py
+"""
+
+import os
+import sys
+import time
+
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import make_event
+
+TASK_COUNTS: List[int] = [1000, 10000, 100000]
+THREADS: int = 16
+
+def make_events(task_count: int) -> List[BBEventBase]:
+    # setscene for the first half, then real tasks, THREADS running at once
+    events: List[BBEventBase] = []
+    stats: Any = make_event("bb.runqueue.RunQueueStats", total=task_count // 2)
+    def add(event_class: Any, task: int, **fields: Any) -> None:
+        name: str = "do_populate_sysroot_setscene" if issubclass(event_class, sceneQueueEvent) else "do_compile"
+        data: Dict[str, Any] = {"pid": 1, "taskid": task, "taskstring": f"recipe{task}:{name}", "taskname": name, "taskfile": f"recipe{task}.bb", "taskhash": "0" * 64, "stats": stats}
+        data.update(fields)
+        events.append(event_class.decode(None, data))
+    for first in range(0, task_count, THREADS):
+        tasks: range = range(first, min(first + THREADS, task_count))
+        for task in tasks:
+            is_setscene: bool = task < task_count // 2
+            add(sceneQueueTaskStartedEvent if is_setscene else runQueueTaskStartedEvent, task, noexec=False)
+            events.append(TaskStartedEvent.decode(None, {"pid": 1000 + task % THREADS, "taskfile": f"recipe{task}.bb", "taskname": "do_populate_sysroot_setscene" if is_setscene else "do_compile", "logfile": "log", "taskflags": {}}))
+        for task in tasks:
+            add(sceneQueueTaskCompletedEvent if task < task_count // 2 else runQueueTaskCompletedEvent, task)
+    return events
+
+def main() -> None:
+    for task_count in TASK_COUNTS:
+        events: List[BBEventBase] = make_events(task_count)
+        monitor: BuildMonitor = BuildMonitor()
+        start: float = time.perf_counter()
+        for event in events:
+            monitor.handle(None, event)
+        update: float = (time.perf_counter() - start) / len(events)
+        start = time.perf_counter()
+        for _ in range(1000):
+            snapshot: BuildSnapshot = monitor.snapshot()
+        snapshot_time: float = (time.perf_counter() - start) / 1000
+        print(f"{task_count:>7,} tasks  {len(events):>8,} events  update {update * 1e6:5.2f} us/event  snapshot {snapshot_time * 1e6:6.2f} us  {snapshot}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark of finding callbacks for events in the event monitor thread
+
+Usage: python3 benchmark/bench_callback_dispatch.py [number of events]
+"""
+
+import os
+import sys
+import time
+
+from typing import Any, Callable, Iterable, List, Type
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+
+EVENT_COUNT: int = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+EVENT_TYPES: List[Type[BBEventBase]] = [LogRecord, LogRecord, LogRecord, TaskProgressEvent, TaskStartedEvent, runQueueTaskStartedEvent, ProcessProgressEvent]
+
+def measure(name: str, find_callbacks: Callable[[type], Iterable[CallBack]]) -> float:
+    event_type_count: int = len(EVENT_TYPES)
+    start: float = time.perf_counter()
+    for index in range(EVENT_COUNT):
+        for _ in find_callbacks(EVENT_TYPES[index % event_type_count]):
+            pass
+    elapsed: float = time.perf_counter() - start
+    print(f"{name:<32} {elapsed:8.3f} s  {EVENT_COUNT / elapsed:12,.0f} events/s")
+    return elapsed
+
+def main() -> None:
+    client: BBClient = BBClient(".", env_cache_dir=None)
+    nop: Callable[[BBClient, BBEventBase], None] = lambda client, event: None
+    # same as the default callbacks registered with logging_level=DEBUG
+    for event_type in ALL_BB_EVENTS:
+        if event_type != LogRecord:
+            client.register_callback(event_type, nop)
+    client.register_callback(TaskProgressEvent, nop)
+    client.register_callback(TaskBase, nop, include_subclasses=True)
+    client.register_callback(runQueueEvent, nop, include_subclasses=True)
+    callbacks: List[CallBack] = list(client._BBClient__callbacks[0].values())
+    print(f"{EVENT_COUNT:,} events, {len(callbacks)} callbacks")
+    # the behavior before the indexed registry: scan all callbacks for each event
+    legacy: float = measure("linear scan", lambda event_type: filter(lambda x: x.target_event_type == event_type, callbacks))
+    indexed: float = measure("indexed registry", client._BBClient__find_callbacks)
+    print(f"speedup: {legacy / indexed:.1f}x")
+
+if __name__ == "__main__":
+    main()
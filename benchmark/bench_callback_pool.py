@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark of event consumption with slow callback functions in each dispatch mode
+
+Usage: python3 benchmark/bench_callback_pool.py [number of events]
+"""
+
+import os
+import sys
+import time
+import threading
+
+from typing import Any, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import FakeServerConnection, install_fake_server, make_event
+
+EVENT_COUNT: int = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+CALLBACK_TIME: float = 0.001
+
+def measure(dispatch: str, max_pending: int) -> None:
+    servers: List[FakeServerConnection] = []
+    def make_server() -> FakeServerConnection:
+        servers.append(FakeServerConnection())
+        return servers[-1]
+    install_fake_server(BBClient, make_server)
+    client: BBClient = BBClient(".", env_cache_dir=None)
+    client.start_server(parse="never")
+    slow_id: uuid.UUID = client.register_callback(
+        TaskProgressEvent, lambda client, event: time.sleep(CALLBACK_TIME), dispatch=dispatch, max_pending=max_pending
+    )
+    pumped: threading.Event = threading.Event()
+    client.register_callback(HeartbeatEvent, lambda client, event: pumped.set())
+    events: List[Any] = [make_event("bb.build.TaskProgress", progress=index, rate="") for index in range(EVENT_COUNT)]
+    start: float = time.perf_counter()
+    for event in events:
+        servers[-1].events.put(event)
+    servers[-1].events.put(make_event("bb.event.HeartbeatEvent", time=0.0))
+    pumped.wait()
+    elapsed: float = time.perf_counter() - start
+    stats: CallbackStats = client.get_callback_stats(slow_id)
+    print(
+        f"{dispatch:<8} max_pending {max_pending:>6}  pump {elapsed * 1000:8.1f} ms  "
+        f"dispatched {stats.dispatched:>6}  dropped {stats.dropped:>6}  pending {stats.pending:>6}  max lag {stats.max_lag * 1000:8.1f} ms"
+    )
+    client.stop_server()
+
+def main() -> None:
+    print(f"{EVENT_COUNT:,} TaskProgress events, callback takes {CALLBACK_TIME * 1000:.1f} ms")
+    measure("inline", EVENT_COUNT)
+    measure("ordered", EVENT_COUNT)
+    measure("pool", EVENT_COUNT)
+    measure("ordered", 100)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark of list results and columnar tables of recipe cache queries
+
+Usage: python3 benchmark/bench_columnar_results.py
+
+Payloads are unpickled like replies of bitbake server, and the memory kept after the payload is released is measured.
+"""
+
+import os
+import sys
+import time
+import pickle
+import tracemalloc
+
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+
+RECIPES: int = 50000
+
+def make_payloads() -> Dict[str, bytes]:
+    files: List[str] = [f"/PATH/TO/POKY/meta/recipes-core/recipe{i}/recipe{i}_1.{i % 10}.bb" for i in range(RECIPES)]
+    payloads: Dict[str, Any] = {
+        "getRecipes": [[f"recipe{i}", [files[i]]] for i in range(RECIPES)],
+        "getRecipeDepends": [[fn, [f"recipe{(i + 1) % RECIPES}", "glibc".upper().lower(), "gcc-runtime".upper().lower()]] for i, fn in enumerate(files)],
+        "getRecipeVersions": {fn: ("", f"1.{i % 10}", "r0") for i, fn in enumerate(files)},
+        "getBbFilePriority": {fn: 5 for fn in files},
+        "getDefaultPreference": {fn: 0 for fn in files},
+    }
+    # each string is a separate object after unpickling unless it was the same object in the server
+    return {name: pickle.dumps(payload) for name, payload in payloads.items()}
+
+def measure(blob: bytes, convert: Callable[[Any], Any]) -> Tuple[int, float]:
+    # memory kept by the result after the payload is released, and time of conversion, best of 5
+    tracemalloc.start()
+    ret: Any = pickle.loads(blob)
+    result: Any = convert(ret)
+    del ret
+    size: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    elapsed: float = float("inf")
+    for _ in range(5):
+        ret = pickle.loads(blob)
+        start: float = time.perf_counter()
+        result = convert(ret)
+        elapsed = min(elapsed, time.perf_counter() - start)
+        del ret, result
+    return size, elapsed
+
+def measure_query(run: Callable[[], int]) -> float:
+    elapsed: float = float("inf")
+    for _ in range(5):
+        start: float = time.perf_counter()
+        run()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+def main() -> None:
+    payloads: Dict[str, bytes] = make_payloads()
+    commands: List[Tuple[str, Callable[[Any], Any], Callable[[Any], Any]]] = [
+        ("getRecipes", GetRecipesResult._make_all, lambda ret: ColumnarTable.from_lists(GetRecipesResult, ret)),
+        ("getRecipeDepends", GetRecipeDependsResult._make_all, lambda ret: ColumnarTable.from_lists(GetRecipeDependsResult, ret)),
+        ("getRecipeVersions", lambda ret: GetRecipeVersionsResult._make_all((key, *value) for key, value in ret.items()), ColumnarTable.from_recipe_versions),
+        ("getBbFilePriority", lambda ret: GetBbFilePriorityResult._make_all(ret.items()), lambda ret: ColumnarTable.from_mapping(GetBbFilePriorityResult, ret)),
+        ("getDefaultPreference", lambda ret: GetDefaultPreferenceResult._make_all(ret.items()), lambda ret: ColumnarTable.from_mapping(GetDefaultPreferenceResult, ret)),
+    ]
+    print(f"{RECIPES:,} recipes, memory kept after the payload is released")
+    total_list: int = 0
+    total_table: int = 0
+    for name, to_list, to_table in commands:
+        list_size, list_time = measure(payloads[name], to_list)
+        table_size, table_time = measure(payloads[name], to_table)
+        total_list += list_size
+        total_table += table_size
+        print(
+            f"{name:<22} list {list_size / 1024 / 1024:6.2f} MiB {list_time * 1e3:6.1f} ms   "
+            f"columnar {table_size / 1024 / 1024:6.2f} MiB {table_time * 1e3:6.1f} ms ({1 - table_size / list_size:4.0%} less)"
+        )
+    print(f"{'total':<22} list {total_list / 1024 / 1024:6.2f} MiB          columnar {total_table / 1024 / 1024:6.2f} MiB ({1 - total_table / total_list:4.0%} less)")
+
+    depends: List[GetRecipeDependsResult] = GetRecipeDependsResult._make_all(pickle.loads(payloads["getRecipeDepends"]))
+    table: ColumnarTable = ColumnarTable.from_lists(GetRecipeDependsResult, pickle.loads(payloads["getRecipeDepends"]))
+    list_time = measure_query(lambda: sum("glibc" in result.depend_package_names for result in depends))
+    table_time = measure_query(lambda: table.columns["depend_package_names"].count(table.code_of("glibc")))
+    print(f"{'recipes depending glibc':<22} list {list_time * 1e3:6.1f} ms   columnar {table_time * 1e3:6.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Benchmark of async commands sent from several threads of one BBClient against a local fake server
+
+Usage: python3 benchmark/bench_command_queue.py
+"""
+
+import os
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import FakeServerConnection, install_fake_server
+
+THREADS: int = 8
+COMMANDS_PER_THREAD: int = 25
+
+def measure(command_duration: float) -> None:
+    install_fake_server(BBClient, lambda: FakeServerConnection(command_durations={"buildTargets": command_duration}))
+    client: BBClient = BBClient(".", env_cache_dir=None)
+    client.start_server()
+    def send(_: int) -> List[CommandFuture]:
+        return [client.build_targets_async(["busybox"], "fetch") for _ in range(COMMANDS_PER_THREAD)]
+    start: float = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as executor:
+        futures: List[CommandFuture] = [future for futures in executor.map(send, range(THREADS)) for future in futures]
+    results: List[BBEventBase] = [future.result(timeout=60) for future in futures]
+    elapsed: float = time.perf_counter() - start
+    client.stop_server()
+    completed: int = sum(1 for result in results if isinstance(result, CommandCompletedEvent))
+    distinct: int = len({id(result) for result in results})
+    ids: int = len({future.command_id for future in futures})
+    print(
+        f"duration {command_duration * 1000:5.1f} ms: {len(futures)} commands, {completed} completed, "
+        f"{distinct} distinct completion events, {ids} distinct ids, "
+        f"overhead {(elapsed - command_duration * len(futures)) / len(futures) * 1000:7.3f} ms/command"
+    )
+
+def main() -> None:
+    measure(0.0)
+    measure(0.001)
+
+if __name__ == "__main__":
+    main()
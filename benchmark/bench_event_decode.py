@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark of decoding events from bitbake server to bbevent classes
+
+Usage: python3 benchmark/bench_event_decode.py [number of events]
+"""
+
+import os
+import sys
+import time
+import threading
+
+from typing import Any, Callable, Iterable, List, Optional, Type
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import FakeServerConnection, install_fake_server, make_event
+
+EVENT_COUNT: int = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+class RunQueueStats:
+    def __init__(self: "RunQueueStats") -> None:
+        self.completed: int = 10
+        self.skipped: int = 2
+        self.failed: int = 0
+        self.active: int = 4
+        self.total: int = 100
+
+def make_samples() -> List[Any]:
+    task: dict = {"_task": "do_compile", "_fn": "/poky/meta/recipes-core/busybox/busybox_1.35.0.bb", "_package": "busybox", "_mc": "", "taskfile": "", "taskname": "do_compile", "logfile": "", "time": 0.0, "pn": "busybox", "pv": "1.35.0", "_message": ""}
+    run_queue: dict = {"taskid": 1, "taskstring": "busybox:do_compile", "taskname": "do_compile", "taskfile": task["_fn"], "taskhash": "0" * 64, "stats": RunQueueStats()}
+    # roughly the mix of events during a build. LogRecord is the most frequent and the last one of ALL_BB_EVENTS.
+    return [
+        make_event("logging.LogRecord", msg="NOTE: Running task", levelno=20),
+        make_event("logging.LogRecord", msg="DEBUG: Executing python function", levelno=10),
+        make_event("logging.LogRecord", msg="DEBUG: Python function finished", levelno=10),
+        make_event("logging.LogRecord", msg="DEBUG: Executing shell function", levelno=10),
+        make_event("bb.build.TaskProgress", progress=50, rate="", **task),
+        make_event("bb.build.TaskProgress", progress=60, rate="", **task),
+        make_event("bb.build.TaskStarted", taskflags={}, **task),
+        make_event("bb.build.TaskSucceeded", **task),
+        make_event("bb.runqueue.runQueueTaskStarted", noexec=False, **run_queue),
+        make_event("bb.runqueue.runQueueTaskCompleted", **run_queue),
+        make_event("bb.event.ProcessProgress", processname="Parsing recipes", progress=10),
+        make_event("bb.event.HeartbeatEvent", time=0.0),
+        make_event("bb.event.MultipleProviders", _item="virtual/kernel", _candidates=[]),
+    ]
+
+def legacy_decode(cur_event: Any) -> BBEventBase:
+    # the behavior before the dispatch table
+    cur_event_name: str = str(type(cur_event))[8:-2]
+    itr: Iterable = filter(lambda x: x.is_target(cur_event_name), ALL_BB_EVENTS)
+    event_class: Optional[Type[BBEventBase]] = next(itr, None)
+    return event_class(cur_event.__dict__) if event_class else UnknownEvent(cur_event_name, cur_event.__dict__)
+
+def registry_decode(cur_event: Any) -> BBEventBase:
+    cur_event_name, event_class = get_event_class(type(cur_event))
+    return event_class(cur_event.__dict__) if event_class else UnknownEvent(cur_event_name, cur_event.__dict__)
+
+def lazy_decode(cur_event: Any) -> BBEventBase:
+    cur_event_name, event_class = get_event_class(type(cur_event))
+    if event_class:
+        return event_class.decode_lazily(None, cur_event.__dict__)
+    return UnknownEvent.decode_lazily(None, cur_event_name, cur_event.__dict__)
+
+def lazy_decode_and_access(cur_event: Any) -> Any:
+    return lazy_decode(cur_event).pid
+
+def legacy_lookup(cur_event: Any) -> Optional[Type[BBEventBase]]:
+    cur_event_name: str = str(type(cur_event))[8:-2]
+    return next(filter(lambda x: x.is_target(cur_event_name), ALL_BB_EVENTS), None)
+
+def registry_lookup(cur_event: Any) -> Optional[Type[BBEventBase]]:
+    return get_event_class(type(cur_event))[1]
+
+def measure(name: str, decode: Callable[[Any], Any], samples: List[Any]) -> float:
+    sample_count: int = len(samples)
+    start: float = time.perf_counter()
+    for index in range(EVENT_COUNT):
+        decode(samples[index % sample_count])
+    elapsed: float = time.perf_counter() - start
+    print(f"{name:<32} {elapsed:8.3f} s  {EVENT_COUNT / elapsed:12,.0f} events/s")
+    return elapsed
+
+def measure_client(name: str, dispatch: Optional[str], samples: List[Any]) -> None:
+    def make_server() -> FakeServerConnection:
+        # queue all the events before the event monitor thread starts, so only the pump is measured
+        server: FakeServerConnection = FakeServerConnection()
+        sample_count: int = len(samples)
+        for index in range(EVENT_COUNT):
+            server.events.put(samples[index % sample_count])
+        server.events.put(make_event("bb.event.ConfigParsed"))
+        return server
+    install_fake_server(BBClient, make_server)
+    client: BBClient = BBClient(".", env_cache_dir=None)
+    if dispatch:
+        for event_class in ALL_BB_EVENTS + [UnknownEvent]:
+            if event_class != ConfigParsedEvent:
+                client.register_callback(event_class, lambda client, event: None, dispatch=dispatch, max_pending=EVENT_COUNT)
+    pumped: threading.Event = threading.Event()
+    client.register_callback(ConfigParsedEvent, lambda client, event: pumped.set())
+    start: float = time.perf_counter()
+    client.start_server(parse="never")
+    pumped.wait()
+    elapsed: float = time.perf_counter() - start
+    stats: EventDecodeStats = client.get_event_decode_stats()
+    print(
+        f"{name:<32} {elapsed:8.3f} s  {EVENT_COUNT / elapsed:12,.0f} events/s  "
+        f"skipped {stats.skipped:>9,}  decoded {stats.decoded:>9,}  {stats.time_per_event * 1e6:6.2f} us/event"
+    )
+    client.stop_server()
+
+def main() -> None:
+    samples: List[Any] = make_samples()
+    print(f"{EVENT_COUNT:,} events, {len(ALL_BB_EVENTS)} event classes")
+    legacy: float = measure("class lookup, linear filter", legacy_lookup, samples)
+    registry: float = measure("class lookup, registry", registry_lookup, samples)
+    print(f"lookup speedup: {legacy / registry:.1f}x")
+    legacy = measure("full decode, linear filter", legacy_decode, samples)
+    registry = measure("full decode, registry", registry_decode, samples)
+    print(f"decode speedup: {legacy / registry:.1f}x")
+    lazy: float = measure("lazy decode, not accessed", lazy_decode, samples)
+    print(f"lazy decode speedup: {legacy / lazy:.1f}x")
+    measure("lazy decode, accessed", lazy_decode_and_access, samples)
+    measure_client("pump, no subscriber", None, samples)
+    measure_client("pump, inline subscribers", "inline", samples)
+    measure_client("pump, ordered subscribers", "ordered", samples)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark of EventJournal against a local fake server
+
+Usage: python3 benchmark/bench_event_journal.py
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import FakeServerConnection, install_fake_server, make_event
+
+EVENT_COUNT: int = 200000
+MAX_BYTES: int = 8 * 1024 * 1024
+
+def make_samples() -> List[Any]:
+    stats: Any = make_event("bb.runqueue.RunQueueStats", completed=10, skipped=0, failed=0, active=4, total=1000, setscene_covered=0, setscene_notcovered=0)
+    task: Dict[str, Any] = {"_package": "busybox", "_fn": "/poky/meta/recipes-core/busybox/busybox_1.36.1.bb", "taskfile": "busybox_1.36.1.bb", "taskname": "do_compile", "logfile": "log.do_compile", "time": 0.0, "pn": "busybox", "pv": "1.36.1", "_task": "do_compile", "_mc": "", "_message": None}
+    return [
+        make_event("bb.build.TaskStarted", pid=100, taskflags={"cleandirs": "${B}"}, **task),
+        make_event("bb.build.TaskProgress", pid=100, progress=50, rate=""),
+        make_event("bb.build.TaskProgress", pid=100, progress=60, rate=""),
+        make_event("bb.runqueue.runQueueTaskStarted", pid=1, taskid=1, taskstring="busybox:do_compile", taskname="do_compile", taskfile="busybox_1.36.1.bb", taskhash="0" * 64, stats=stats, noexec=False),
+        make_event("bb.build.TaskSucceeded", pid=100, **task),
+    ]
+
+def measure_pump(name: str, journal: Optional[EventJournal], samples: List[Any]) -> float:
+    def make_server() -> FakeServerConnection:
+        server: FakeServerConnection = FakeServerConnection()
+        for index in range(EVENT_COUNT):
+            server.events.put(samples[index % len(samples)])
+        server.events.put(make_event("bb.event.ConfigParsed"))
+        return server
+    install_fake_server(BBClient, make_server)
+    client: BBClient = BBClient(".", env_cache_dir=None)
+    if journal:
+        client.set_journal(journal)
+    pumped: threading.Event = threading.Event()
+    client.register_callback(ConfigParsedEvent, lambda client, event: pumped.set())
+    start: float = time.perf_counter()
+    client.start_server(parse="never")
+    pumped.wait()
+    elapsed: float = time.perf_counter() - start
+    client.stop_server()
+    if journal:
+        journal.close()
+    print(f"{name:<36} {elapsed:7.3f} s  {EVENT_COUNT / elapsed:10,.0f} events/s")
+    return elapsed
+
+def directory_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, file_name)) for file_name in os.listdir(directory))
+
+def main() -> None:
+    samples: List[Any] = make_samples()
+    work_dir: str = tempfile.mkdtemp()
+    try:
+        print(f"{EVENT_COUNT:,} events")
+        measure_pump("pump, no journal", None, samples)
+        plain_dir: str = os.path.join(work_dir, "plain")
+        measure_pump("pump, journal", EventJournal(plain_dir, MAX_BYTES, compress=False), samples)
+        compressed_dir: str = os.path.join(work_dir, "compressed")
+        measure_pump("pump, journal + rotation + gzip", EventJournal(compressed_dir, MAX_BYTES), samples)
+        print(f"journal size: plain {directory_size(plain_dir) / EVENT_COUNT:6.1f} bytes/event  gzip {directory_size(compressed_dir) / EVENT_COUNT:6.1f} bytes/event  files {len(os.listdir(compressed_dir)) - 1}")
+        reader: JournalReader = JournalReader(compressed_dir)
+        start: float = time.perf_counter()
+        read_count: int = sum(1 for _ in reader.read())
+        print(f"{'read all':<36} {time.perf_counter() - start:7.3f} s  {read_count:,} events")
+        counts: Dict[str, int] = {}
+        reader.register_callback(TaskBase, lambda _, event: counts.__setitem__(event.taskname, counts.get(event.taskname, 0) + 1), include_subclasses=True)
+        start = time.perf_counter()
+        replayed: int = reader.replay()
+        print(f"{'replay TaskBase callbacks':<36} {time.perf_counter() - start:7.3f} s  {replayed:,} events")
+        segments: List[JournalSegment] = reader.get_segments()
+        middle: JournalSegment = segments[len(segments) // 2]
+        start = time.perf_counter()
+        ranged: int = sum(1 for _ in reader.read(start=middle.first_time, end=middle.last_time))
+        print(f"{'read one file by time index':<36} {time.perf_counter() - start:7.3f} s  {ranged:,} events")
+        start = time.perf_counter()
+        failed: int = sum(1 for _ in reader.read([TaskFailedEvent]))
+        print(f"{'read TaskFailed by type index':<36} {time.perf_counter() - start:7.3f} s  {failed:,} events")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
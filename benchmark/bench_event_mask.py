@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark of events sent by the server with event_mask="all" and "subscribed"
+
+Usage: python3 benchmark/bench_event_mask.py [number of tasks]
+"""
+
+import os
+import sys
+import time
+import threading
+
+from typing import Any, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import FakeServerConnection, install_fake_server, make_event
+
+TASK_COUNT: int = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+class RunQueueStats:
+    def __init__(self: "RunQueueStats") -> None:
+        self.completed: int = 0
+        self.skipped: int = 0
+        self.failed: int = 0
+        self.active: int = 1
+        self.total: int = TASK_COUNT
+
+def make_task_events(index: int) -> List[Any]:
+    # events bitbake sends for a task
+    task: dict = {"_task": "do_compile", "_fn": f"/poky/meta/recipe_{index}.bb", "_package": f"recipe-{index}", "_mc": "", "taskfile": "", "taskname": "do_compile", "logfile": "", "time": 0.0, "pn": f"recipe-{index}", "pv": "1.0", "_message": ""}
+    run_queue: dict = {"taskid": index, "taskstring": f"recipe-{index}:do_compile", "taskname": "do_compile", "taskfile": task["_fn"], "taskhash": "0" * 64, "stats": RunQueueStats()}
+    return [
+        make_event("bb.runqueue.runQueueTaskStarted", noexec=False, **run_queue),
+        make_event("bb.build.TaskStarted", taskflags={}, **task),
+        make_event("logging.LogRecord", msg="Executing python function", levelno=10),
+        make_event("logging.LogRecord", msg="Python function finished", levelno=10),
+        make_event("logging.LogRecord", msg="Running task", levelno=20),
+        make_event("bb.build.TaskProgress", progress=50, rate="", **task),
+        make_event("bb.build.TaskProgress", progress=100, rate="", **task),
+        make_event("bb.build.TaskSucceeded", **task),
+        make_event("bb.runqueue.runQueueTaskCompleted", **run_queue),
+    ]
+
+def measure(event_mask: str, events: List[Any]) -> None:
+    servers: List[FakeServerConnection] = []
+    def make_server() -> FakeServerConnection:
+        servers.append(FakeServerConnection())
+        return servers[-1]
+    install_fake_server(BBClient, make_server)
+    client: BBClient = BBClient(".", env_cache_dir=None)
+    completed: List[int] = [0]
+    client.register_callback(runQueueEvent, lambda client, event: completed.__setitem__(0, completed[0] + 1), include_subclasses=True)
+    pumped: threading.Event = threading.Event()
+    client.register_callback(CommandCompletedEvent, lambda client, event: pumped.set())
+    client.start_server(parse="never", event_mask=event_mask)
+    start: float = time.perf_counter()
+    for event in events:
+        servers[-1].events.put(event)
+    servers[-1].events.put(make_event("bb.command.CommandCompleted"))
+    pumped.wait()
+    elapsed: float = time.perf_counter() - start
+    stats: EventDecodeStats = client.get_event_decode_stats()
+    print(
+        f"event_mask={event_mask:<12} {elapsed * 1000:8.1f} ms  sent {servers[-1].events.sent_count:>8,}  "
+        f"filtered by server {servers[-1].events.filtered_count:>8,}  skipped by client {stats.skipped:>8,}  runQueue events {completed[0]:>7,}"
+    )
+    client.stop_server()
+
+def main() -> None:
+    events: List[Any] = [event for index in range(TASK_COUNT) for event in make_task_events(index)]
+    print(f"{TASK_COUNT:,} tasks, {len(events):,} events, a callback for runQueueEvent and its subclasses")
+    measure("all", events)
+    measure("subscribed", events)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark of memory used by buffered events
+
+Usage: python3 benchmark/bench_event_memory.py
+"""
+
+import os
+import sys
+import tracemalloc
+
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import make_event
+
+EVENT_COUNT: int = 100000
+
+class LegacyEvent:
+    # layout before __slots__: attributes in __dict__ and event_name in each event
+    def __init__(self: "LegacyEvent", event: BBEventBase) -> None:
+        self.event_name: str = event.event_name
+        for name, value in str_fields(event).items():
+            setattr(self, name, value)
+
+def str_fields(event: BBEventBase) -> Dict[str, Any]:
+    return {name: getattr(event, name) for name in dir(event) if not name.startswith("_") and name not in ("event_name", "EVENT_NAME") and not callable(getattr(event, name))}
+
+def make_samples() -> List[Tuple[Type[BBEventBase], Dict[str, Any]]]:
+    task: Dict[str, Any] = {"_package": "busybox", "_fn": "/poky/meta/recipes-core/busybox/busybox_1.36.1.bb", "taskfile": "busybox_1.36.1.bb", "taskname": "do_compile", "logfile": "log.do_compile", "time": 0.0, "pn": "busybox", "pv": "1.36.1", "_task": "do_compile", "_mc": "", "_message": None}
+    stats: Any = make_event("bb.runqueue.RunQueueStats", completed=10, skipped=0, failed=0, active=4, total=1000, setscene_covered=0, setscene_notcovered=0)
+    run_queue: Dict[str, Any] = {"taskid": 1, "taskstring": "busybox:do_compile", "taskname": "do_compile", "taskfile": "busybox_1.36.1.bb", "taskhash": "0" * 64, "stats": stats}
+    return [
+        (TaskStartedEvent, dict(task, pid=100, taskflags={})),
+        (TaskSucceededEvent, dict(task, pid=100)),
+        (TaskProgressEvent, {"pid": 100, "progress": 50, "rate": ""}),
+        (runQueueTaskStartedEvent, dict(run_queue, pid=1, noexec=False)),
+        (runQueueTaskCompletedEvent, dict(run_queue, pid=1)),
+        (ProcessProgressEvent, {"pid": 1, "processname": "Parsing recipes", "progress": 10}),
+    ]
+
+def measure(make: Callable[[Type[BBEventBase], Dict[str, Any]], Any], event_type: Type[BBEventBase], data: Dict[str, Any]) -> float:
+    tracemalloc.start()
+    before: int = tracemalloc.get_traced_memory()[0]
+    events: List[Any] = [make(event_type, data) for _ in range(EVENT_COUNT)]
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del events
+    return (after - before) / EVENT_COUNT
+
+def main() -> None:
+    print(f"{EVENT_COUNT:,} buffered events of each type")
+    total_legacy: float = 0.0
+    total_slots: float = 0.0
+    for event_type, data in make_samples():
+        # one legacy class for each event type like the classes before __slots__, so that instances share dict keys
+        legacy_type: Type[LegacyEvent] = type("Legacy" + event_type.__name__, (LegacyEvent,), {})
+        legacy: float = measure(lambda event_type, data: legacy_type(event_type.decode(None, data)), event_type, data)
+        slots: float = measure(lambda event_type, data: event_type.decode(None, data), event_type, data)
+        total_legacy += legacy
+        total_slots += slots
+        print(f"{event_type.__name__:<28} __dict__ {legacy:7.1f} bytes/event  __slots__ {slots:7.1f} bytes/event  {legacy / slots:5.2f}x")
+    print(f"{'average':<28} __dict__ {total_legacy / 6:7.1f} bytes/event  __slots__ {total_slots / 6:7.1f} bytes/event  {total_legacy / total_slots:5.2f}x")
+
+if __name__ == "__main__":
+    main()
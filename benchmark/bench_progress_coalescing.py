@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark of coalescing progress events against a local fake server
+
+Usage: python3 benchmark/bench_progress_coalescing.py
+"""
+
+import os
+import sys
+import time
+import threading
+
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import FakeServerConnection, install_fake_server, make_event
+
+WORKERS: int = 8
+TASKS_PER_WORKER: int = 20
+PROGRESS_PER_TASK: int = 500
+PROGRESS_INTERVAL: float = 0.00002
+
+def task_event(event_name: str, pid: int, task: int, **fields: Any) -> Any:
+    return make_event(event_name, pid=pid, taskname=f"do_task{task}", _package=f"recipe{pid}", taskfile="f.bb", logfile="log", time=0, taskflags={}, **fields)
+
+def feed(server: FakeServerConnection) -> None:
+    for task in range(TASKS_PER_WORKER):
+        for pid in range(1, WORKERS + 1):
+            server.events.put(task_event("bb.build.TaskStarted", pid, task))
+        for progress in range(PROGRESS_PER_TASK):
+            for pid in range(1, WORKERS + 1):
+                server.events.put(make_event("bb.build.TaskProgress", pid=pid, progress=progress * 100 // (PROGRESS_PER_TASK - 1), rate=""))
+            time.sleep(PROGRESS_INTERVAL)
+        for pid in range(1, WORKERS + 1):
+            server.events.put(task_event("bb.build.TaskSucceeded", pid, task))
+    server.events.put(make_event("bb.event.ConfigParsed"))
+
+def measure(name: str, progress_window: Optional[float]) -> None:
+    servers: List[FakeServerConnection] = []
+    def make_server() -> FakeServerConnection:
+        servers.append(FakeServerConnection())
+        return servers[-1]
+    install_fake_server(BBClient, make_server)
+    client: BBClient = BBClient(".", env_cache_dir=None)
+    counts: Dict[str, int] = {"progress": 0, "succeeded": 0, "out_of_order": 0}
+    last_progress: Dict[int, int] = {}
+    def on_progress(_: BBClient, event: TaskProgressEvent) -> None:
+        counts["progress"] += 1
+        last_progress[event.pid] = event.progress
+    def on_succeeded(_: BBClient, event: TaskSucceededEvent) -> None:
+        counts["succeeded"] += 1
+        if last_progress.get(event.pid) != 100:
+            counts["out_of_order"] += 1
+        last_progress[event.pid] = -1
+    done: threading.Event = threading.Event()
+    client.register_callback(TaskProgressEvent, on_progress)
+    client.register_callback(TaskSucceededEvent, on_succeeded)
+    client.register_callback(ConfigParsedEvent, lambda client, event: done.set())
+    client.start_server(parse="never", progress_window=progress_window)
+    cpu_start: float = time.thread_time()
+    process_start: float = time.process_time()
+    start: float = time.perf_counter()
+    feeder_cpu: List[float] = []
+    def run_feed() -> None:
+        feeder_start: float = time.thread_time()
+        feed(servers[0])
+        feeder_cpu.append(time.thread_time() - feeder_start)
+    feeder: threading.Thread = threading.Thread(target=run_feed)
+    feeder.start()
+    done.wait()
+    feeder.join()
+    elapsed: float = time.perf_counter() - start
+    client_cpu: float = time.process_time() - process_start - (time.thread_time() - cpu_start) - feeder_cpu[0]
+    stats: EventDecodeStats = client.get_event_decode_stats()
+    client.stop_server()
+    print(
+        f"{name:<24} {elapsed:6.2f} s  received {stats.received:>8,}  decoded {stats.decoded:>8,}  coalesced {stats.coalesced:>8,}  "
+        f"progress callbacks {counts['progress']:>8,}  succeeded {counts['succeeded']:>4}  progress after finish {counts['out_of_order']}  "
+        f"client cpu {client_cpu:5.2f} s"
+    )
+
+def main() -> None:
+    print(f"{WORKERS} workers x {TASKS_PER_WORKER} tasks x {PROGRESS_PER_TASK} progress events")
+    measure("no coalescing", None)
+    measure("window 0.1 s", 0.1)
+    measure("window 0.5 s", 0.5)
+
+if __name__ == "__main__":
+    main()
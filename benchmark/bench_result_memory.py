@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark of memory and construction time of bbcommon result classes
+
+Usage: python3 benchmark/bench_result_memory.py
+
+The previous result classes are loaded from git to compare with. The default revision is the parent of the commit which added this benchmark, the last one with the classes having __dict__. argv[1] overrides it.
+"""
+
+import os
+import sys
+import time
+import types
+import subprocess
+import tracemalloc
+
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+
+RECIPES: int = 50000
+
+def get_baseline_revision() -> str:
+    # the commit which changed the result classes added this file, so its parent has the previous classes
+    added: str = subprocess.check_output(
+        ["git", "log", "--diff-filter=A", "--format=%H", "--", os.path.basename(__file__)], cwd=os.path.dirname(os.path.abspath(__file__)), text=True
+    ).split()[-1]
+    return added + "^"
+
+def load_legacy(revision: str) -> types.ModuleType:
+    source: str = subprocess.check_output(["git", "show", f"{revision}:bbclient/bbcommon.py"], cwd=os.path.dirname(os.path.abspath(__file__)), text=True)
+    module: types.ModuleType = types.ModuleType("legacy_bbcommon")
+    exec(compile(source, "legacy_bbcommon.py", "exec"), module.__dict__)
+    return module
+
+def make_payloads() -> Dict[str, Any]:
+    # shaped like the replies of bitbake server. Strings are shared with the payload, as they are after unpickling.
+    files: List[str] = [f"/PATH/TO/POKY/meta/recipes-core/recipe{i}/recipe{i}_1.{i % 10}.bb" for i in range(RECIPES)]
+    return {
+        "getRecipeVersions": {fn: ("", f"1.{i % 10}", "r0") for i, fn in enumerate(files)},
+        "getRecipeDepends": [(fn, [f"recipe{(i + 1) % RECIPES}", "glibc", "gcc-runtime"]) for i, fn in enumerate(files)],
+        "getRuntimeDepends": [(fn, {f"recipe{i}": ["glibc"], f"recipe{i}-dev": [f"recipe{i}"]}) for i, fn in enumerate(files)],
+        "getBbFilePriority": {fn: 5 for fn in files},
+        "getRecipeInherits": {fn: ["/PATH/TO/POKY/meta/classes/base.bbclass"] for fn in files},
+    }
+
+def measure(convert: Callable[[], List[Any]]) -> Tuple[int, float]:
+    # memory with tracemalloc, and time without it, best of 5
+    tracemalloc.start()
+    results: List[Any] = convert()
+    size: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results
+    elapsed: float = float("inf")
+    for _ in range(5):
+        start: float = time.perf_counter()
+        results = convert()
+        elapsed = min(elapsed, time.perf_counter() - start)
+        del results
+    return size, elapsed
+
+def main() -> None:
+    legacy: types.ModuleType = load_legacy(sys.argv[1] if len(sys.argv) > 1 else get_baseline_revision())
+    payloads: Dict[str, Any] = make_payloads()
+    commands: List[Tuple[str, Callable[[Any], List[Any]], Callable[[Any], List[Any]]]] = [
+        ("getRecipeVersions", lambda ret: [legacy.GetRecipeVersionsResult(value, key) for key, value in ret.items()],
+            lambda ret: GetRecipeVersionsResult._make_all((key, *value) for key, value in ret.items())),
+        ("getRecipeDepends", lambda ret: [legacy.GetRecipeDependsResult(recipe_file) for recipe_file in ret],
+            lambda ret: GetRecipeDependsResult._make_all(ret)),
+        ("getRuntimeDepends", lambda ret: [legacy.GetRuntimeDependsResult(*data) for data in ret],
+            lambda ret: GetRuntimeDependsResult._make_all(ret)),
+        ("getBbFilePriority", lambda ret: [legacy.GetBbFilePriorityResult(key, value) for key, value in ret.items()],
+            lambda ret: GetBbFilePriorityResult._make_all(ret.items())),
+        ("getRecipeInherits", lambda ret: [legacy.GetRecipeInheritsResult(key, value) for key, value in ret.items()],
+            lambda ret: GetRecipeInheritsResult._make_all(ret.items())),
+    ]
+    print(f"{RECIPES:,} recipes, memory allocated for the result list (payload excluded)")
+    total_before: int = 0
+    total_after: int = 0
+    for name, before, after in commands:
+        ret: Any = payloads[name]
+        before_size, before_time = measure(lambda: before(ret))
+        after_size, after_time = measure(lambda: after(ret))
+        total_before += before_size
+        total_after += after_size
+        print(
+            f"{name:<20} {before_size / 1024 / 1024:6.2f} MiB -> {after_size / 1024 / 1024:6.2f} MiB ({1 - after_size / before_size:4.0%} less)  "
+            f"{before_time * 1e3:6.1f} ms -> {after_time * 1e3:6.1f} ms"
+        )
+    print(f"{'total':<20} {total_before / 1024 / 1024:6.2f} MiB -> {total_after / 1024 / 1024:6.2f} MiB ({1 - total_after / total_before:4.0%} less)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark of SetsceneAnalyzer and SetsceneStore with a history of builds
+
+Usage: python3 benchmark/bench_sstate_store.py
+"""
+
+import os
+import sys
+import time
+import random
+import hashlib
+import tempfile
+
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import make_event
+
+BUILDS: int = 50
+RECIPES: int = 2000
+SETSCENE: List[str] = ["do_populate_sysroot", "do_package", "do_packagedata", "do_package_write_rpm", "do_populate_lic"]
+REAL: List[str] = ["do_fetch", "do_unpack", "do_patch", "do_configure", "do_compile", "do_install"]
+
+def make_events(build: int, rng: random.Random) -> List[BBEventBase]:
+    # 10% of the recipes change in each build. A few unchanged tasks miss sstate and run again.
+    events: List[BBEventBase] = []
+    stats: Any = make_event("bb.runqueue.RunQueueStats", total=RECIPES * len(SETSCENE))
+    def add(event_class: Any, recipe: int, task: str, **fields: Any) -> None:
+        version: int = build if recipe % 10 == build % 10 else 0
+        taskhash: str = hashlib.sha256(f"{recipe}:{task.replace('_setscene', '')}:{version}".encode()).hexdigest()
+        data: Dict[str, Any] = {"pid": 1, "taskid": 0, "taskstring": f"recipe{recipe}.bb:{task}", "taskname": task, "taskfile": f"/layers/recipe{recipe}.bb", "taskhash": taskhash, "stats": stats}
+        data.update(fields)
+        events.append(event_class.decode(None, data))
+    for recipe in range(RECIPES):
+        changed: bool = recipe % 10 == build % 10 or build == 0
+        for task in SETSCENE:
+            if changed or rng.random() < 0.01:
+                add(runQueueTaskStartedEvent, recipe, task, noexec=False)
+            else:
+                add(sceneQueueTaskStartedEvent, recipe, task + "_setscene", noexec=False)
+                add(sceneQueueTaskCompletedEvent, recipe, task + "_setscene")
+        for task in REAL:
+            if changed:
+                add(runQueueTaskStartedEvent, recipe, task, noexec=False)
+            else:
+                add(runQueueTaskSkippedEvent, recipe, task, reason="covered")
+    return events
+
+def main() -> None:
+    rng: random.Random = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path: str = os.path.join(directory, "sstate.db")
+        analyzer: SetsceneAnalyzer = SetsceneAnalyzer(SetsceneStore(path))
+        handle_time: float = 0.0
+        finish_time: float = 0.0
+        event_count: int = 0
+        for build in range(BUILDS):
+            events: List[BBEventBase] = make_events(build, rng)
+            event_count += len(events)
+            start: float = time.perf_counter()
+            for event in events:
+                analyzer.handle(None, event)
+            handle_time += time.perf_counter() - start
+            start = time.perf_counter()
+            analyzer.finish(f"build{build}")
+            finish_time += time.perf_counter() - start
+        print(f"{BUILDS} builds, {RECIPES * (len(SETSCENE) + len(REAL))} tasks per build")
+        print(f"handle  {handle_time / event_count * 1e6:6.2f} us/event")
+        print(f"finish  {finish_time / BUILDS * 1e3:6.1f} ms/build")
+        print(f"size    {os.path.getsize(path) / 1024 / 1024:6.1f} MiB")
+        store: SetsceneStore = analyzer.store
+        for label, query in [
+            ("get_builds(50)", lambda: store.get_builds(50)),
+            ("get_task_rates(50)", lambda: store.get_task_rates(50)),
+            ("get_recipe_rates(10)", lambda: store.get_recipe_rates(10)),
+            ("get_reexecuted()", lambda: store.get_reexecuted()),
+        ]:
+            start = time.perf_counter()
+            result: List[Any] = query()
+            print(f"{label:<22} {(time.perf_counter() - start) * 1e3:7.2f} ms  {len(result)} rows")
+        builds: List[BuildReuse] = store.get_builds(3)
+        for build_reuse in builds:
+            print(f"  {build_reuse.name} hit rate {build_reuse.hit_rate:.3f} reexecuted {build_reuse.reexecuted}")
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark of teardown latency of BBClient.stop_server against a local fake server
+
+Usage: python3 benchmark/bench_stop_server.py
+"""
+
+import os
+import sys
+import time
+
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import FakeServerConnection, install_fake_server
+
+REPEAT: int = 5
+
+def legacy_stop_server(client: BBClient) -> None:
+    # the behavior before the event-driven shutdown
+    client.state_shutdown()
+    time.sleep(1)
+    client.state_force_shutdown()
+    time.sleep(2)
+    client.stop_server()
+
+def measure(name: str, prepare: Callable[[BBClient], None], stop: Callable[[BBClient], None], shutdown_latency: float = 0.05) -> None:
+    install_fake_server(BBClient, lambda: FakeServerConnection(command_durations={"buildTargets": 60}, shutdown_latency=shutdown_latency))
+    latencies: List[float] = []
+    for _ in range(REPEAT):
+        client: BBClient = BBClient(".", env_cache_dir=None)
+        client.start_server()
+        prepare(client)
+        start: float = time.perf_counter()
+        stop(client)
+        latencies.append(time.perf_counter() - start)
+    print(f"{name:<48} mean {sum(latencies) / len(latencies) * 1000:9.1f} ms  max {max(latencies) * 1000:9.1f} ms")
+
+def main() -> None:
+    idle: Callable[[BBClient], None] = lambda client: None
+    busy: Callable[[BBClient], None] = lambda client: client.build_targets_async(["busybox"], "fetch")
+    measure("legacy, idle server", idle, legacy_stop_server)
+    measure("stop_server, idle server", idle, lambda client: client.stop_server())
+    measure("stop_server, running command", busy, lambda client: client.stop_server())
+    measure("stop_server, command ignores stateShutdown", busy, lambda client: client.stop_server(timeout=0.5), shutdown_latency=60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the symbol table shared by columnar results of recipe cache queries
+
+Usage: python3 benchmark/bench_symbol_table.py
+
+Six queries are converted from payloads unpickled like replies of bitbake server, and the memory kept by all the results is measured.
+"""
+
+import os
+import sys
+import time
+import pickle
+import tracemalloc
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+
+RECIPES: int = 50000
+CLASSES: List[str] = [f"/PATH/TO/POKY/meta/classes/class{i}.bbclass" for i in range(50)]
+
+def make_payloads() -> Dict[str, bytes]:
+    files: List[str] = [f"/PATH/TO/POKY/meta/recipes-core/recipe{i}/recipe{i}_1.{i % 10}.bb" for i in range(RECIPES)]
+    payloads: Dict[str, Any] = {
+        "getRecipeDepends": [[fn, [f"recipe{(i + 1) % RECIPES}", "glibc", "gcc-runtime"]] for i, fn in enumerate(files)],
+        "getRecipeVersions": {fn: ("", f"1.{i % 10}", "r0") for i, fn in enumerate(files)},
+        "getRecipeProvides": {fn: [f"recipe{i}", f"virtual/recipe{i}"] for i, fn in enumerate(files)},
+        "getRecipeInherits": {fn: [CLASSES[0], CLASSES[i % 50], CLASSES[(i * 7) % 50]] for i, fn in enumerate(files)},
+        "getBbFilePriority": {fn: i % 10 for i, fn in enumerate(files)},
+        "getAllAppends": [[f"recipe{i}_%.bbappend", f"/PATH/TO/LAYER/recipes/recipe{i}/recipe{i}_%.bbappend"] for i in range(0, RECIPES, 5)],
+    }
+    # strings are copied so that each payload has its own objects, like separate replies
+    return {name: pickle.dumps(pickle.loads(pickle.dumps(payload))) for name, payload in payloads.items()}
+
+def to_lists(ret: Dict[str, Any], _: Optional[SymbolTable]) -> Dict[str, Any]:
+    return {
+        "getRecipeDepends": GetRecipeDependsResult._make_all(ret["getRecipeDepends"]),
+        "getRecipeVersions": GetRecipeVersionsResult._make_all((key, *value) for key, value in ret["getRecipeVersions"].items()),
+        "getRecipeProvides": GetRecipeProvidesResult._make_all(ret["getRecipeProvides"].items()),
+        "getRecipeInherits": GetRecipeInheritsResult._make_all(ret["getRecipeInherits"].items()),
+        "getBbFilePriority": GetBbFilePriorityResult._make_all(ret["getBbFilePriority"].items()),
+        "getAllAppends": GetAllAppendsResult._make_all(ret["getAllAppends"]),
+    }
+
+def to_tables(ret: Dict[str, Any], symbols: Optional[SymbolTable]) -> Dict[str, Any]:
+    return {
+        "getRecipeDepends": ColumnarTable.from_lists(GetRecipeDependsResult, ret["getRecipeDepends"], symbols),
+        "getRecipeVersions": ColumnarTable.from_recipe_versions(ret["getRecipeVersions"], symbols),
+        "getRecipeProvides": ColumnarTable.from_lists(GetRecipeProvidesResult, ret["getRecipeProvides"].items(), symbols),
+        "getRecipeInherits": ColumnarTable.from_lists(GetRecipeInheritsResult, ret["getRecipeInherits"].items(), symbols),
+        "getBbFilePriority": ColumnarTable.from_mapping(GetBbFilePriorityResult, ret["getBbFilePriority"], symbols),
+        "getAllAppends": ColumnarTable.from_rows(GetAllAppendsResult, ret["getAllAppends"], symbols),
+    }
+
+def measure(payloads: Dict[str, bytes], convert: Callable[[Dict[str, Any], Optional[SymbolTable]], Dict[str, Any]], shared: bool) -> Tuple[int, float]:
+    # memory kept by all the results after the payloads are released, and time of conversion, best of 3
+    tracemalloc.start()
+    ret: Dict[str, Any] = {name: pickle.loads(blob) for name, blob in payloads.items()}
+    results: Dict[str, Any] = convert(ret, SymbolTable() if shared else None)
+    del ret
+    size: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results
+    elapsed: float = float("inf")
+    for _ in range(3):
+        ret = {name: pickle.loads(blob) for name, blob in payloads.items()}
+        start: float = time.perf_counter()
+        results = convert(ret, SymbolTable() if shared else None)
+        elapsed = min(elapsed, time.perf_counter() - start)
+        del ret, results
+    return size, elapsed
+
+def join_lists(results: Dict[str, Any]) -> int:
+    # total priority of recipes inheriting class1
+    priorities: Dict[str, int] = dict(results["getBbFilePriority"])
+    return sum(priorities[result.recipe_file_path] for result in results["getRecipeInherits"] if CLASSES[1] in result.inherit_file_paths)
+
+def join_tables(results: Dict[str, Any]) -> int:
+    priorities: ColumnarTable = results["getBbFilePriority"]
+    inherits: ColumnarTable = results["getRecipeInherits"]
+    by_recipe: Dict[int, int] = dict(zip(priorities.columns["recipe_file_path"], priorities.columns["priority"]))
+    target: Optional[int] = inherits.code_of(CLASSES[1])
+    offsets: Any = inherits.offsets["inherit_file_paths"]
+    classes: Any = inherits.columns["inherit_file_paths"]
+    recipes: Any = inherits.columns["recipe_file_path"]
+    return sum(by_recipe[recipes[row]] for row in range(len(inherits)) if target in classes[offsets[row]:offsets[row + 1]])
+
+def main() -> None:
+    payloads: Dict[str, bytes] = make_payloads()
+    print(f"{RECIPES:,} recipes, 6 queries, memory kept by all the results after the payloads are released")
+    sizes: Dict[str, int] = {}
+    for name, convert, shared in [("list results", to_lists, False), ("columnar, own symbols", to_tables, False), ("columnar, shared symbols", to_tables, True)]:
+        size, elapsed = measure(payloads, convert, shared)
+        sizes[name] = size
+        print(f"{name:<26} {size / 1024 / 1024:7.2f} MiB {elapsed * 1e3:7.1f} ms")
+    print(f"shared symbols use {1 - sizes['columnar, shared symbols'] / sizes['list results']:.0%} less memory than list results")
+
+    lists: Dict[str, Any] = to_lists({name: pickle.loads(blob) for name, blob in payloads.items()}, None)
+    tables: Dict[str, Any] = to_tables({name: pickle.loads(blob) for name, blob in payloads.items()}, SymbolTable())
+    assert join_lists(lists) == join_tables(tables)
+    for name, join, results in [("list results", join_lists, lists), ("columnar, shared symbols", join_tables, tables)]:
+        elapsed = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            join(results)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        print(f"join inherits x priority, {name:<26} {elapsed * 1e3:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark of TaskHashIndex with a history of builds
+
+Usage: python3 benchmark/bench_task_hash_index.py
+"""
+
+import os
+import sys
+import time
+import hashlib
+import tempfile
+
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import make_event
+
+BUILDS: int = 50
+RECIPES: int = 2000
+TASKS: List[str] = ["do_fetch", "do_unpack", "do_patch", "do_configure", "do_compile", "do_install", "do_package", "do_populate_sysroot", "do_packagedata", "do_package_write_rpm", "do_populate_lic"]
+
+def make_events(build: int) -> List[BBEventBase]:
+    # 10% of the recipes change in each build, and only they run
+    events: List[BBEventBase] = []
+    stats: Any = make_event("bb.runqueue.RunQueueStats", total=RECIPES * len(TASKS))
+    for recipe in range(RECIPES):
+        changed: bool = recipe % 10 == build % 10 or build == 0
+        version: int = build - (build - recipe) % 10 if build else 0
+        for task in TASKS:
+            data: Dict[str, Any] = {
+                "pid": 1, "taskid": 0, "taskstring": f"recipe{recipe}.bb:{task}", "taskname": task, "taskfile": f"/layers/recipe{recipe}.bb",
+                "taskhash": hashlib.sha256(f"{recipe}:{task}:{version}".encode()).hexdigest(), "stats": stats,
+            }
+            if changed:
+                events.append(runQueueTaskStartedEvent.decode(None, dict(data, noexec=False)))
+                events.append(TaskStartedEvent.decode(None, {"taskfile": data["taskfile"], "pn": f"recipe{recipe}", "_mc": "", "taskname": task, "taskflags": {}}))
+            else:
+                events.append(runQueueTaskSkippedEvent.decode(None, dict(data, reason="covered")))
+    return events
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path: str = os.path.join(directory, "taskhash.db")
+        index: TaskHashIndex = TaskHashIndex(path)
+        handle_time: float = 0.0
+        finish_time: float = 0.0
+        event_count: int = 0
+        for build in range(BUILDS):
+            events: List[BBEventBase] = make_events(build)
+            event_count += len(events)
+            start: float = time.perf_counter()
+            for event in events:
+                index.handle(None, event)
+            handle_time += time.perf_counter() - start
+            start = time.perf_counter()
+            index.finish(f"build{build}")
+            finish_time += time.perf_counter() - start
+        print(f"{BUILDS} builds, {RECIPES * len(TASKS)} tasks per build")
+        print(f"handle  {handle_time / event_count * 1e6:6.2f} us/event")
+        print(f"finish  {finish_time / BUILDS * 1e3:6.1f} ms/build")
+        print(f"size    {os.path.getsize(path) / 1024 / 1024:6.1f} MiB")
+        for label, query in [
+            ("get_builds()", lambda: index.get_builds()),
+            ("get_history()", lambda: index.get_history("/layers/recipe5.bb", "do_compile")),
+            ("get_changed_since(45)", lambda: index.get_changed_since(45)),
+            ("get_changed_since(1)", lambda: index.get_changed_since(1)),
+            ("explain_rebuild()", lambda: index.explain_rebuild("recipe9")),
+        ]:
+            start = time.perf_counter()
+            result: List[Any] = query()
+            print(f"{label:<24} {(time.perf_counter() - start) * 1e3:7.2f} ms  {len(result)} rows")
+        index.close()
+
+if __name__ == "__main__":
+    main()
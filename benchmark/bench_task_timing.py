@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark of TaskTimingAnalyzer event handling and report generation
+
+Usage: python3 benchmark/bench_task_timing.py
+"""
+
+import os
+import sys
+import time
+import heapq
+
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+
+RECIPE_COUNTS: List[int] = [100, 1000, 5000]
+TASKS: List[str] = ["do_fetch", "do_unpack", "do_patch", "do_configure", "do_compile", "do_install", "do_package", "do_populate_sysroot"]
+THREADS: int = 16
+
+def make_build(recipe_count: int) -> Tuple[List[BBEventBase], Dict[str, Any]]:
+    # each recipe is a chain of TASKS. do_configure depends on do_populate_sysroot of the parent recipe in a binary tree.
+    tdepends: Dict[str, List[str]] = {}
+    durations: Dict[str, float] = {}
+    for recipe in range(recipe_count):
+        for index, task in enumerate(TASKS):
+            name: str = f"recipe{recipe}.{task}"
+            depends: List[str] = [f"recipe{recipe}.{TASKS[index - 1]}"] if index else []
+            if task == "do_configure":
+                depends += [f"recipe{depend}.do_populate_sysroot" for depend in [(recipe - 1) // 2] if recipe]
+            tdepends[name] = depends
+            durations[name] = 60.0 if task == "do_compile" else 1.0 + recipe % 5
+    # list scheduling on THREADS workers
+    finish: Dict[str, float] = {}
+    workers: List[float] = [0.0] * THREADS
+    events: List[Tuple[float, int, BBEventBase]] = []
+    for name, depends in tdepends.items():
+        worker: float = heapq.heappop(workers)
+        start: float = max([worker] + [finish[depend] for depend in depends])
+        finish[name] = start + durations[name]
+        heapq.heappush(workers, finish[name])
+        pn, task = name.rsplit(".", 1)
+        data: Dict[str, Any] = {"pn": pn, "taskname": task, "taskfile": f"{pn}.bb", "logfile": "log", "taskflags": {}, "_mc": ""}
+        events.append((start, 1, TaskStartedEvent.decode(None, dict(data, time=start))))
+        events.append((finish[name], 0, TaskSucceededEvent.decode(None, dict(data, time=finish[name]))))
+    events.sort(key=lambda item: item[:2])
+    return [event for _, _, event in events], {"tdepends": tdepends}
+
+def main() -> None:
+    for recipe_count in RECIPE_COUNTS:
+        events, depgraph = make_build(recipe_count)
+        analyzer: TaskTimingAnalyzer = TaskTimingAnalyzer()
+        analyzer.set_dep_tree(depgraph)
+        start: float = time.perf_counter()
+        for event in events:
+            analyzer.handle(None, event)
+        handle_time: float = (time.perf_counter() - start) / len(events)
+        start = time.perf_counter()
+        report: TaskTimingReport = analyzer.report(bucket_width=60.0)
+        report_time: float = time.perf_counter() - start
+        print(
+            f"{recipe_count:>5} recipes {len(events):>6} events  handle {handle_time * 1e6:5.2f} us/event  report {report_time * 1e3:7.1f} ms  "
+            f"elapsed {report.elapsed:8.0f}s  critical path {report.critical_path_duration:8.0f}s ({len(report.critical_path)} tasks)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark of CPU time and wake-up latency while waiting for an event
+
+Usage: python3 benchmark/bench_wait_event.py
+"""
+
+import os
+import sys
+import time
+import threading
+
+from typing import Any, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bbclient import *
+from fakeserver import FakeEventQueue, FakeServerConnection, install_fake_server, make_event
+
+WAIT_TIME: float = 1.0
+REPEAT: int = 5
+
+def legacy_wait_event(events: FakeEventQueue, event_name: str) -> Any:
+    # the behavior before the fan-out hub: poll the server queue every 10ms
+    while True:
+        cur_event: Optional[Any] = events.waitEvent(0.01)
+        if cur_event and str(type(cur_event))[8:-2] == event_name:
+            return cur_event
+
+def measure(name: str, wait: Any, events: FakeEventQueue) -> None:
+    cpu_times: List[float] = []
+    latencies: List[float] = []
+    for _ in range(REPEAT):
+        sent_time: List[float] = [0.0]
+        def send() -> None:
+            time.sleep(WAIT_TIME)
+            sent_time[0] = time.perf_counter()
+            events.put(make_event("bb.event.ConfigParsed"))
+        sender: threading.Thread = threading.Thread(target=send)
+        cpu_start: float = time.process_time()
+        sender.start()
+        wait()
+        latencies.append(time.perf_counter() - sent_time[0])
+        cpu_times.append(time.process_time() - cpu_start)
+        sender.join()
+    print(
+        f"{name:<24} cpu while waiting {sum(cpu_times) / REPEAT * 1000:7.2f} ms/s  "
+        f"wake-up latency mean {sum(latencies) / REPEAT * 1000:6.2f} ms  max {max(latencies) * 1000:6.2f} ms"
+    )
+
+def main() -> None:
+    legacy_events: FakeEventQueue = FakeEventQueue()
+    measure("legacy 10ms polling", lambda: legacy_wait_event(legacy_events, "bb.event.ConfigParsed"), legacy_events)
+    servers: List[FakeServerConnection] = []
+    def make_server() -> FakeServerConnection:
+        servers.append(FakeServerConnection())
+        return servers[-1]
+    install_fake_server(BBClient, make_server)
+    client: BBClient = BBClient(".", env_cache_dir=None)
+    client.start_server(parse="never")
+    # the event monitor thread also waits on the same process, so its CPU time is included
+    measure("wait_event", lambda: client.wait_event([ConfigParsedEvent]), servers[-1].events)
+    client.stop_server()
+
+if __name__ == "__main__":
+    main()
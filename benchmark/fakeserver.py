@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+This file provides in-process fake of bitbake server connection for benchmarks
+"""
+
+import queue
+import threading
+import time
+
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Type
+
+ASYNC_COMMANDS: List[str] = [
+    "buildFile",
+    "buildTargets",
+    "generateDepTreeEvent",
+    "generateDotGraph",
+    "generateTargetsTree",
+    "findConfigFiles",
+    "findFilesMatchingInDir",
+    "testCookerCommandEvent",
+    "findConfigFilePath",
+    "showVersions",
+    "showEnvironmentTarget",
+    "showEnvironment",
+    "parseFiles",
+    "compareRevisions",
+    "triggerEvent",
+    "resetCooker",
+    "clientComplete",
+    "findSigInfo",
+]
+
+__event_classes: Dict[str, Type] = {}
+
+def make_event(event_name: str, **fields: Any) -> Any:
+    """Make an object which looks like bitbake event
+
+    Args:
+        event_name (str): event name like "bb.command.CommandCompleted"
+        fields (Any): attributes of the event
+
+    Returns:
+        Any: event object. str(type(event)) is "<class 'event_name'>".
+    """
+    event_class: Optional[Type] = __event_classes.get(event_name)
+    if not event_class:
+        module_name, class_name = event_name.rsplit(".", 1)
+        event_class = type(class_name, (object,), {"__module__": module_name})
+        __event_classes[event_name] = event_class
+    event: Any = event_class()
+    event.__dict__.update(fields)
+    if "pid" not in fields:
+        event.pid = 0
+    return event
+
+class FakeEventQueue:
+    """Fake of bb.server.process.BBUIEventQueue
+
+    Attributes:
+        sent_count (int): number of events sent to the client
+        filtered_count (int): number of events filtered by event mask and log level
+    """
+
+    def __init__(self: "FakeEventQueue") -> None:
+        self.sent_count: int = 0
+        self.filtered_count: int = 0
+        self.__queue: "queue.Queue[Any]" = queue.Queue()
+        self.__log_level: int = 0
+        self.__event_mask: List[str] = ["*"]
+
+    def set_event_mask(self: "FakeEventQueue", log_level: int, event_mask: List[str]) -> None:
+        self.__log_level = log_level
+        self.__event_mask = event_mask
+
+    def put(self: "FakeEventQueue", event: Any) -> None:
+        # same as bb.event.UIEventFilter
+        event_name: str = str(type(event))[8:-2]
+        if event_name == "logging.LogRecord":
+            is_sent: bool = getattr(event, "levelno", 0) >= self.__log_level
+        else:
+            is_sent = "*" in self.__event_mask or event_name in self.__event_mask
+        if not is_sent:
+            self.filtered_count += 1
+            return
+        self.sent_count += 1
+        self.__queue.put(event)
+
+    def waitEvent(self: "FakeEventQueue", delay: Optional[float]) -> Optional[Any]:
+        try:
+            return self.__queue.get(timeout=delay)
+        except queue.Empty:
+            return None
+
+class FakeConnectionWriter:
+    """Fake of bb.server.process.ConnectionWriter"""
+
+    def __init__(self: "FakeConnectionWriter", command_connection: "FakeCommandConnection") -> None:
+        self.__command_connection: "FakeCommandConnection" = command_connection
+
+    def send(self: "FakeConnectionWriter", commandline: List[Any]) -> None:
+        self.__command_connection.send(commandline)
+
+class FakeConnectionReader:
+    """Fake of bb.server.process.ConnectionReader"""
+
+    def __init__(self: "FakeConnectionReader", command_connection: "FakeCommandConnection") -> None:
+        self.__command_connection: "FakeCommandConnection" = command_connection
+
+    def poll(self: "FakeConnectionReader", timeout: Optional[float] = None) -> bool:
+        return True
+
+    def get(self: "FakeConnectionReader") -> Tuple[Any, Optional[str]]:
+        return self.__command_connection.receive()
+
+class FakeCommandConnection:
+    """Fake of bb.server.process.ServerCommunicator
+
+    Attributes:
+        round_trip_count (int): number of round trips. Commands sent back-to-back before receiving replies are counted as one round trip.
+        connection (Optional[FakeConnectionWriter]): command pipe. None if pipelining is disabled.
+        recv (Optional[FakeConnectionReader]): reply pipe. None if pipelining is disabled.
+    """
+
+    def __init__(
+        self: "FakeCommandConnection",
+        events: FakeEventQueue,
+        responses: Mapping[str, Any],
+        command_durations: Mapping[str, float],
+        shutdown_latency: float,
+        round_trip_latency: float,
+        pipelining: bool,
+    ) -> None:
+        self.round_trip_count: int = 0
+        self.connection: Optional[FakeConnectionWriter] = FakeConnectionWriter(self) if pipelining else None
+        self.recv: Optional[FakeConnectionReader] = FakeConnectionReader(self) if pipelining else None
+        self.__replies: "queue.Queue[Tuple[Any, Optional[str]]]" = queue.Queue()
+        self.__is_waiting_reply: bool = False
+        self.__events: FakeEventQueue = events
+        self.__responses: Mapping[str, Any] = responses
+        self.__command_durations: Mapping[str, float] = command_durations
+        self.__shutdown_latency: float = shutdown_latency
+        self.__round_trip_latency: float = round_trip_latency
+        self.__running_timer: Optional[threading.Timer] = None
+        self.__lock: threading.Lock = threading.Lock()
+
+    def runCommand(self: "FakeCommandConnection", commandline: List[Any]) -> Tuple[Any, Optional[str]]:
+        self.round_trip_count += 1
+        if self.__round_trip_latency:
+            time.sleep(self.__round_trip_latency)
+        return self.execute(commandline)
+
+    def send(self: "FakeCommandConnection", commandline: List[Any]) -> None:
+        self.__replies.put(self.execute(commandline))
+        self.__is_waiting_reply = True
+
+    def receive(self: "FakeCommandConnection") -> Tuple[Any, Optional[str]]:
+        if self.__is_waiting_reply:
+            self.round_trip_count += 1
+            self.__is_waiting_reply = False
+            if self.__round_trip_latency:
+                time.sleep(self.__round_trip_latency)
+        return self.__replies.get()
+
+    def execute(self: "FakeCommandConnection", commandline: List[Any]) -> Tuple[Any, Optional[str]]:
+        command: str = commandline[0]
+        if command in ASYNC_COMMANDS:
+            with self.__lock:
+                if self.__running_timer:
+                    return None, f"Busy ({command} in progress)"
+                self.__running_timer = self.__schedule_completion(self.__command_durations.get(command, 0.01), "bb.command.CommandCompleted")
+            return True, None
+        if command in ("stateShutdown", "stateForceShutdown"):
+            with self.__lock:
+                if self.__running_timer:
+                    self.__running_timer.cancel()
+                    latency: float = self.__shutdown_latency if command == "stateShutdown" else 0.0
+                    self.__running_timer = self.__schedule_completion(latency, "bb.command.CommandFailed", error="shutdown", exitcode=1)
+            return None, None
+        if command in self.__responses:
+            response: Any = self.__responses[command]
+            return (response(*commandline[1:]) if callable(response) else response), None
+        if command == "getUIHandlerNum":
+            return 1, None
+        if command == "setEventMask":
+            self.__events.set_event_mask(commandline[2], commandline[4])
+            return True, None
+        return None, None
+
+    def terminateServer(self: "FakeCommandConnection") -> None:
+        with self.__lock:
+            if self.__running_timer:
+                self.__running_timer.cancel()
+                self.__running_timer = None
+
+    def __schedule_completion(self: "FakeCommandConnection", delay: float, event_name: str, **fields: Any) -> threading.Timer:
+        def complete() -> None:
+            with self.__lock:
+                self.__running_timer = None
+            self.__events.put(make_event(event_name, **fields))
+        timer: threading.Timer = threading.Timer(delay, complete)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+class FakeServerConnection:
+    """Fake of bb.server.process.BitBakeProcessServerConnection
+
+    Attributes:
+        connection (FakeCommandConnection): command channel
+        events (FakeEventQueue): event channel
+    """
+
+    def __init__(
+        self: "FakeServerConnection",
+        responses: Optional[Mapping[str, Any]] = None,
+        command_durations: Optional[Mapping[str, float]] = None,
+        shutdown_latency: float = 0.05,
+        round_trip_latency: float = 0.0,
+        pipelining: bool = True,
+    ) -> None:
+        """Initialize
+
+        Args:
+            responses (Optional[Mapping[str, Any]]): command name and its result or function to make the result
+            command_durations (Optional[Mapping[str, float]]): async command name and time until it completes. Default is 0.01. (seconds)
+            shutdown_latency (float): time until running command stops by stateShutdown. (seconds)
+            round_trip_latency (float): time of each round trip. (seconds)
+            pipelining (bool): whether commands can be sent before receiving replies of previous ones
+        """
+        self.events: FakeEventQueue = FakeEventQueue()
+        self.connection: FakeCommandConnection = FakeCommandConnection(
+            self.events, responses or {}, command_durations or {}, shutdown_latency, round_trip_latency, pipelining
+        )
+
+    def terminate(self: "FakeServerConnection") -> None:
+        pass
+
+def install_fake_server(client_class: Type, server_factory: Callable[[], FakeServerConnection]) -> None:
+    """Make client_class connect to fake server instead of bitbake server
+
+    Args:
+        client_class (Type): BBClient
+        server_factory (Callable[[], FakeServerConnection]): function to make fake server
+    """
+    client_class._BBClient__connect_server = staticmethod(lambda project_path: server_factory())
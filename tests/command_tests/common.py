@@ -25,7 +25,6 @@ def main_client():
     PATH_TO_MAIN = CUR_FILE_PATH + "/../main"
     client: BBClient = BBClient(PATH_TO_MAIN, INIT_COMMAND)
     client.start_server()
-    client.parse_files()
     yield client
     client.stop_server()
 
@@ -34,7 +33,6 @@ def kirkstone_client():
     PATH_TO_KIRKSTONE = CUR_FILE_PATH + "/../kirkstone"
     client: BBClient = BBClient(PATH_TO_KIRKSTONE, INIT_COMMAND)
     client.start_server()
-    client.parse_files()
     yield client
     client.stop_server()
 
@@ -43,6 +41,5 @@ def dunfell_client():
     PATH_TO_DUNFELL = CUR_FILE_PATH + "/../dunfell"
     client: BBClient = BBClient(PATH_TO_DUNFELL, INIT_COMMAND)
     client.start_server()
-    client.parse_files()
     yield client
     client.stop_server()
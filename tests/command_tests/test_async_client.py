@@ -0,0 +1,24 @@
+from .common import * 
+from bbclient import *
+
+import asyncio
+
+def test_async_client_main() -> None:
+    asyncio.run(__test_impl(CUR_FILE_PATH + "/../main"))
+
+def test_async_client_kirkstone() -> None:
+    asyncio.run(__test_impl(CUR_FILE_PATH + "/../kirkstone"))
+
+def test_async_client_dunfell() -> None:
+    asyncio.run(__test_impl(CUR_FILE_PATH + "/../dunfell"))
+
+async def __test_impl(project_path: str) -> None:
+    async with AsyncBBClient(project_path, INIT_COMMAND) as client:
+        assert await client.start_server(parse="lazy")
+        assert await client.get_variable("MACHINE")
+        assert len(await client.get_recipes()) != 0
+        # subscribed before the build starts, so CommandCompleted is received even if the build finishes at once
+        async with client.events(CommandCompletedEvent) as stream:
+            done: BBEventBase = await client.build_targets(["busybox"], "fetch")
+            assert isinstance(done, CommandCompletedEvent)
+            assert isinstance(await asyncio.wait_for(stream.__anext__(), 60), CommandCompletedEvent)
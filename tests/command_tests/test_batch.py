@@ -0,0 +1,25 @@
+from .common import * 
+from bbclient import *
+
+def test_batch_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_batch_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_batch_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    with client.batch() as batch:
+        machine: CommandFuture = batch.get_variable("MACHINE")
+        recipes: CommandFuture = batch.get_recipes()
+        versions: CommandFuture = batch.get_recipe_versions()
+        priorities: CommandFuture = batch.get_bb_file_priority()
+    assert machine.result() == client.get_variable("MACHINE")
+    assert len(recipes.result()) != 0
+    assert recipes.result() == client.get_recipes()
+    assert versions.result() == client.get_recipe_versions()
+    assert priorities.result() == client.get_bb_file_priority()
+    # four commands are sent in one round trip
+    assert batch.round_trips_saved == 3
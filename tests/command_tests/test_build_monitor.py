@@ -0,0 +1,22 @@
+from .common import * 
+from bbclient import *
+
+def test_build_monitor_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_build_monitor_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_build_monitor_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    monitor: BuildMonitor = BuildMonitor()
+    monitor.attach(client)
+    client.build_targets(["busybox"], "fetch")
+    monitor.detach()
+    snapshot: BuildSnapshot = monitor.snapshot()
+    assert snapshot.running == []
+    assert snapshot.tasks.failed == 0
+    assert snapshot.tasks.completed + snapshot.setscene_tasks.completed > 0
+    assert snapshot.tasks.remaining == 0
@@ -0,0 +1,37 @@
+from .common import * 
+from bbclient import *
+
+def test_columnar_results_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_columnar_results_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_columnar_results_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    commands: List[Callable[..., Any]] = [
+        client.get_recipes,
+        client.get_recipe_depends,
+        client.get_recipe_versions,
+        client.get_bb_file_priority,
+        client.get_default_preference,
+        client.get_recipe_provides,
+        client.get_recipe_inherits,
+        client.get_all_appends,
+    ]
+    for command in commands:
+        table: ColumnarTable = command(columnar=True)
+        assert len(table) != 0 or command == client.get_all_appends
+        assert table.symbols is client.symbols
+        assert table.to_results() == command()
+    priorities: ColumnarTable = client.get_bb_file_priority(columnar=True)
+    recipe_file_path: str = priorities.column("recipe_file_path")[0]
+    assert priorities.columns["recipe_file_path"][0] == priorities.code_of(recipe_file_path)
+    depends: ColumnarTable = client.get_recipe_depends(columnar=True)
+    assert depends.columns["recipe_file_path"][0] == priorities.code_of(depends.column("recipe_file_path")[0])
+    assert depends.row(0) == client.get_recipe_depends()[0]
+    with client.batch() as batch:
+        versions: CommandFuture = batch.get_recipe_versions(columnar=True)
+    assert versions.result().to_results() == client.get_recipe_versions()
@@ -0,0 +1,20 @@
+from .common import * 
+from bbclient import *
+
+def test_command_future_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_command_future_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_command_future_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    future: CommandFuture = client.build_targets_async(["busybox"], "fetch")
+    callback_monitor: CallbackMonitor = CallbackMonitor()
+    future.add_done_callback(lambda done: callback_monitor.callback(client, done.result()))
+    assert isinstance(future.result(), CommandCompletedEvent)
+    assert future.done()
+    assert callback_monitor.is_callback == True
+    assert client.wait_done_async() is future.result()
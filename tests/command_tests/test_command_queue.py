@@ -0,0 +1,26 @@
+from .common import * 
+from bbclient import *
+
+def test_command_queue_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_command_queue_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_command_queue_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    running_command_ids: List[int] = []
+    unique_id: uuid.UUID = client.register_callback(
+        CommandCompletedEvent, lambda bbclient_, _: running_command_ids.append(bbclient_.get_running_command().command_id)
+    )
+    fetch: CommandFuture = client.build_targets_async(["busybox"], "fetch")
+    unpack: CommandFuture = client.build_targets_async(["busybox"], "unpack")
+    assert fetch.command_id < unpack.command_id
+    assert isinstance(fetch.result(), CommandCompletedEvent)
+    assert isinstance(unpack.result(), CommandCompletedEvent)
+    assert fetch.result() is not unpack.result()
+    assert running_command_ids == [fetch.command_id, unpack.command_id]
+    assert client.get_running_command() is None
+    client.unregister_callback(unique_id)
@@ -0,0 +1,38 @@
+from .common import * 
+from bbclient import *
+
+import os
+import tempfile
+import threading
+
+import pytest
+
+def test_daemon_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_daemon_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_daemon_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    socket_path: str = os.path.join(tempfile.mkdtemp(), "bbclient.sock")
+    server: BBDaemonServer = BBDaemonServer(client, socket_path)
+    server.bind()
+    server_thread: threading.Thread = threading.Thread(target=server.serve_forever)
+    server_thread.start()
+    assert is_daemon_running(socket_path)
+    with BBDaemonClient(socket_path) as daemon_client:
+        assert daemon_client.get_variable("MACHINE") == client.get_variable("MACHINE")
+        assert daemon_client.status()["request_count"] == 1
+        daemon_client.stop()
+    server_thread.join()
+    assert not is_daemon_running(socket_path)
+
+    # the daemon and its clients refuse a directory other users can access
+    os.chmod(os.path.dirname(socket_path), 0o755)
+    with pytest.raises(BBDaemonUnsafeSocketError):
+        BBDaemonServer(client, socket_path).bind()
+    with pytest.raises(BBDaemonUnsafeSocketError):
+        BBDaemonClient(socket_path)
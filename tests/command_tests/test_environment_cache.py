@@ -0,0 +1,55 @@
+from .common import * 
+from bbclient import *
+
+import subprocess
+import tempfile
+
+def test_environment_cache_main(monkeypatch: pytest.MonkeyPatch) -> None:
+    __test_impl(monkeypatch, CUR_FILE_PATH + "/../main", CUR_FILE_PATH + "/../kirkstone")
+
+def test_environment_cache_kirkstone(monkeypatch: pytest.MonkeyPatch) -> None:
+    __test_impl(monkeypatch, CUR_FILE_PATH + "/../kirkstone", CUR_FILE_PATH + "/../dunfell")
+
+def test_environment_cache_dunfell(monkeypatch: pytest.MonkeyPatch) -> None:
+    __test_impl(monkeypatch, CUR_FILE_PATH + "/../dunfell", CUR_FILE_PATH + "/../main")
+
+def __test_impl(monkeypatch: pytest.MonkeyPatch, project_path: str, other_project_path: str) -> None:
+    # count the runs of the init script by bash
+    shell_commands: List[str] = []
+    popen: Any = subprocess.Popen
+    def counting_popen(args: Any, *popen_args: Any, **popen_kwargs: Any) -> Any:
+        shell_commands.append(args)
+        return popen(args, *popen_args, **popen_kwargs)
+    monkeypatch.setattr(subprocess, "Popen", counting_popen)
+
+    with tempfile.TemporaryDirectory() as env_cache_dir:
+        BBClient(project_path, INIT_COMMAND, env_cache_dir=env_cache_dir)
+        builddir: str = os.environ["BUILDDIR"]
+        assert len(shell_commands) == 1
+        assert len(os.listdir(env_cache_dir)) == 1
+
+        BBClient(project_path, INIT_COMMAND, env_cache_dir=env_cache_dir)
+        assert len(shell_commands) == 1
+        assert os.environ["BUILDDIR"] == builddir
+        assert len(os.listdir(env_cache_dir)) == 1
+
+        # a client of another project in the same process doesn't make the cache of this project miss
+        BBClient(other_project_path, INIT_COMMAND, env_cache_dir=env_cache_dir)
+        shell_command_count: int = len(shell_commands)
+        BBClient(project_path, INIT_COMMAND, env_cache_dir=env_cache_dir)
+        assert len(shell_commands) == shell_command_count
+        assert os.environ["BUILDDIR"] == builddir
+
+        # changing conf/*.conf invalidates the cache
+        local_conf: str = os.path.join(builddir, "conf", "local.conf")
+        with open(local_conf, "rb") as f:
+            original: bytes = f.read()
+        try:
+            with open(local_conf, "ab") as f:
+                f.write(b"\n# test_environment_cache\n")
+            BBClient(project_path, INIT_COMMAND, env_cache_dir=env_cache_dir)
+            assert len(shell_commands) == shell_command_count + 1
+            assert os.environ["BUILDDIR"] == builddir
+        finally:
+            with open(local_conf, "wb") as f:
+                f.write(original)
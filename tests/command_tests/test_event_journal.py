@@ -0,0 +1,29 @@
+from .common import * 
+from bbclient import *
+
+import tempfile
+
+def test_event_journal_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_event_journal_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_event_journal_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    with tempfile.TemporaryDirectory() as journal_dir:
+        with EventJournal(journal_dir) as journal:
+            client.set_journal(journal)
+            client.build_targets(["busybox"], "fetch")
+            client.set_journal(None)
+        reader: JournalReader = JournalReader(journal_dir)
+        records: List[JournalRecord] = list(reader.read())
+        assert records[-1].event_name == CommandCompletedEvent.EVENT_NAME
+        assert [record.sequence for record in records] == list(range(1, len(records) + 1))
+        callback_monitor: CallbackMonitor = CallbackMonitor()
+        reader.register_callback(TaskBase, callback_monitor.callback, include_subclasses=True)
+        assert reader.replay() == sum(segment.event_counts.get(TaskStartedEvent.EVENT_NAME, 0) + segment.event_counts.get(TaskSucceededEvent.EVENT_NAME, 0) + segment.event_counts.get(TaskFailedEvent.EVENT_NAME, 0) for segment in reader.get_segments())
+        assert callback_monitor.is_callback == True
+        assert all(record.event_name == TaskStartedEvent.EVENT_NAME for record in reader.read([TaskStartedEvent]))
@@ -0,0 +1,27 @@
+from .common import * 
+from bbclient import *
+import bbclient.bbevent
+
+class PluginEvent(BBEventBase):
+    __slots__ = ()
+
+    EVENT_NAME: str = "tests.command_tests.test_event_registry.PluginEvent"
+
+    def __init__(self: "PluginEvent", data: Mapping[str, Any]) -> None:
+        super().__init__(self.EVENT_NAME, data)
+
+def test_event_registry_main() -> None:
+    for event_class in ALL_BB_EVENTS:
+        assert EVENT_REGISTRY[event_class.EVENT_NAME] is event_class
+    assert get_event_class(PluginEvent) == (PluginEvent.EVENT_NAME, None)
+    try:
+        assert register_event(PluginEvent) is PluginEvent
+        assert get_event_class(PluginEvent) == (PluginEvent.EVENT_NAME, PluginEvent)
+        assert PluginEvent in ALL_BB_EVENTS
+    finally:
+        # the registry is global, so the plugin event must not leak into other tests
+        EVENT_REGISTRY.pop(PluginEvent.EVENT_NAME, None)
+        if PluginEvent in ALL_BB_EVENTS:
+            ALL_BB_EVENTS.remove(PluginEvent)
+        bbclient.bbevent.__raw_event_types.clear()
+    assert get_event_class(PluginEvent) == (PluginEvent.EVENT_NAME, None)
@@ -0,0 +1,24 @@
+from .common import * 
+from bbclient import *
+
+import types
+
+# classes defined by bbclient. ALL_BB_EVENTS also has plugin event classes registered by register_event.
+BUILTIN_EVENTS: Tuple[Type[BBEventBase], ...] = tuple(event_class for event_class in ALL_BB_EVENTS if event_class.__module__ == "bbclient.bbevent")
+
+def test_event_slots_main() -> None:
+    for event_class in BUILTIN_EVENTS:
+        assert not hasattr(event_class.__new__(event_class), "__dict__")
+    data: Mapping[str, Any] = {"pid": 1, "_name": "core-image-minimal", "_pkgs": ["core-image-minimal"], "_failures": 0, "msg": "Building Started"}
+    event: BBEventBase = BuildStartedEvent.decode(None, data)
+    assert event.event_name == BuildStartedEvent.EVENT_NAME
+    assert isinstance(event, OperationStarted) and event.msg == "Building Started" and event.name == "core-image-minimal"
+    stats: EventDecodeStats = EventDecodeStats()
+    lazy_event: BBEventBase = BuildStartedEvent.decode_lazily(stats, data)
+    assert stats.decoded == 0
+    assert lazy_event.pkgs == ["core-image-minimal"]
+    assert stats.decoded == 1
+    assert str(lazy_event) == str(event)
+    assert UnknownEvent.decode(None, "my.module.MyEvent", {}).event_name == "my.module.MyEvent"
+    run_queue_data: Mapping[str, Any] = {"pid": 1, "taskid": 1, "taskstring": "busybox:do_fetch", "taskname": "do_fetch", "taskfile": "busybox.bb", "taskhash": "0", "stats": types.SimpleNamespace(completed=1, total=2), "noexec": False}
+    assert runQueueTaskStartedEvent.decode(None, run_queue_data).stats["completed"] == 1
@@ -0,0 +1,24 @@
+from .common import * 
+from bbclient import *
+
+def test_events_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_events_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_events_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    with client.events(TaskBase, CommandCompletedEvent, include_subclasses=True, timeout=600) as stream:
+        client.build_targets_async(["busybox"], "fetch")
+        events: List[BBEventBase] = []
+        for event in stream:
+            events.append(event)
+            if isinstance(event, CommandCompletedEvent):
+                break
+    assert isinstance(events[-1], CommandCompletedEvent)
+    assert stream.sequence == len(events) + stream.dropped
+    stream.seek(0)
+    assert isinstance(next(stream), BBEventBase)
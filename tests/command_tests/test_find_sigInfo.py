@@ -0,0 +1,18 @@
+from .common import *
+from bbclient import *
+
+def test_find_sigInfo_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_find_sigInfo_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_find_sigInfo_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    callback_monitor: CallbackMonitor = CallbackMonitor()
+    callback_id: int = client.register_callback(FindSigInfoResultEvent, callback_monitor.callback)
+    client.find_sigInfo("busybox", "do_fetch", ["0" * 64])
+    assert callback_monitor.is_callback
+    client.unregister_callback(callback_id)
@@ -0,0 +1,19 @@
+from .common import * 
+from bbclient import *
+
+def test_get_event_decode_stats_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_get_event_decode_stats_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_get_event_decode_stats_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    before: EventDecodeStats = client.get_event_decode_stats()
+    client.build_targets(["busybox"], "fetch")
+    after: EventDecodeStats = client.get_event_decode_stats()
+    assert after.received > before.received
+    assert after.decoded > before.decoded
+    assert after.time_per_event > 0
@@ -0,0 +1,18 @@
+from .common import * 
+from bbclient import *
+
+import time
+
+def test_progress_coalescer_main() -> None:
+    coalescer: ProgressCoalescer = ProgressCoalescer(0.05)
+    assert coalescer.get_timeout(1.0) == 1.0
+    assert coalescer.add((TaskProgressEvent, 1, None), 1, "task1-10") == False
+    assert coalescer.add((TaskProgressEvent, 2, None), 2, "task2-10") == False
+    assert coalescer.add((TaskProgressEvent, 1, None), 1, "task1-20") == True
+    assert coalescer.get_timeout(1.0) <= 0.05
+    # progress of the process is passed before its next event
+    assert coalescer.pop(1) == ["task1-20"]
+    assert coalescer.pop_expired() == []
+    time.sleep(0.05)
+    assert coalescer.pop_expired() == ["task2-10"]
+    assert coalescer.get_timeout(None) is None
@@ -0,0 +1,29 @@
+from .common import * 
+from bbclient import *
+
+import threading
+
+params = ["inline", "pool", "ordered"]
+
+@pytest.mark.parametrize("dispatch", params)
+def test_register_callback_dispatch_main(main_client: BBClient, dispatch: str) -> None:
+    __test_impl(main_client, dispatch)
+
+@pytest.mark.parametrize("dispatch", params)
+def test_register_callback_dispatch_kirkstone(kirkstone_client: BBClient, dispatch: str) -> None:
+    __test_impl(kirkstone_client, dispatch)
+
+@pytest.mark.parametrize("dispatch", params)
+def test_register_callback_dispatch_dunfell(dunfell_client: BBClient, dispatch: str) -> None:
+    __test_impl(dunfell_client, dispatch)
+
+def __test_impl(client: BBClient, dispatch: str) -> None:
+    callback_done: threading.Event = threading.Event()
+    callback_id: uuid.UUID = client.register_callback(CommandCompletedEvent, lambda _, event: callback_done.set(), dispatch=dispatch)
+    client.build_targets(["busybox"], "fetch")
+    assert callback_done.wait(10)
+    stats: CallbackStats = client.get_callback_stats(callback_id)
+    client.unregister_callback(callback_id)
+    assert stats.dispatched == 1
+    assert stats.dropped == 0
+    assert stats.failed == 0
@@ -0,0 +1,23 @@
+from .common import * 
+from bbclient import *
+
+def test_register_callback_subclasses_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_register_callback_subclasses_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_register_callback_subclasses_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    exact_monitor: CallbackMonitor = CallbackMonitor()
+    subclass_monitor: CallbackMonitor = CallbackMonitor()
+    exact_id: uuid.UUID = client.register_callback(CommandExitEvent, exact_monitor.callback)
+    subclass_id: uuid.UUID = client.register_callback(CommandExitEvent, subclass_monitor.callback, include_subclasses=True)
+    client.build_targets(["dummy_package"], "fetch")
+    client.unregister_callback(exact_id)
+    client.unregister_callback(subclass_id)
+    assert exact_monitor.is_callback == False
+    assert subclass_monitor.is_callback == True
+    assert isinstance(subclass_monitor.event, CommandFailedEvent)
@@ -0,0 +1,26 @@
+from .common import * 
+from bbclient import *
+import json
+import pickle
+
+def test_result_tuples_main() -> None:
+    result: GetRecipeVersionsResult = GetRecipeVersionsResult(["", "1.0", "r0"], "/PATH/TO/RECIPE/busybox_1.0.bb")
+    assert not hasattr(result, "__dict__")
+    assert (result.recipe_file_path, result.pe, result.pv, result.pr) == ("/PATH/TO/RECIPE/busybox_1.0.bb", "", "1.0", "r0")
+    with pytest.raises(AttributeError):
+        result.pv = "2.0"
+    assert GetRecipeVersionsResult._make_all([("/PATH/TO/RECIPE/busybox_1.0.bb", "", "1.0", "r0")]) == [result]
+    assert pickle.loads(pickle.dumps(result)) == result
+    providers: AllProvidersResult = AllProvidersResult("busybox", [[["", "1.0", "r0"], "/PATH/TO/RECIPE/busybox_1.0.bb"]])
+    assert providers.recipes == [result]
+    assert json.loads(json.dumps([providers], cls=JsonEncoder)) == [
+        {"package_name": "busybox", "recipes": [{"recipe_file_path": "/PATH/TO/RECIPE/busybox_1.0.bb", "pe": "", "pv": "1.0", "pr": "r0"}]}
+    ]
+    skipped: GetSkippedRecipesResult = GetSkippedRecipesResult("/PATH/TO/RECIPE/skipped.bb", {"pn": "skipped", "skipreason": "incompatible"})
+    assert skipped.pn == "skipped" and skipped.provides is None
+    priority: GetBbFilePriorityResult = GetBbFilePriorityResult("/PATH/TO/RECIPE/busybox_1.0.bb", 1)
+    assert priority != GetDefaultPreferenceResult("/PATH/TO/RECIPE/busybox_1.0.bb", 1)
+    assert priority != ("/PATH/TO/RECIPE/busybox_1.0.bb", 1)
+    assert len({priority, GetBbFilePriorityResult("/PATH/TO/RECIPE/busybox_1.0.bb", 1)}) == 1
+    with pytest.raises(TypeError):
+        hash(GetRecipesResult(["busybox", ["/PATH/TO/RECIPE/busybox_1.0.bb"]]))
@@ -0,0 +1,26 @@
+from .common import * 
+from bbclient import *
+
+def test_sstate_store_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_sstate_store_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_sstate_store_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    with SetsceneStore() as store:
+        analyzer: SetsceneAnalyzer = SetsceneAnalyzer(store)
+        analyzer.attach(client)
+        client.build_targets(["busybox"], "fetch")
+        first: int = analyzer.finish("first")
+        client.build_targets(["busybox"], "fetch")
+        second: int = analyzer.finish("second")
+        analyzer.detach()
+        builds: List[BuildReuse] = store.get_builds()
+        assert [build.build_id for build in builds] == [first, second]
+        assert builds[1].executed == 0
+        assert store.get_reexecuted(second) == []
+        assert all(rate.hits + rate.misses + rate.covered + rate.executed > 0 for rate in store.get_task_rates())
@@ -0,0 +1,32 @@
+from .common import * 
+from bbclient import *
+
+def test_start_server_event_mask_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_start_server_event_mask_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_start_server_event_mask_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    callback_monitor: CallbackMonitor = CallbackMonitor()
+    callback_id: uuid.UUID = client.register_callback(runQueueEvent, callback_monitor.callback, include_subclasses=True)
+    before: EventDecodeStats = client.get_event_decode_stats()
+    client.build_targets(["busybox"], "fetch")
+    after: EventDecodeStats = client.get_event_decode_stats()
+    client.unregister_callback(callback_id)
+    # the server sends only runQueue* and Command* events
+    assert after.received > before.received
+    assert after.skipped == before.skipped
+    # waiting for the same event again doesn't send set_event_mask again
+    sent_event_masks: List[Any] = []
+    set_event_mask: Callable[..., Any] = client.set_event_mask
+    client.set_event_mask = lambda *args: sent_event_masks.append(args) or set_event_mask(*args)  # type: ignore
+    try:
+        for _ in range(3):
+            client.wait_event([ConfigParsedEvent], timeout=0.1)
+    finally:
+        del client.set_event_mask
+    assert len(sent_event_masks) <= 1
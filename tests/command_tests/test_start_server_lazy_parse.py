@@ -0,0 +1,66 @@
+from .common import * 
+from bbclient import *
+
+def test_start_server_lazy_parse_main() -> None:
+    __test_impl(CUR_FILE_PATH + "/../main")
+
+def test_start_server_lazy_parse_kirkstone() -> None:
+    __test_impl(CUR_FILE_PATH + "/../kirkstone")
+
+def test_start_server_lazy_parse_dunfell() -> None:
+    __test_impl(CUR_FILE_PATH + "/../dunfell")
+
+def test_start_server_lazy_parse_manual_main() -> None:
+    __test_manual_parse_impl(CUR_FILE_PATH + "/../main")
+
+def test_start_server_lazy_parse_manual_kirkstone() -> None:
+    __test_manual_parse_impl(CUR_FILE_PATH + "/../kirkstone")
+
+def test_start_server_lazy_parse_manual_dunfell() -> None:
+    __test_manual_parse_impl(CUR_FILE_PATH + "/../dunfell")
+
+def __test_impl(project_path: str) -> None:
+    client: BBClient = BBClient(project_path, INIT_COMMAND)
+    callback_monitor: CallbackMonitor = CallbackMonitor()
+    callback_id: uuid.UUID = client.register_callback(ReachableStampsEvent, callback_monitor.callback)
+    assert client.start_server(parse="lazy")
+    assert client.get_variable("MACHINE")
+    assert callback_monitor.is_callback == False
+    with client.batch() as batch:
+        machine: CommandFuture = batch.get_variable("MACHINE")
+    assert machine.result()
+    assert callback_monitor.is_callback == False
+    # the first recipe cache command can't parse recipes in inline callback
+    inline_errors: List[Exception] = []
+    def get_recipes_inline(cur_client: BBClient, _: BBEventBase) -> None:
+        try:
+            cur_client.get_recipes()
+        except BBCommandError as e:
+            inline_errors.append(e)
+    inline_id: uuid.UUID = client.register_callback(CommandCompletedEvent, get_recipes_inline)
+    client.find_config_file_path("local.conf")
+    client.unregister_callback(inline_id)
+    assert len(inline_errors) == 1
+    assert len(client.get_recipes()) != 0
+    assert callback_monitor.is_callback == True
+    callback_monitor.is_callback = False
+    assert len(client.get_recipe_versions()) != 0
+    assert callback_monitor.is_callback == False
+    client.unregister_callback(callback_id)
+    client.stop_server()
+
+
+def __test_manual_parse_impl(project_path: str) -> None:
+    client: BBClient = BBClient(project_path, INIT_COMMAND)
+    parse_events: List[BBEventBase] = []
+    callback_id: uuid.UUID = client.register_callback(ReachableStampsEvent, lambda _, event: parse_events.append(event))
+    assert client.start_server(parse="lazy")
+    client.parse_files()
+    assert len(parse_events) == 1
+    assert len(client.get_recipes()) != 0
+    assert len(parse_events) == 1
+    client.reset_cooker()
+    assert len(client.get_recipes()) != 0
+    assert len(parse_events) == 2
+    client.unregister_callback(callback_id)
+    client.stop_server()
@@ -0,0 +1,15 @@
+from .common import * 
+from bbclient import *
+import pickle
+
+def test_symbol_table_main() -> None:
+    symbols: SymbolTable = SymbolTable(["/PATH/TO/RECIPE/busybox_1.0.bb"])
+    assert list(symbols.intern_all(["glibc", "/PATH/TO/RECIPE/busybox_1.0.bb", "glibc"])) == [1, 0, 1]
+    symbols.compact()
+    assert "glibc" in symbols and symbols.id_of("gcc") is None
+    assert symbols.intern("gcc") == 2 and symbols.resolve([2, 0]) == ["gcc", "/PATH/TO/RECIPE/busybox_1.0.bb"]
+    assert pickle.loads(pickle.dumps(symbols)).id_of("gcc") == 2
+    priorities: ColumnarTable = ColumnarTable.from_mapping(GetBbFilePriorityResult, {"/PATH/TO/RECIPE/busybox_1.0.bb": 5}, symbols)
+    appends: ColumnarTable = ColumnarTable.from_rows(GetAllAppendsResult, [["busybox_%.bbappend", "/PATH/TO/APPEND/busybox_%.bbappend"]], symbols)
+    assert priorities.columns["recipe_file_path"][0] == 0 and len(symbols) == 5
+    assert appends.row(0) == GetAllAppendsResult("busybox_%.bbappend", "/PATH/TO/APPEND/busybox_%.bbappend")
@@ -0,0 +1,25 @@
+from .common import * 
+from bbclient import *
+
+def test_task_hash_index_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_task_hash_index_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_task_hash_index_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    with TaskHashIndex() as index:
+        index.attach(client)
+        client.build_targets(["busybox"], "fetch")
+        first: int = index.finish("first")
+        client.build_targets(["busybox"], "fetch")
+        second: int = index.finish("second")
+        index.detach()
+        builds: List[TaskHashBuild] = index.get_builds()
+        assert [build.build_id for build in builds] == [first, second]
+        assert builds[0].task_count > 0
+        assert index.get_changed_since(first) == []
+        assert all(not reason.is_hash_changed for reason in index.explain_rebuild("busybox", second, client))
@@ -0,0 +1,22 @@
+from .common import * 
+from bbclient import *
+
+def test_task_timing_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_task_timing_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_task_timing_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    analyzer: TaskTimingAnalyzer = TaskTimingAnalyzer()
+    analyzer.attach(client)
+    client.generate_dep_tree_event(["busybox"], "fetch")
+    client.build_targets(["busybox"], "fetch")
+    analyzer.detach()
+    report: TaskTimingReport = analyzer.report()
+    assert all(timing.succeeded and timing.duration >= 0 for timing in report.tasks)
+    assert all(timing in report.tasks for timing in report.critical_path)
+    assert report.critical_path_duration <= sum(timing.duration for timing in report.tasks)
@@ -0,0 +1,25 @@
+from .common import * 
+from bbclient import *
+
+import time
+import threading
+
+def test_wait_event_main(main_client: BBClient) -> None:
+    __test_impl(main_client)
+
+def test_wait_event_kirkstone(kirkstone_client: BBClient) -> None:
+    __test_impl(kirkstone_client)
+
+def test_wait_event_dunfell(dunfell_client: BBClient) -> None:
+    __test_impl(dunfell_client)
+
+def __test_impl(client: BBClient) -> None:
+    assert client.wait_event([ConfigParsedEvent], 0.1) is None
+    events: List[Optional[BBEventBase]] = []
+    waiter: threading.Thread = threading.Thread(target=lambda: events.append(client.wait_event([CommandExitEvent], 600, include_subclasses=True)))
+    waiter.start()
+    time.sleep(1)
+    future: CommandFuture = client.build_targets_async(["busybox", "dummy_package"], "fetch")
+    waiter.join()
+    assert isinstance(events[0], CommandFailedEvent)
+    assert future.result() is events[0]